@@ -0,0 +1,270 @@
+"""asyncio counterpart of IlluminatiDB, built on aiomysql.
+
+Operations that run several independent queries (the surveillance
+analysis and the monthly faction report) issue them concurrently on
+separate pooled connections, so they take as long as the slowest query
+rather than the sum of all of them.
+"""
+import asyncio
+from typing import List, Dict, Any, Optional
+
+from script import (
+    DB_CONFIG,
+    TIMELINE_EVENTS_QUERY,
+    FACTIONS_BY_MEMBER_COUNT_QUERY,
+    TOTAL_MEMBERS_QUERY,
+    MEETINGS_QUERY,
+    HIERARCHY_QUERY,
+    HIERARCHY_STORE_EXISTS_QUERY,
+    HIERARCHY_ADD_ROOT,
+    HIERARCHY_ADD_SUBORDINATE,
+    HIERARCHY_LINK_SUBORDINATE,
+    INDIVIDUAL_STATS_QUERY,
+    ORGANIZATION_STATS_QUERY,
+    SURVEILLANCE_SUMMARY_QUERY,
+    INSERT_MEMBER_QUERY,
+    _check_match,
+    _limit_artifacts,
+    _parse_search_terms,
+    _month_range,
+    _power_search_query,
+    _rank_power_matches,
+)
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+
+class AsyncIlluminatiDB:
+    def __init__(self, minsize: int = 1, maxsize: int = 10, pool_recycle: int = -1, **connect_kwargs):
+        config = {key: value for key, value in DB_CONFIG.items() if key != 'cursorclass'}
+        # aiomysql spells the schema argument "db".
+        config['db'] = config.pop('database')
+        config.update(connect_kwargs)
+        self._config = config
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.pool_recycle = pool_recycle
+        self.pool = None
+        # Whether Member_Hierarchy exists; looked up on member writes until found.
+        self._hierarchy_tables = False
+
+    async def connect(self):
+        if aiomysql is None:
+            raise ImportError("AsyncIlluminatiDB requires aiomysql (pip install aiomysql)")
+        if self.pool is None:
+            self.pool = await aiomysql.create_pool(
+                minsize=self.minsize,
+                maxsize=self.maxsize,
+                pool_recycle=self.pool_recycle,
+                cursorclass=aiomysql.DictCursor,
+                autocommit=True,
+                **self._config
+            )
+        return self
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _fetchall(self, query: str, args=None) -> List[Dict]:
+        async with self.pool.acquire() as connection, connection.cursor() as cursor:
+            await cursor.execute(query, args)
+            return await cursor.fetchall()
+
+    async def _fetchone(self, query: str, args=None) -> Optional[Dict]:
+        async with self.pool.acquire() as connection, connection.cursor() as cursor:
+            await cursor.execute(query, args)
+            return await cursor.fetchone()
+
+    async def get_timeline_events_by_member(self, member_title: str) -> List[Dict]:
+        return await self._fetchall(TIMELINE_EVENTS_QUERY, (member_title,))
+
+    async def get_factions_by_member_count(self, min_members: int) -> List[Dict]:
+        return await self._fetchall(FACTIONS_BY_MEMBER_COUNT_QUERY, (min_members,))
+
+    async def get_total_members(self) -> Dict[str, int]:
+        return await self._fetchone(TOTAL_MEMBERS_QUERY)
+
+    async def search_artifacts_by_power(self, power_text: str, match: str = 'substring',
+                                        limit: Optional[int] = None) -> List[Dict]:
+        _check_match(match)
+        terms = _parse_search_terms(power_text, match)
+        rows = list(await self._fetchall(*_power_search_query(terms, match)))
+        if match == 'substring':
+            return _limit_artifacts(rows, limit)
+        return _rank_power_matches(rows, limit)
+
+    async def generate_monthly_faction_report(self, year: int, month: int) -> Dict[str, Any]:
+        meetings, hierarchy = await asyncio.gather(
+            self._fetchall(MEETINGS_QUERY, _month_range(year, month)),
+            self._fetchall(HIERARCHY_QUERY)
+        )
+        return {
+            "meetings": meetings,
+            "hierarchy": hierarchy
+        }
+
+    async def analyze_surveillance_targets(self) -> Dict[str, Any]:
+        individual_stats, org_stats, summary = await asyncio.gather(
+            self._fetchone(INDIVIDUAL_STATS_QUERY),
+            self._fetchone(ORGANIZATION_STATS_QUERY),
+            self._fetchone(SURVEILLANCE_SUMMARY_QUERY)
+        )
+        return {
+            "individuals": individual_stats,
+            "organizations": org_stats,
+            "summary": summary
+        }
+
+    async def add_faction_member(self, member_data: Dict) -> bool:
+        async with self.pool.acquire() as connection:
+            await connection.begin()
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("SELECT Member_Id FROM Faction_Members WHERE Member_Id = %s",
+                                         (member_data['Member_Id'],))
+                    if await cursor.fetchone():
+                        raise ValueError("Member ID already exists")
+
+                    await cursor.execute("SELECT Faction_Id FROM Factions WHERE Faction_Id = %s",
+                                         (member_data['Faction_Id'],))
+                    if not await cursor.fetchone():
+                        raise ValueError("Invalid Faction ID")
+
+                    if member_data.get('Leader_Id'):
+                        await cursor.execute("""
+                        SELECT Member_Id
+                        FROM Faction_Members
+                        WHERE Member_Id = %s AND Faction_Id = %s
+                        """, (member_data['Leader_Id'], member_data['Faction_Id']))
+                        if not await cursor.fetchone():
+                            raise ValueError("Invalid Leader ID or Leader not in same faction")
+
+                    await cursor.execute(INSERT_MEMBER_QUERY, (
+                        member_data['Member_Id'],
+                        member_data['Fname'],
+                        member_data.get('Mname'),
+                        member_data['Lname'],
+                        member_data['Dob'],
+                        member_data['Faction_Id'],
+                        member_data.get('Leader_Id')
+                    ))
+                    if not self._hierarchy_tables:
+                        await cursor.execute(HIERARCHY_STORE_EXISTS_QUERY)
+                        self._hierarchy_tables = await cursor.fetchone() is not None
+                    if self._hierarchy_tables:
+                        await self._hierarchy_add(cursor, member_data)
+                await connection.commit()
+                return True
+            except Exception as e:
+                await connection.rollback()
+                raise e
+
+    async def _hierarchy_add(self, cursor, member_data: Dict):
+        """Keep the hierarchy store that IlluminatiDB maintains current for a new member."""
+        args = {'member': member_data['Member_Id'], 'faction': member_data['Faction_Id'],
+                'leader': member_data.get('Leader_Id')}
+        if not args['leader']:
+            for statement in HIERARCHY_ADD_ROOT:
+                await cursor.execute(statement, args)
+            return
+        await cursor.execute(HIERARCHY_ADD_SUBORDINATE, args)
+        if cursor.rowcount:
+            for statement in HIERARCHY_LINK_SUBORDINATE:
+                await cursor.execute(statement, args)
+
+    async def update_sanctum_location(self, mantra: str, new_location: Dict) -> bool:
+        async with self.pool.acquire() as connection:
+            await connection.begin()
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("SELECT Mantra FROM Sanctum_Sanctorum WHERE Mantra = %s", (mantra,))
+                    if not await cursor.fetchone():
+                        raise ValueError("Sanctum not found")
+
+                    await cursor.execute("""
+                    UPDATE Sanctum_Sanctorum
+                    SET Street = %s, City = %s, Country = %s
+                    WHERE Mantra = %s
+                    """, (new_location['Street'], new_location['City'], new_location['Country'], mantra))
+                await connection.commit()
+                return True
+            except Exception as e:
+                await connection.rollback()
+                raise e
+
+    async def delete_artifact(self, artifact_id: int) -> bool:
+        async with self.pool.acquire() as connection:
+            await connection.begin()
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("""
+                    SELECT a.Artifact_Id
+                    FROM Artifacts_And_Treasures a
+                    JOIN Factions f ON a.Faction_Id = f.Faction_Id
+                    WHERE a.Artifact_Id = %s
+                    """, (artifact_id,))
+                    if not await cursor.fetchone():
+                        raise ValueError("Artifact not found")
+
+                    await cursor.execute("DELETE FROM Powers WHERE Artifact_Id = %s", (artifact_id,))
+                    await cursor.execute("DELETE FROM Guards WHERE Artifact_Id = %s", (artifact_id,))
+                    await cursor.execute("DELETE FROM Perform_Rituals WHERE Artifact_Id = %s", (artifact_id,))
+                    await cursor.execute("DELETE FROM Artifacts_And_Treasures WHERE Artifact_Id = %s", (artifact_id,))
+                await connection.commit()
+                return True
+            except Exception as e:
+                await connection.rollback()
+                raise e
+
+    async def update_illuminati_name(self, title: str, new_name: str) -> bool:
+        """Update: Change the name of a Key Illuminati Member"""
+        async with self.pool.acquire() as connection:
+            await connection.begin()
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("SELECT Title FROM Key_Illuminati_Members WHERE Title = %s", (title,))
+                    if not await cursor.fetchone():
+                        raise ValueError("Illuminati member not found")
+
+                    await cursor.execute("UPDATE Key_Illuminati_Members SET Name = %s WHERE Title = %s",
+                                         (new_name, title))
+                await connection.commit()
+                return True
+            except Exception as e:
+                await connection.rollback()
+                raise e
+
+    async def update_faction_head(self, faction_id: int, new_head_title: str) -> bool:
+        """Update: Change the HeadTitle of a Faction"""
+        async with self.pool.acquire() as connection:
+            await connection.begin()
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("SELECT Faction_Id FROM Factions WHERE Faction_Id = %s", (faction_id,))
+                    if not await cursor.fetchone():
+                        raise ValueError("Faction not found")
+
+                    await cursor.execute("SELECT Title FROM Key_Illuminati_Members WHERE Title = %s",
+                                         (new_head_title,))
+                    if not await cursor.fetchone():
+                        raise ValueError("New head title not found in Key Illuminati Members")
+
+                    await cursor.execute("UPDATE Factions SET HeadTitle = %s WHERE Faction_Id = %s",
+                                         (new_head_title, faction_id))
+                await connection.commit()
+                return True
+            except Exception as e:
+                await connection.rollback()
+                raise e
@@ -0,0 +1,172 @@
+"""Non-interactive batch runner for the Illuminati Database Management System.
+
+Reads one operation per line as JSON and writes one JSON result per line,
+all over a single connection pool:
+
+    python batch.py operations.jsonl --parallel 8 > results.jsonl
+
+An operation names an IlluminatiDB method and its arguments, given as an
+object (keyword arguments) or a list (positional arguments):
+
+    {"id": "q1", "op": "get_factions_by_member_count", "args": {"min_members": 5}}
+    {"op": "update_illuminati_name", "args": ["The Architect", "Adam Weishaupt"]}
+
+Consecutive read operations run on --parallel threads; a write waits for
+every earlier operation and runs alone, so writes keep their input order.
+Results are written in input order. Timing for the whole batch goes to
+stderr as a final JSON line.
+"""
+import argparse
+import json
+import sys
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import seed
+from script import IlluminatiDB
+
+READ_OPERATIONS = {
+    'get_timeline_events_by_member',
+    'get_factions_by_member_count',
+    'get_total_members',
+    'search_artifacts_by_power',
+    'generate_monthly_faction_report',
+    'generate_faction_report',
+    'analyze_surveillance_targets',
+    'surveillance_distribution',
+    'page_timeline_events_by_member',
+    'page_factions_by_member_count',
+    'page_artifacts_by_power',
+}
+
+WRITE_OPERATIONS = {
+    'add_faction_member',
+    'add_faction_members',
+    'update_sanctum_location',
+    'delete_artifact',
+    'delete_artifacts',
+    'update_illuminati_name',
+    'update_faction_head',
+}
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, timedelta)):
+        return str(value)
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _parse(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yield one request per non-blank line; malformed lines carry their error."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+            op = request.get('op')
+            # A list or dict op is unhashable, so check the type first.
+            if not isinstance(op, str) or op not in READ_OPERATIONS | WRITE_OPERATIONS:
+                raise ValueError(f"unknown operation {op!r}")
+            if not isinstance(request.get('args', {}), (dict, list)):
+                raise ValueError("args must be an object or a list")
+        except ValueError as e:
+            request = {"op": None, "error": str(e)}
+        request.setdefault('id', number)
+        yield request
+
+
+def _run(db: IlluminatiDB, request: Dict[str, Any]) -> Dict[str, Any]:
+    result = {"id": request['id'], "op": request['op']}
+    if 'error' in request:
+        return dict(result, ok=False, error=request['error'], elapsed_ms=0.0)
+
+    args = request.get('args', {})
+    started = time.perf_counter()
+    try:
+        method = getattr(db, request['op'])
+        value = method(**args) if isinstance(args, dict) else method(*args)
+        result.update(ok=True, result=value)
+    except Exception as e:
+        result.update(ok=False, error=str(e))
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+def _segments(requests: Iterator[Dict[str, Any]], window: int) -> Iterator[Tuple[bool, List[Dict[str, Any]]]]:
+    """Group requests into runs of up to window reads, and single writes."""
+    reads = []
+    for request in requests:
+        if request['op'] in WRITE_OPERATIONS:
+            if reads:
+                yield True, reads
+                reads = []
+            yield False, [request]
+        else:
+            reads.append(request)
+            if len(reads) >= window:
+                yield True, reads
+                reads = []
+    if reads:
+        yield True, reads
+
+
+def run_batch(db: IlluminatiDB, lines: Iterable[str], output, parallel: int = 1) -> Dict[str, Any]:
+    """Run every operation in lines, writing JSON results to output. Returns batch timing."""
+    summary = {"operations": 0, "errors": 0}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        for concurrent, requests in _segments(_parse(lines), parallel * 16):
+            if concurrent and parallel > 1:
+                results = executor.map(lambda request: _run(db, request), requests)
+            else:
+                results = (_run(db, request) for request in requests)
+            for result in results:
+                summary["operations"] += 1
+                summary["errors"] += not result["ok"]
+                output.write(json.dumps(result, default=_json_default) + "\n")
+            output.flush()
+    elapsed = time.perf_counter() - started
+    summary["elapsed_ms"] = round(elapsed * 1000, 3)
+    summary["ops_per_sec"] = round(summary["operations"] / elapsed, 2) if elapsed else None
+    return summary
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run IlluminatiDB operations from JSON lines")
+    arg_parser.add_argument("input", nargs="?", default="-", help="JSON lines file, - for stdin")
+    arg_parser.add_argument("--parallel", type=int, default=1, help="threads for read operations")
+    arg_parser.add_argument("--output", default="-", help="results file, - for stdout")
+    arg_parser.add_argument("--timeout", type=float, help="seconds allowed per operation")
+    seed.add_connection_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    if args.parallel < 1:
+        arg_parser.error("--parallel must be at least 1")
+
+    connect_args = {key: value for key, value in vars(args).items()
+                    if key in ('host', 'port', 'user', 'password', 'database') and value is not None}
+    source = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        with IlluminatiDB(max_size=args.parallel, default_timeout=args.timeout, **connect_args) as db:
+            summary = run_batch(db, source, output, args.parallel)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(json.dumps({"batch": summary}), file=sys.stderr)
+    sys.exit(1 if summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""Benchmarks for the Illuminati Database Management System.
+
+Run against a local MySQL instance holding the Illuminati schema:
+
+    python benchmark.py pool --threads 8 --duration 10
+    python benchmark.py bulk-import --faction-id 1 --sizes 10000 100000 1000000
+    python benchmark.py suite --scales 1000 100000 10000000 --output run.json
+    python benchmark.py compare baseline.json run.json
+    python benchmark.py rows --queries hierarchy members
+"""
+import argparse
+import gc
+import json
+import math
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import seed
+import pymysql
+
+from script import HIERARCHY_QUERY, IlluminatiDB, RecordCursor, SSRecordCursor
+
+
+def _run_for(duration: float, threads: int, worker: Callable[[], None]) -> Dict[str, float]:
+    """Call worker from several threads for duration seconds and count calls."""
+    counts = [0] * threads
+    errors = [0] * threads
+    stop = threading.Event()
+
+    def loop(index: int):
+        while not stop.is_set():
+            try:
+                worker()
+                counts[index] += 1
+            except Exception:
+                errors[index] += 1
+
+    pool = [threading.Thread(target=loop, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": sum(counts),
+        "errors": sum(errors),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(sum(counts) / elapsed, 1)
+    }
+
+
+def bench_pool(args):
+    """Compare a shared pool against opening one IlluminatiDB per request."""
+    def per_instance():
+        with IlluminatiDB(min_size=1, max_size=1) as db:
+            db.get_total_members()
+
+    print(f"=== {args.threads} threads, {args.duration}s per run ===")
+    result = _run_for(args.duration, args.threads, per_instance)
+    print(f"One connection per instance: {result['requests_per_second']} req/s "
+          f"({result['requests']} requests, {result['errors']} errors)")
+
+    with IlluminatiDB(min_size=args.threads, max_size=args.threads) as db:
+        result = _run_for(args.duration, args.threads, db.get_total_members)
+    print(f"Shared connection pool:      {result['requests_per_second']} req/s "
+          f"({result['requests']} requests, {result['errors']} errors)")
+
+
+def _synthetic_members(first_id: int, count: int, faction_id: int):
+    """Members of one faction, each led by a random earlier member of the batch."""
+    for offset in range(count):
+        member_id = first_id + offset
+        yield {
+            'Member_Id': member_id,
+            'Fname': f"Initiate{member_id}",
+            'Mname': None,
+            'Lname': "Bench",
+            'Dob': "1990-01-01",
+            'Faction_Id': faction_id,
+            'Leader_Id': random.randint(first_id, member_id - 1) if offset else None
+        }
+
+
+def _remove_members(db: IlluminatiDB, first_id: int):
+    with db._connection() as connection, connection.cursor() as cursor:
+        # Highest IDs first so subordinates go before their leaders.
+        cursor.execute(
+            "DELETE FROM Faction_Members WHERE Member_Id >= %s ORDER BY Member_Id DESC", (first_id,)
+        )
+        connection.commit()
+
+
+def bench_bulk_import(args):
+    """Time add_faction_members against a loop of add_faction_member."""
+    with IlluminatiDB() as db:
+        with db._connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(Member_Id), 0) + 1 as first_id FROM Faction_Members")
+            first_id = cursor.fetchone()['first_id']
+
+        for size in args.sizes:
+            members = list(_synthetic_members(first_id, size, args.faction_id))
+            started = time.perf_counter()
+            report = db.add_faction_members(members, chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - started
+            print(f"add_faction_members  {size:>9} rows: {elapsed:8.2f}s "
+                  f"({report['inserted'] / elapsed:,.0f} rows/s, {len(report['errors'])} errors)")
+            _remove_members(db, first_id)
+
+            if size <= args.compare_up_to:
+                started = time.perf_counter()
+                for member_data in members:
+                    db.add_faction_member(member_data)
+                elapsed = time.perf_counter() - started
+                print(f"add_faction_member   {size:>9} rows: {elapsed:8.2f}s ({size / elapsed:,.0f} rows/s)")
+                _remove_members(db, first_id)
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _workload(db: IlluminatiDB, rng: random.Random) -> Dict[str, Callable[[], Any]]:
+    """One call of every IlluminatiDB operation, with arguments drawn from the seeded data."""
+    with db._connection() as connection, connection.cursor() as cursor:
+        cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM Key_Illuminati_Members) as titles,
+            (SELECT COUNT(*) FROM Factions) as factions,
+            (SELECT COUNT(*) FROM Sanctum_Sanctorum) as sanctums,
+            (SELECT COALESCE(MAX(Member_Id), 0) FROM Faction_Members) as last_member,
+            (SELECT COALESCE(MAX(Artifact_Id), 0) FROM Artifacts_And_Treasures) as last_artifact,
+            (SELECT YEAR(MIN(Date)) FROM Faction_Meetings) as first_year,
+            (SELECT YEAR(MAX(Date)) FROM Faction_Meetings) as last_year
+        """)
+        data = cursor.fetchone()
+
+    next_member = iter(range(data['last_member'] + 1, sys.maxsize))
+    # Deletions work down from the newest artifact so each call hits a fresh one.
+    doomed = iter(range(data['last_artifact'], 0, -1))
+    first_year = data['first_year'] or 2000
+    last_year = data['last_year'] or first_year
+
+    def title() -> str:
+        return f"Title{rng.randint(1, max(1, data['titles']))}"
+
+    def faction() -> int:
+        return rng.randint(1, max(1, data['factions']))
+
+    return {
+        'get_timeline_events_by_member': lambda: db.get_timeline_events_by_member(title()),
+        'get_factions_by_member_count': lambda: db.get_factions_by_member_count(rng.randint(0, 1000)),
+        'get_total_members': db.get_total_members,
+        'search_artifacts_by_power': lambda: db.search_artifacts_by_power(rng.choice(seed.POWERS).split()[0]),
+        'generate_monthly_faction_report': lambda: db.generate_monthly_faction_report(
+            rng.randint(first_year, last_year), rng.randint(1, 12)),
+        'analyze_surveillance_targets': db.analyze_surveillance_targets,
+        'add_faction_member': lambda: db.add_faction_member({
+            'Member_Id': next(next_member),
+            'Fname': rng.choice(seed.FIRST_NAMES),
+            'Mname': None,
+            'Lname': rng.choice(seed.LAST_NAMES),
+            'Dob': "1990-01-01",
+            'Faction_Id': faction(),
+            'Leader_Id': None
+        }),
+        'update_sanctum_location': lambda: db.update_sanctum_location(
+            f"Mantra{rng.randint(1, max(1, data['sanctums']))}",
+            dict(zip(('Street', 'City', 'Country'), (f"{rng.randint(1, 999)} Hidden Lane",) + rng.choice(seed.CITIES)))),
+        'delete_artifact': lambda: db.delete_artifact(next(doomed)),
+        'update_illuminati_name': lambda: db.update_illuminati_name(
+            title(), f"{rng.choice(seed.FIRST_NAMES)} {rng.choice(seed.LAST_NAMES)}"),
+        'update_faction_head': lambda: db.update_faction_head(faction(), title()),
+    }
+
+
+def _measure(call: Callable[[], Any], iterations: int) -> Dict[str, Any]:
+    latencies = []
+    errors = 0
+    call()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        began = time.perf_counter()
+        try:
+            call()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - started
+
+    # A separate traced call, so tracing overhead doesn't skew the latencies.
+    tracemalloc.start()
+    try:
+        result = call()
+    except Exception:
+        result = None
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "ops_per_sec": round(iterations / elapsed, 2),
+        "peak_memory_bytes": peak,
+        "rows": len(result) if isinstance(result, list) else None,
+        "errors": errors
+    }
+
+
+def bench_suite(args):
+    """Seed each scale and time every operation against it."""
+    connect_args = {key: value for key, value in vars(args).items()
+                    if key in ('host', 'port', 'user', 'password', 'database') and value is not None}
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "iterations": args.iterations,
+        "results": {}
+    }
+    for scale in args.scales:
+        if not args.no_seed:
+            connection = seed.connect(**connect_args)
+            try:
+                seed.create_schema(connection, reset=True)
+                seed.seed(connection, scale, progress=None)
+            finally:
+                connection.close()
+
+        rng = random.Random(args.seed)
+        results = report["results"][str(scale)] = {}
+        with IlluminatiDB(**connect_args) as db:
+            for name, call in _workload(db, rng).items():
+                results[name] = _measure(call, args.iterations)
+                print(f"{scale:>10} {name:<32} p50 {results[name]['p50_ms']:>9.2f}ms "
+                      f"p95 {results[name]['p95_ms']:>9.2f}ms p99 {results[name]['p99_ms']:>9.2f}ms "
+                      f"{results[name]['ops_per_sec']:>9.1f}/s")
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def bench_compare(args):
+    """Flag operations whose p95 latency grew by more than the threshold."""
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline = json.load(baseline_file)["results"]
+        candidate = json.load(candidate_file)["results"]
+
+    regressions = 0
+    for scale, operations in candidate.items():
+        for name, result in operations.items():
+            before = baseline.get(scale, {}).get(name)
+            if not before or not before["p95_ms"]:
+                continue
+            ratio = result["p95_ms"] / before["p95_ms"]
+            flag = ""
+            if ratio > 1 + args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{scale:>10} {name:<32} p95 {before['p95_ms']:>9.2f}ms -> {result['p95_ms']:>9.2f}ms "
+                  f"({ratio:.2f}x){flag}")
+
+    if regressions:
+        print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+ROW_QUERIES = {
+    'hierarchy': HIERARCHY_QUERY,
+    'members': "SELECT * FROM Faction_Members",
+    'timeline': "SELECT * FROM Sacred_Timeline_Events",
+}
+
+
+def _fetch_rows(db: IlluminatiDB, query: str, cursor_class, streaming: bool) -> Dict[str, Any]:
+    """Read every row of query with cursor_class; time it, then measure what the rows hold on to."""
+    with db._connection(exclusive=streaming) as connection:
+        started = time.perf_counter()
+        with connection.cursor(cursor_class) as cursor:
+            cursor.execute(query)
+            if streaming:
+                count = sum(1 for _ in iter(cursor.fetchone, None))
+            else:
+                count = len(cursor.fetchall())
+        elapsed = time.perf_counter() - started
+
+        if streaming:
+            return {"rows": count, "seconds": round(elapsed, 3),
+                    "rows_per_sec": round(count / elapsed, 1) if elapsed else None}
+
+        tracemalloc.start()
+        with connection.cursor(cursor_class) as cursor:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        gc_started = time.perf_counter()
+        gc.collect()
+        gc_seconds = time.perf_counter() - gc_started
+        del rows
+    return {
+        "rows": count,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(count / elapsed, 1) if elapsed else None,
+        "retained_bytes": retained,
+        "bytes_per_row": round(retained / count, 1) if count else None,
+        "gc_collect_ms": round(gc_seconds * 1000, 3)
+    }
+
+
+def bench_rows(args):
+    """Compare dict rows with compact Record rows on large result sets."""
+    connect_args = {key: value for key, value in vars(args).items()
+                    if key in ('host', 'port', 'user', 'password', 'database') and value is not None}
+    variants = (
+        ("DictCursor", pymysql.cursors.DictCursor, False),
+        ("RecordCursor", RecordCursor, False),
+        ("SSDictCursor", pymysql.cursors.SSDictCursor, True),
+        ("SSRecordCursor", SSRecordCursor, True),
+    )
+    with IlluminatiDB(**connect_args) as db:
+        for name in args.queries:
+            for label, cursor_class, streaming in variants:
+                result = _fetch_rows(db, ROW_QUERIES[name], cursor_class, streaming)
+                line = (f"{name:<10} {label:<15} {result['rows']:>10} rows {result['seconds']:>8.2f}s "
+                        f"{result['rows_per_sec'] or 0:>12,.0f} rows/s")
+                if not streaming:
+                    line += (f" {result['bytes_per_row'] or 0:>8.1f} B/row "
+                             f"gc {result['gc_collect_ms']:>8.1f}ms")
+                print(line)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="IlluminatiDB benchmarks")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    pool = commands.add_parser("pool", help="pooled vs per-instance connections")
+    pool.add_argument("--threads", type=int, default=8)
+    pool.add_argument("--duration", type=float, default=10.0)
+    pool.set_defaults(func=bench_pool)
+
+    bulk = commands.add_parser("bulk-import", help="bulk vs one-by-one member inserts")
+    bulk.add_argument("--faction-id", type=int, required=True, help="existing faction to add members to")
+    bulk.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    bulk.add_argument("--chunk-size", type=int, default=1000)
+    bulk.add_argument("--compare-up-to", type=int, default=10_000,
+                      help="also time the one-by-one loop for sizes up to this")
+    bulk.set_defaults(func=bench_bulk_import)
+
+    suite = commands.add_parser("suite", help="seed each scale and time all eleven operations")
+    suite.add_argument("--scales", type=int, nargs="+", default=[1000, 100_000, 10_000_000],
+                       help="Faction_Members rows per run; other tables scale with it")
+    suite.add_argument("--iterations", type=int, default=50)
+    suite.add_argument("--seed", type=int, default=42)
+    suite.add_argument("--no-seed", action="store_true", help="benchmark the data already loaded")
+    suite.add_argument("--output", default="benchmark.json")
+    seed.add_connection_arguments(suite)
+    suite.set_defaults(func=bench_suite)
+
+    compare = commands.add_parser("compare", help="compare two suite results")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--threshold", type=float, default=0.2, help="allowed p95 growth, 0.2 = 20%%")
+    compare.set_defaults(func=bench_compare)
+
+    rows = commands.add_parser("rows", help="dict rows vs compact Record rows")
+    rows.add_argument("--queries", nargs="+", choices=sorted(ROW_QUERIES), default=["hierarchy", "members"])
+    seed.add_connection_arguments(rows)
+    rows.set_defaults(func=bench_rows)
+
+    args = arg_parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
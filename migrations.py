@@ -0,0 +1,431 @@
+"""Indexes for the join and filter keys of IlluminatiDB, and a query plan advisor.
+
+    python migrations.py status
+    python migrations.py apply
+    python migrations.py advise --output plans.json
+    python migrations.py advise --baseline plans.json
+
+apply adds every index in INDEXES that the table doesn't already have, so
+it can be run any number of times. An index counts as present when an
+existing one starts with the same columns; InnoDB secondary indexes also
+carry the primary key, and foreign keys create an index of their own, so
+several of these are usually there from the schema alone.
+
+advise runs every operation against a seeded database, EXPLAINing each
+statement before it runs, and lists full table and index scans,
+filesorts and temporary tables per operation. Writes are only EXPLAINed,
+never executed, so the database is left as it was. It exits non-zero
+when an operation produced no plan at all, and with --baseline when an
+operation's plans pick up a problem the baseline didn't have.
+"""
+import argparse
+import contextlib
+import json
+import sys
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import pymysql
+
+import seed
+from script import IlluminatiDB, QueryMetrics, _current_operation
+
+# (table, index name, columns), with the statements each one serves.
+INDEXES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    # get_timeline_events_by_member: WHERE o.Title = %s, then the join to events.
+    ('Orchestrates', 'idx_orchestrates_title', ('Title', 'Event_Id')),
+    # Member counts per faction and the member subquery of the meetings report.
+    ('Faction_Members', 'idx_faction_members_faction', ('Faction_Id',)),
+    # The recursive hierarchy join and its Subordinates count.
+    ('Faction_Members', 'idx_faction_members_leader', ('Leader_Id',)),
+    # Factions joined to their head's name.
+    ('Factions', 'idx_factions_head', ('HeadTitle',)),
+    # Artifact search: Powers and Guards joined on the artifact, artifacts on the faction.
+    ('Powers', 'idx_powers_artifact', ('Artifact_Id', 'Power')),
+    ('Guards', 'idx_guards_artifact', ('Artifact_Id', 'Member_Id')),
+    ('Artifacts_And_Treasures', 'idx_artifacts_faction', ('Faction_Id',)),
+    # MEETINGS_QUERY: date range read in (Date, Time) order, so no filesort.
+    ('Faction_Meetings', 'idx_faction_meetings_date', ('Date', 'Time')),
+    # Surveillance windows, the earliest/latest dates and the target joins, covered.
+    ('Surveillance', 'idx_surveillance_start', ('Start_Date_Of_Survey', 'Target_Id')),
+    # Surveys joined from Surveillance, covering the surveillor Title.
+    ('Surveys', 'idx_surveys_surveillance', ('Surveillance_Id', 'Title')),
+]
+
+INDEX_COLUMNS_QUERY = """
+SELECT INDEX_NAME, COLUMN_NAME
+FROM information_schema.STATISTICS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+ORDER BY INDEX_NAME, SEQ_IN_INDEX
+"""
+
+
+def _table_indexes(cursor, table: str) -> Dict[str, List[str]]:
+    """Index name to the columns it orders by, primary key columns included for secondary indexes."""
+    cursor.execute(INDEX_COLUMNS_QUERY, (table,))
+    indexes: Dict[str, List[str]] = {}
+    for row in cursor.fetchall():
+        indexes.setdefault(row['INDEX_NAME'], []).append(row['COLUMN_NAME'].lower())
+    primary = indexes.get('PRIMARY', [])
+    for name, columns in indexes.items():
+        if name != 'PRIMARY':
+            columns.extend(column for column in primary if column not in columns)
+    return indexes
+
+
+def _covering_index(indexes: Dict[str, List[str]], columns: Tuple[str, ...]) -> Optional[str]:
+    wanted = [column.lower() for column in columns]
+    for name, existing in indexes.items():
+        if existing[:len(wanted)] == wanted:
+            return name
+    return None
+
+
+def index_status(connection) -> List[Dict[str, Any]]:
+    """Whether each index in INDEXES is present, and which existing index provides it."""
+    status = []
+    with connection.cursor() as cursor:
+        cache: Dict[str, Dict[str, List[str]]] = {}
+        for table, name, columns in INDEXES:
+            if table not in cache:
+                cache[table] = _table_indexes(cursor, table)
+            provided_by = _covering_index(cache[table], columns)
+            if provided_by is not None:
+                state = "present"
+            elif name in cache[table]:
+                # Same name, different columns: left for a person to sort out.
+                state = "conflict"
+            else:
+                state = "missing"
+            status.append({"table": table, "index": name, "columns": list(columns),
+                           "state": state, "provided_by": provided_by})
+    return status
+
+
+def apply_indexes(connection, dry_run: bool = False,
+                  progress: Optional[Callable[[str], None]] = print) -> List[Dict[str, Any]]:
+    """Add the missing indexes online. Returns index_status() with created indexes marked."""
+    status = index_status(connection)
+    with connection.cursor() as cursor:
+        for index in status:
+            if index["state"] != "missing":
+                continue
+            statement = (f"ALTER TABLE {index['table']} ADD INDEX {index['index']} "
+                         f"({', '.join(index['columns'])}), ALGORITHM=INPLACE, LOCK=NONE")
+            if progress:
+                progress(statement)
+            if not dry_run:
+                cursor.execute(statement)
+                index["state"] = "created"
+                index["provided_by"] = index["index"]
+    return status
+
+
+def revert_indexes(connection, progress: Optional[Callable[[str], None]] = print) -> List[str]:
+    """Drop the indexes named in INDEXES. Ones a foreign key still needs are kept."""
+    dropped = []
+    with connection.cursor() as cursor:
+        for table, name, _ in INDEXES:
+            if name not in _table_indexes(cursor, table):
+                continue
+            try:
+                cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+                dropped.append(name)
+                if progress:
+                    progress(f"Dropped {table}.{name}")
+            except pymysql.err.OperationalError as e:
+                if progress:
+                    progress(f"Kept {table}.{name}: {e.args[1]}")
+    return dropped
+
+
+def _plan_issues(plan) -> Tuple[Set[str], int]:
+    """Full scans, filesorts and temporary tables in an EXPLAIN FORMAT=JSON plan, and rows examined."""
+    issues: Set[str] = set()
+    rows = 0
+
+    def walk(node):
+        nonlocal rows
+        if isinstance(node, list):
+            for item in node:
+                walk(item)
+            return
+        if not isinstance(node, dict):
+            return
+        table = node.get('table_name')
+        access = node.get('access_type')
+        if table and access in ('ALL', 'table'):
+            issues.add(f"full scan of {table}")
+        elif table and access == 'index' and node.get('index_access_type', 'index_scan') == 'index_scan':
+            issues.add(f"full index scan of {table}")
+        if node.get('using_filesort') is True:
+            issues.add("filesort")
+        if node.get('using_temporary_table') is True:
+            issues.add("temporary table")
+        # Version 2 of the JSON format describes these in the operation text.
+        operation = node.get('operation')
+        if isinstance(operation, str):
+            if operation.startswith('Sort'):
+                issues.add("filesort")
+            if 'temporary' in operation.lower():
+                issues.add("temporary table")
+        if isinstance(node.get('rows_examined_per_scan'), (int, float)):
+            rows += node['rows_examined_per_scan']
+        for value in node.values():
+            walk(value)
+
+    walk(plan)
+    return issues, int(rows)
+
+
+# Statements EXPLAIN accepts; of these only SELECTs are executed by the advisor.
+_EXPLAINABLE = ('SELECT', 'WITH', 'TABLE', 'INSERT', 'REPLACE', 'UPDATE', 'DELETE')
+
+
+class _ExplainingCursor:
+    """Cursor proxy that EXPLAINs each statement on its connection before running it.
+
+    Reads go ahead after their EXPLAIN; writes are only EXPLAINed.
+    """
+
+    def __init__(self, cursor, plans: List[Dict[str, Any]]):
+        self._cursor = cursor
+        self._plans = plans
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _explain(self, sql: str, args) -> bool:
+        """Capture the plan of sql; True if it should also run."""
+        verb = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+        if verb not in _EXPLAINABLE:
+            return True
+        # Before the statement runs, so even an unbuffered one leaves the connection free.
+        with self._cursor.connection.cursor(pymysql.cursors.Cursor) as explain:
+            explain.execute("EXPLAIN FORMAT=JSON " + sql, args)
+            plan = json.loads(explain.fetchone()[0])
+        self._plans.append({"operation": _current_operation.get(), "statement": ' '.join(sql.split()),
+                            "plan": plan})
+        return verb in ('SELECT', 'WITH', 'TABLE')
+
+    def execute(self, query, args=None):
+        if self._explain(query, args):
+            return self._cursor.execute(query, args)
+        return 0
+
+    def executemany(self, query, args):
+        args = list(args)
+        if not args:
+            return None
+        if self._explain(query, args[0]):
+            return self._cursor.executemany(query, args)
+        return 0
+
+
+class _ExplainingConnection:
+    def __init__(self, connection, plans: List[Dict[str, Any]]):
+        self._connection = connection
+        self._plans = plans
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return _ExplainingCursor(self._connection.cursor(*args, **kwargs), self._plans)
+
+
+class _AdvisorDB(IlluminatiDB):
+    """IlluminatiDB whose statements are all EXPLAINed, and whose writes are never executed."""
+
+    def __init__(self, **connect_args):
+        self.plans: List[Dict[str, Any]] = []
+        # Metrics name the operation each statement belongs to.
+        super().__init__(metrics=QueryMetrics(slow_threshold=None), **connect_args)
+
+    @contextlib.contextmanager
+    def _connection(self, exclusive: bool = False, read: Optional[bool] = None):
+        with super()._connection(exclusive, read) as connection:
+            yield _ExplainingConnection(connection, self.plans)
+
+
+def _advisor_calls(db: IlluminatiDB) -> Dict[str, Callable[[], Any]]:
+    """One call of every operation, with arguments taken from the database."""
+    with db._connection() as connection, connection.cursor() as cursor:
+        cursor.execute("""
+        SELECT
+            (SELECT MIN(Title) FROM Orchestrates) as title,
+            (SELECT MIN(Date) FROM Faction_Meetings) as first_meeting,
+            (SELECT MIN(Start_Date_Of_Survey) FROM Surveillance) as first_survey,
+            (SELECT COALESCE(MAX(Member_Id), 0) + 1 FROM Faction_Members) as new_member,
+            (SELECT MIN(Mantra) FROM Sanctum_Sanctorum) as mantra
+        """)
+        data = cursor.fetchone()
+        cursor.execute("SELECT Member_Id, Faction_Id FROM Faction_Members ORDER BY Member_Id LIMIT 1")
+        leader = cursor.fetchone()
+        cursor.execute("SELECT Artifact_Id, Origin, Faction_Id FROM Artifacts_And_Treasures "
+                       "ORDER BY Artifact_Id LIMIT 1")
+        artifact = cursor.fetchone()
+    if None in (data['title'], data['first_meeting'], data['first_survey'], data['mantra'], leader, artifact):
+        raise ValueError("advise needs a seeded database (see seed.py)")
+    meeting, survey = data['first_meeting'], data['first_survey']
+    power = seed.POWERS[0]
+
+    def member(member_id: int) -> Dict[str, Any]:
+        return {"Member_Id": member_id, "Fname": "Advisor", "Lname": "Probe", "Dob": date(1990, 1, 1),
+                "Faction_Id": leader['Faction_Id'], "Leader_Id": leader['Member_Id']}
+    location = {"Street": "1 Probe Street", "City": "Ingolstadt", "Country": "Germany"}
+
+    def transaction():
+        with db.transaction():
+            db.add_faction_member(member(data['new_member']))
+            db.update_sanctum_location(data['mantra'], location)
+            db.update_illuminati_name(data['title'], data['title'])
+            db.update_faction_head(leader['Faction_Id'], data['title'])
+            db.delete_artifact(artifact['Artifact_Id'])
+
+    def both_pages(page: Callable[..., Dict[str, Any]], *args):
+        # The second page adds the keyset predicate, which has a plan of its own.
+        first = page(*args, limit=1, with_total=True)
+        if first["next_cursor"]:
+            page(*args, limit=1, cursor=first["next_cursor"])
+
+    return {
+        'get_timeline_events_by_member': lambda: db.get_timeline_events_by_member(data['title']),
+        'get_factions_by_member_count': lambda: db.get_factions_by_member_count(0),
+        'get_total_members': db.get_total_members,
+        'search_artifacts_by_power': lambda: db.search_artifacts_by_power(power),
+        'generate_monthly_faction_report': lambda: db.generate_monthly_faction_report(meeting.year, meeting.month),
+        'generate_faction_report': lambda: db.generate_faction_report(
+            date(meeting.year, 1, 1), date(meeting.year + 1, 1, 1), 'quarter'),
+        'analyze_surveillance_targets': db.analyze_surveillance_targets,
+        'surveillance_distribution': lambda: db.surveillance_distribution(survey, survey + timedelta(days=365)),
+        'page_timeline_events_by_member': lambda: both_pages(db.page_timeline_events_by_member, data['title']),
+        'page_factions_by_member_count': lambda: both_pages(db.page_factions_by_member_count, 0),
+        'page_artifacts_by_power': lambda: both_pages(db.page_artifacts_by_power, power),
+        # The writes below are EXPLAINed without running (see _AdvisorDB).
+        'add_faction_member': lambda: db.add_faction_member(member(data['new_member'])),
+        'add_faction_members': lambda: db.add_faction_members([member(data['new_member'])]),
+        'update_sanctum_location': lambda: db.update_sanctum_location(data['mantra'], location),
+        'delete_artifact': lambda: db.delete_artifact(artifact['Artifact_Id']),
+        'delete_artifacts': lambda: db.delete_artifacts(faction_id=artifact['Faction_Id'],
+                                                        origin=artifact['Origin']),
+        'update_illuminati_name': lambda: db.update_illuminati_name(data['title'], data['title']),
+        'update_faction_head': lambda: db.update_faction_head(leader['Faction_Id'], data['title']),
+        'transaction': transaction,
+    }
+
+
+def advise(**connect_args) -> Dict[str, Any]:
+    """EXPLAIN every statement the operations issue and collect their plan problems.
+
+    Runs on a plain instance (no cache, stats or in-memory indexes), so
+    every operation reaches the database. "missing" lists the operations
+    that were called but produced no plan.
+    """
+    with _AdvisorDB(**connect_args) as db:
+        calls = _advisor_calls(db)
+        for call in calls.values():
+            call()
+
+    operations: Dict[str, Dict[str, Any]] = {}
+    for captured in db.plans:
+        operation = operations.setdefault(captured["operation"] or "-", {"issues": set(), "statements": {}})
+        issues, rows = _plan_issues(captured["plan"])
+        operation["issues"] |= issues
+        operation["statements"].setdefault(captured["statement"], {
+            "statement": captured["statement"],
+            "issues": sorted(issues),
+            "rows_examined": rows
+        })
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "operations": {
+            name: {"issues": sorted(operation["issues"]), "statements": list(operation["statements"].values())}
+            for name, operation in sorted(operations.items())
+        },
+        "missing": sorted(name for name in calls if name not in operations)
+    }
+
+
+def compare_plans(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Problems each operation has in candidate but not in baseline."""
+    regressions = {}
+    for name, operation in candidate["operations"].items():
+        before = baseline["operations"].get(name)
+        if before is None:
+            continue
+        new = sorted(set(operation["issues"]) - set(before["issues"]))
+        if new:
+            regressions[name] = new
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Index migration and query plan advisor")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="which indexes are present")
+    apply = commands.add_parser("apply", help="add the missing indexes")
+    apply.add_argument("--dry-run", action="store_true", help="print the statements only")
+    commands.add_parser("revert", help="drop the indexes this module names")
+    advisor = commands.add_parser("advise", help="EXPLAIN every operation")
+    advisor.add_argument("--output", help="save the plans as JSON, to use as a baseline")
+    advisor.add_argument("--baseline", help="fail on problems the baseline plans didn't have")
+
+    for command in commands.choices.values():
+        seed.add_connection_arguments(command)
+    args = arg_parser.parse_args()
+
+    connect_args = {key: value for key, value in vars(args).items()
+                    if key in ('host', 'port', 'user', 'password', 'database') and value is not None}
+
+    if args.command == "advise":
+        report = advise(**connect_args)
+        for name, operation in report["operations"].items():
+            print(f"{name:<34} {', '.join(operation['issues']) or 'ok'}")
+        for name in report["missing"]:
+            print(f"{name:<34} MISSING: no statement was EXPLAINed")
+        if args.output:
+            with open(args.output, "w") as output:
+                json.dump(report, output, indent=2)
+            print(f"Plans written to {args.output}")
+        regressions = {}
+        if args.baseline:
+            with open(args.baseline) as baseline_file:
+                regressions = compare_plans(json.load(baseline_file), report)
+            for name, issues in regressions.items():
+                print(f"REGRESSION {name}: {', '.join(issues)}")
+        if regressions or report["missing"]:
+            sys.exit(1)
+        return
+
+    connection = seed.connect(**connect_args)
+    try:
+        if args.command == "revert":
+            revert_indexes(connection)
+            return
+        if args.command == "apply":
+            status = apply_indexes(connection, dry_run=args.dry_run)
+        else:
+            status = index_status(connection)
+        for index in status:
+            provided = f" (by {index['provided_by']})" if index["provided_by"] not in (None, index["index"]) else ""
+            print(f"{index['table']:<24} {index['index']:<30} {index['state']}{provided}")
+        if any(index["state"] == "conflict" for index in status):
+            sys.exit(1)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
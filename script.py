@@ -1,189 +1,2697 @@
 import pymysql
-from datetime import datetime
+from pymysql.constants import SERVER_STATUS
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+import base64
+import bisect
+import contextvars
+import functools
+import hashlib
+import heapq
+import inspect
+import itertools
+import json
+import keyword
 import os
+import re
+import shlex
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from collections.abc import Mapping
+from contextlib import contextmanager
 from dateutil import parser
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator, Set, Callable
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': 'mysql',
+    'database': 'Illuminati',
+    'cursorclass': pymysql.cursors.DictCursor
+}
+
+
+class _PooledConnection:
+    __slots__ = ('raw', 'created', 'last_used', 'uses')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.uses = 0
+
+
+class ConnectionPool:
+    """Thread-safe pool of pymysql connections.
+
+    A thread that already holds a connection gets the same one back from
+    nested checkouts, so a method calling another method stays on one
+    connection (and one transaction).
+
+    A connection returned while the server reports a transaction open is
+    rolled back first. pymysql turns autocommit off, so a read also opens
+    one and costs a ROLLBACK round trip at checkin. That ends its read
+    view and releases its metadata locks, which an idle connection would
+    otherwise hold against purge and ALTER TABLE.
+    """
+
+    def __init__(self, min_size: int = 1, max_size: int = 10, idle_timeout: float = 300.0,
+                 max_uses: int = 1000, ping_on_checkout: bool = True,
+                 checkout_timeout: float = 30.0, **connect_kwargs):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self.ping_on_checkout = ping_on_checkout
+        self.checkout_timeout = checkout_timeout
+        self.connect_kwargs = {**DB_CONFIG, **connect_kwargs}
+
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._available = threading.Condition()
+        self._local = threading.local()
+
+        for _ in range(min_size):
+            self._idle.append(self._create())
+            self._size += 1
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def in_use(self) -> int:
+        return self._size - len(self._idle)
+
+    def _create(self) -> _PooledConnection:
+        return _PooledConnection(pymysql.connect(**self.connect_kwargs))
+
+    def _is_usable(self, pooled: _PooledConnection) -> bool:
+        if self.idle_timeout is not None and time.monotonic() - pooled.last_used > self.idle_timeout:
+            return False
+        if not self.ping_on_checkout:
+            return True
+        try:
+            pooled.raw.ping(reconnect=False)
+            return True
+        except (pymysql.err.Error, OSError):
+            return False
+
+    def _discard(self, pooled: _PooledConnection):
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+        with self._available:
+            self._size -= 1
+            self._available.notify()
+
+    def _checkout(self, timeout: Optional[float] = None) -> _PooledConnection:
+        deadline = time.monotonic() + (self.checkout_timeout if timeout is None
+                                       else min(timeout, self.checkout_timeout))
+        while True:
+            pooled = None
+            with self._available:
+                while not self._closed and not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a database connection")
+                    self._available.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    # LIFO keeps the most recently used connections warm and
+                    # lets the rest age out through idle_timeout.
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+
+            if pooled is None:
+                try:
+                    return self._create()
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._available.notify()
+                    raise
+
+            if self._is_usable(pooled):
+                return pooled
+            self._discard(pooled)
+
+    def _checkin(self, pooled: _PooledConnection, discard: bool = False):
+        pooled.uses += 1
+        pooled.last_used = time.monotonic()
+        if not discard and pooled.raw.open and pooled.raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            # Don't hand a half-finished transaction (or a stale read
+            # snapshot) to the next caller.
+            try:
+                pooled.raw.rollback()
+            except (pymysql.err.Error, OSError):
+                discard = True
+        if discard or self._closed or not pooled.raw.open or pooled.uses >= self.max_uses:
+            self._discard(pooled)
+            return
+        with self._available:
+            self._idle.append(pooled)
+            self._available.notify()
+
+    @contextmanager
+    def connection(self, exclusive: bool = False, timeout: Optional[float] = None):
+        """Check out a connection for the duration of the with-block.
+
+        An exclusive connection is never handed to nested checkouts, which
+        is what an open unbuffered result needs. If the block exits with an
+        exception (including a generator being closed early) it is closed
+        instead of going back to the pool, since unread rows may still be
+        in flight. timeout, when given, shortens checkout_timeout.
+        """
+        if exclusive:
+            pooled = self._checkout(timeout)
+            discard = False
+            try:
+                yield pooled.raw
+            except BaseException:
+                discard = True
+                raise
+            finally:
+                self._checkin(pooled, discard)
+            return
+
+        held = getattr(self._local, 'held', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held.raw
+            finally:
+                self._local.depth -= 1
+            return
+
+        pooled = self._checkout(timeout)
+        self._local.held = pooled
+        self._local.depth = 1
+        try:
+            yield pooled.raw
+        finally:
+            self._local.held = None
+            self._local.depth = 0
+            self._checkin(pooled)
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+
+class Record(Mapping):
+    """Base of the compact row types returned when IlluminatiDB(compact_rows=True).
+
+    Each distinct column list gets its own subclass storing the values in
+    __slots__, so a row costs one small object instead of a dict repeating
+    every key. Rows read like dicts (row['Aim'], get, keys, items, dict(row))
+    and also by attribute (row.Aim). Assigning a column the query did not
+    return keeps it in a per-row side dict.
+    """
+
+    __slots__ = ('_extra',)
+    _columns: Tuple[str, ...] = ()
+    _attributes: Dict[str, str] = {}
+
+    def __getitem__(self, key):
+        attribute = self._attributes.get(key)
+        if attribute is not None:
+            return getattr(self, attribute)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        attribute = self._attributes.get(key)
+        if attribute is not None:
+            setattr(self, attribute, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __iter__(self):
+        yield from self._columns
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return len(self._columns) + (len(self._extra) if self._extra is not None else 0)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+@functools.lru_cache(maxsize=256)
+def record_type(columns: Tuple[str, ...]) -> type:
+    """Return the Record subclass for a column list, creating it on first use."""
+    attributes = {}
+    for column in columns:
+        attribute = ''.join(char if char.isalnum() else '_' for char in column)
+        if not attribute.isidentifier() or keyword.iskeyword(attribute) or hasattr(Record, attribute):
+            attribute = 'f_' + attribute
+        while attribute in attributes.values():
+            attribute += '_'
+        attributes[column] = attribute
+    slots = tuple(attributes.values())
+    # A generated __init__ unpacks a whole row in one statement, as namedtuple does.
+    namespace = {}
+    unpack = f"    {''.join(f'self.{slot}, ' for slot in slots)}= values\n" if slots else ""
+    exec(f"def __init__(self, values):\n{unpack}    self._extra = None\n", namespace)
+    return type('Record', (Record,), {
+        '__slots__': slots,
+        '__init__': namespace['__init__'],
+        '_columns': columns,
+        '_attributes': attributes,
+    })
+
+
+class RecordCursorMixin:
+    """Cursor mixin building Record rows; the counterpart of DictCursorMixin."""
+
+    def _do_get_result(self):
+        super()._do_get_result()
+        if self.description:
+            fields = []
+            for field in self._result.fields:
+                name = field.name
+                if name in fields:
+                    name = field.table_name + "." + name
+                fields.append(name)
+            self._record = record_type(tuple(fields))
+            if self._rows:
+                self._rows = [self._record(row) for row in self._rows]
+
+    def _conv_row(self, row):
+        if row is None:
+            return None
+        return self._record(row)
+
+
+class RecordCursor(RecordCursorMixin, pymysql.cursors.Cursor):
+    pass
+
+
+class SSRecordCursor(RecordCursorMixin, pymysql.cursors.SSCursor):
+    pass
+
+
+# Cursor classes swapped in by IlluminatiDB(compact_rows=True).
+_COMPACT_CURSORS = {
+    None: RecordCursor,
+    pymysql.cursors.DictCursor: RecordCursor,
+    pymysql.cursors.SSDictCursor: SSRecordCursor,
+}
+
+
+class _CompactConnection:
+    """Connection proxy whose dict cursors are replaced by Record cursors."""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, cursor=None):
+        return self._connection.cursor(_COMPACT_CURSORS.get(cursor, cursor))
+
+
+@contextmanager
+def _compact(connections):
+    with connections as connection:
+        yield _CompactConnection(connection)
+
+
+class ReplicaSet:
+    """Connection pools for read replicas.
+
+    Reads go to the replicas round-robin ('round_robin') or to the one with
+    the fewest connections checked out ('least_loaded'). Replication lag is
+    read from SHOW REPLICA STATUS at most every lag_check_interval seconds.
+    A replica whose lag is unknown (replication stopped, server unreachable)
+    or above max_lag gets no reads. A server reporting no replication status
+    counts as up to date.
+    """
+
+    def __init__(self, endpoints: Iterable, selection: str = 'round_robin', max_lag: Optional[float] = None,
+                 lag_check_interval: float = 5.0, **pool_options):
+        if selection not in ('round_robin', 'least_loaded'):
+            raise ValueError("selection must be 'round_robin' or 'least_loaded'")
+        self.pools = [endpoint if isinstance(endpoint, ConnectionPool) else ConnectionPool(**{**pool_options, **endpoint})
+                      for endpoint in endpoints]
+        if not self.pools:
+            raise ValueError("At least one replica is required")
+        self.selection = selection
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self._lock = threading.Lock()
+        self._next = 0
+        self._lags: Dict[int, Tuple[float, Optional[float]]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _measure_lag(self, pool: ConnectionPool) -> Optional[float]:
+        try:
+            with pool.connection() as connection, connection.cursor() as cursor:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except pymysql.err.ProgrammingError:
+                    # Servers before MySQL 8.0.22 only know the old spelling.
+                    cursor.execute("SHOW SLAVE STATUS")
+                status = cursor.fetchone()
+        except (pymysql.err.Error, OSError, TimeoutError):
+            return None
+        if not status:
+            return 0.0
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return float(lag) if lag is not None else None
+
+    def lag(self, index: int) -> Tuple[float, Optional[float]]:
+        """Return (measured_at, lag) for replica index, re-measuring when stale."""
+        with self._lock:
+            measured = self._lags.get(index)
+        now = time.monotonic()
+        if measured is None or now - measured[0] > self.lag_check_interval:
+            measured = (now, self._measure_lag(self.pools[index]))
+            with self._lock:
+                self._lags[index] = measured
+        return measured
+
+    def choose(self) -> Optional[ConnectionPool]:
+        """Pick a replica for a read, or None if none qualifies."""
+        candidates = []
+        for index in range(len(self.pools)):
+            _, lag = self.lag(index)
+            if lag is None or (self.max_lag is not None and lag > self.max_lag):
+                continue
+            candidates.append(self.pools[index])
+        if not candidates:
+            return None
+        if self.selection == 'least_loaded':
+            return min(candidates, key=lambda pool: pool.in_use)
+        with self._lock:
+            self._next += 1
+            return candidates[self._next % len(candidates)]
+
+    def close(self):
+        for pool in self.pools:
+            pool.close()
+
+
+class PowerIndex:
+    """In-memory n-gram index over Powers.Power for substring search.
+
+    Every 1-, 2- and 3-character substring of a power maps to the powers
+    containing it, so a search term only has to be checked against the
+    powers sharing all of its trigrams instead of the whole table.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._powers: Dict[int, Tuple[int, str, str]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._by_artifact: Dict[int, Set[int]] = {}
+        self._keys: Dict[Tuple[int, str], int] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._powers)
+
+    @classmethod
+    def _grams(cls, text: str) -> Set[str]:
+        return {
+            text[start:start + size]
+            for size in range(1, cls.GRAM_SIZE + 1)
+            for start in range(len(text) - size + 1)
+        }
+
+    def rebuild(self, rows: Iterable[Tuple[int, str]]):
+        with self._lock:
+            self._powers.clear()
+            self._postings.clear()
+            self._by_artifact.clear()
+            self._keys.clear()
+            for artifact_id, power in rows:
+                self.add(artifact_id, power)
+
+    def add(self, artifact_id: int, power: str):
+        with self._lock:
+            if (artifact_id, power) in self._keys:
+                return
+            power_id = self._next_id
+            self._next_id += 1
+            lowered = power.lower()
+            self._powers[power_id] = (artifact_id, power, lowered)
+            self._keys[(artifact_id, power)] = power_id
+            self._by_artifact.setdefault(artifact_id, set()).add(power_id)
+            for gram in self._grams(lowered):
+                self._postings.setdefault(gram, set()).add(power_id)
+
+    def remove_artifact(self, artifact_id: int):
+        with self._lock:
+            for power_id in self._by_artifact.pop(artifact_id, ()):
+                _, power, lowered = self._powers.pop(power_id)
+                del self._keys[(artifact_id, power)]
+                for gram in self._grams(lowered):
+                    posting = self._postings[gram]
+                    posting.discard(power_id)
+                    if not posting:
+                        del self._postings[gram]
+
+    def _matching(self, term: str) -> Set[int]:
+        if len(term) <= self.GRAM_SIZE:
+            return set(self._postings.get(term, ()))
+        grams = [term[start:start + self.GRAM_SIZE] for start in range(len(term) - self.GRAM_SIZE + 1)]
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {power_id for power_id in candidates if term in self._powers[power_id][2]}
+
+    def search(self, terms: List[str], match: str = 'all') -> List[Tuple[int, str]]:
+        """Return (Artifact_Id, Power) pairs containing all (or any) of the terms."""
+        with self._lock:
+            if not terms:
+                found = set(self._powers)
+            else:
+                matches = [self._matching(term.lower()) for term in terms]
+                if match == 'all':
+                    matches.sort(key=len)
+                    found = matches[0].intersection(*matches[1:])
+                else:
+                    found = set().union(*matches)
+            return [self._powers[power_id][:2] for power_id in found]
+
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _as_id(value) -> Optional[int]:
+    """An integer id from an int or a string of digits (as JSON input often has); anything else is a ValueError."""
+    if isinstance(value, bool):
+        raise ValueError(f"{value!r} is not an integer id")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        return int(value)
+    raise ValueError(f"{value!r} is not an integer id")
+
+
+def _sql_key(value):
+    """Normalise a key the way the default case-insensitive collation compares it."""
+    return value.casefold().rstrip(' ') if isinstance(value, str) else value
+
+
+def _existing_keys(cursor, query: str, keys: List, chunk_size: int) -> Set:
+    """Run query, whose IN list is written as {}, over keys in chunks; return the first column."""
+    found = set()
+    for chunk in _chunks(keys, chunk_size):
+        cursor.execute(query.format(', '.join(['%s'] * len(chunk))), chunk)
+        found.update(_sql_key(next(iter(row.values()))) for row in cursor.fetchall())
+    return found
+
+
+# How search_artifacts_by_power matches: the whole text as one substring
+# (the default), or split into terms of which a power must contain all or any.
+SEARCH_MATCHES = ('substring', 'all', 'any')
+
+
+def _check_match(match: str):
+    if match not in SEARCH_MATCHES:
+        raise ValueError("match must be 'substring', 'all' or 'any'")
+
+
+def _parse_search_terms(text: str, match: str = 'substring') -> List[str]:
+    """Split a search string into terms; quoted phrases stay together.
+
+    With match='substring' the text is a single term, spaces and all.
+    """
+    if match == 'substring':
+        return [text]
+    try:
+        terms = shlex.split(text)
+    except ValueError:
+        terms = text.split()
+    return [term for term in terms if term]
+
+
+def _power_relevance(power: str, lowered_terms: List[str]) -> float:
+    """Share of the power's text covered by occurrences of the terms."""
+    power = power.lower()
+    covered = sum(power.count(term) * len(term) for term in lowered_terms)
+    return round(covered / len(power), 4) if power else 0.0
+
+
+def _limit_artifacts(rows: List[Dict], limit: Optional[int]) -> List[Dict]:
+    """Rows of the first limit artifacts, keeping every Power row of each."""
+    if limit is None:
+        return rows
+    kept = set()
+    limited = []
+    for row in rows:
+        if row['Artifact_Id'] not in kept:
+            if len(kept) >= limit:
+                continue
+            kept.add(row['Artifact_Id'])
+        limited.append(row)
+    return limited
+
+
+def _rank_power_matches(rows: List[Dict], limit: Optional[int] = None) -> List[Dict]:
+    """Order rows by their Relevance, best artifacts first, and keep the first limit artifacts.
+
+    Rows of the same artifact stay next to each other so callers can keep
+    grouping powers under their artifact.
+    """
+    best = {}
+    for row in rows:
+        best[row['Artifact_Id']] = max(best.get(row['Artifact_Id'], 0.0), row['Relevance'])
+
+    rows.sort(key=lambda row: (-best[row['Artifact_Id']], row['Artifact_Id'], -row['Relevance'], row['Power']))
+    return _limit_artifacts(rows, limit)
+
+
+class QueryCache:
+    """Bounded LRU cache of retrieval results with a TTL.
+
+    Each entry remembers the tables its query read, so a write only drops
+    the entries that depend on the tables it touched. Cached values are
+    shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._by_table: Dict[str, Set[Tuple]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[2]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Tuple, value: Any, tables: Iterable[str], generation: int):
+        """Store a result computed when the cache was at the given generation.
+
+        A write that invalidated anything in the meantime makes the result
+        suspect, so it is dropped instead of stored.
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (expires, tuple(tables), value)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tables: Iterable[str]):
+        with self._lock:
+            self._generation += 1
+            for table in tables:
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_table.clear()
+
+    def _remove(self, key: Tuple):
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+def _mysql_round_div(numerator: int, denominator: int) -> Optional[Decimal]:
+    """ROUND(numerator / denominator, 2) the way MySQL evaluates it for integers."""
+    if not denominator:
+        return None
+    quotient = (Decimal(numerator) / Decimal(denominator)).quantize(Decimal('0.0001'), ROUND_HALF_UP)
+    return quotient.quantize(Decimal('0.01'), ROUND_HALF_UP)
+
+
+class AggregateStats:
+    """In-process counters behind get_total_members and analyze_surveillance_targets.
+
+    Distinct counts keep a reference count per value, so a value stops
+    counting only when its last row goes away. NULLs are skipped, as with
+    COUNT(DISTINCT ...). Every record_* method takes a delta, +1 for an
+    inserted row and -1 for a deleted one. rebuilt_at is the
+    time.monotonic() of the last rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.rebuilt_at = None
+        self._reset()
+
+    def _reset(self):
+        self._faction_members = Counter()
+        self._individuals = 0
+        self._nationalities = Counter()
+        self._locations = Counter()
+        self._organizations = 0
+        self._types = Counter()
+        self._presidents = Counter()
+        self._surveillance_ops = 0
+        self._surveillance_dates = Counter()
+        self._surveyors = Counter()
+        self._earliest = None
+        self._latest = None
+
+    @staticmethod
+    def _adjust(counter: Counter, value, delta: int) -> bool:
+        """Apply delta to value's reference count; True if the value disappeared."""
+        if value is None:
+            return False
+        counter[value] += delta
+        if counter[value] <= 0:
+            del counter[value]
+            return True
+        return False
+
+    def rebuild(self, members: Iterable[Tuple[int, int]],
+                individuals: Iterable[Tuple[Any, Any, int]],
+                organizations: Iterable[Tuple[Any, Any, int]],
+                surveillance: Iterable[Tuple[Any, int]],
+                surveyors: Iterable[Tuple[Any, int]]):
+        """Replace every counter with grouped (value, ..., row count) tuples."""
+        with self._lock:
+            self._reset()
+            for faction_id, count in members:
+                self.record_member(faction_id, count)
+            for nationality, location, count in individuals:
+                self.record_individual(nationality, location, count)
+            for org_type, president, count in organizations:
+                self.record_organization(org_type, president, count)
+            for start_date, count in surveillance:
+                self.record_surveillance(start_date, count)
+            for title, count in surveyors:
+                self.record_surveyor(title, count)
+            self.rebuilt_at = time.monotonic()
+
+    def record_member(self, faction_id: int, delta: int = 1):
+        with self._lock:
+            self._adjust(self._faction_members, faction_id, delta)
+
+    def record_individual(self, nationality, location, delta: int = 1):
+        with self._lock:
+            self._individuals += delta
+            self._adjust(self._nationalities, nationality, delta)
+            self._adjust(self._locations, location, delta)
+
+    def record_organization(self, org_type, president, delta: int = 1):
+        with self._lock:
+            self._organizations += delta
+            self._adjust(self._types, org_type, delta)
+            self._adjust(self._presidents, president, delta)
+
+    def record_surveillance(self, start_date, delta: int = 1):
+        with self._lock:
+            self._surveillance_ops += delta
+            if self._adjust(self._surveillance_dates, start_date, delta):
+                if start_date in (self._earliest, self._latest):
+                    self._earliest = min(self._surveillance_dates, default=None)
+                    self._latest = max(self._surveillance_dates, default=None)
+            elif start_date is not None and delta > 0:
+                if self._earliest is None or start_date < self._earliest:
+                    self._earliest = start_date
+                if self._latest is None or start_date > self._latest:
+                    self._latest = start_date
+
+    def record_surveyor(self, title, delta: int = 1):
+        """Count a Surveys row whose Surveillance_Id exists in Surveillance."""
+        with self._lock:
+            self._adjust(self._surveyors, title, delta)
+
+    def total_members(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._faction_members.values())
+            factions = len(self._faction_members)
+        return {
+            "total_members": total,
+            "total_factions": factions,
+            "avg_members_per_faction": _mysql_round_div(total, factions)
+        }
+
+    def surveillance_targets(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "individuals": {
+                    "count": self._individuals,
+                    "unique_nationalities": len(self._nationalities),
+                    "unique_locations": len(self._locations)
+                },
+                "organizations": {
+                    "count": self._organizations,
+                    "unique_types": len(self._types),
+                    "unique_presidents": len(self._presidents)
+                },
+                "summary": {
+                    "total_surveillance_ops": self._surveillance_ops,
+                    "active_surveillors": len(self._surveyors),
+                    "earliest_surveillance": self._earliest,
+                    "latest_surveillance": self._latest
+                }
+            }
+
+
+class _SurveillanceBucket:
+    __slots__ = ('operations', 'nationalities', 'locations', 'organization_types', 'surveillors')
+
+    def __init__(self):
+        self.operations = 0
+        self.nationalities = Counter()
+        self.locations = Counter()
+        self.organization_types = Counter()
+        self.surveillors = Counter()
+
+    def merge(self, other: '_SurveillanceBucket'):
+        self.operations += other.operations
+        self.nationalities.update(other.nationalities)
+        self.locations.update(other.locations)
+        self.organization_types.update(other.organization_types)
+        self.surveillors.update(other.surveillors)
+
+
+class SurveillanceHistogram:
+    """Pre-bucketed surveillance operations by start day and by month.
+
+    Every bucket counts operations per target nationality, location and
+    organization type, and Surveys assignments per surveillor. A window
+    query merges whole-month buckets and only the days at its two ends, so
+    its cost depends on the window length in months, not on the row count.
+    Operations are added as they are loaded; nothing is ever re-grouped.
+    operations and assignments count the Surveillance and Surveys rows
+    added, so a reload can tell whether rows appeared below the watermark.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._days: Dict[date, _SurveillanceBucket] = {}
+        self._months: Dict[date, _SurveillanceBucket] = {}
+        self._day_keys: List[date] = []
+        self._month_keys: List[date] = []
+        # Highest Surveillance_Id merged so far.
+        self.watermark = 0
+        self.operations = 0
+        self.assignments = 0
+        self.built_at = time.monotonic()
+
+    def _buckets(self, day: date) -> Tuple[_SurveillanceBucket, _SurveillanceBucket]:
+        if day not in self._days:
+            self._days[day] = _SurveillanceBucket()
+            bisect.insort(self._day_keys, day)
+        month = day.replace(day=1)
+        if month not in self._months:
+            self._months[month] = _SurveillanceBucket()
+            bisect.insort(self._month_keys, month)
+        return self._days[day], self._months[month]
+
+    def add_operations(self, day: date, nationality, location, organization_type, count: int = 1):
+        with self._lock:
+            self.operations += count
+            for bucket in self._buckets(day):
+                bucket.operations += count
+                for counter, value in ((bucket.nationalities, nationality), (bucket.locations, location),
+                                       (bucket.organization_types, organization_type)):
+                    if value is not None:
+                        counter[value] += count
+
+    def add_surveys(self, day: date, title: str, count: int = 1):
+        with self._lock:
+            self.assignments += count
+            for bucket in self._buckets(day):
+                bucket.surveillors[title] += count
+
+    def merge(self, other: 'SurveillanceHistogram'):
+        """Add the buckets and counts of other, loaded above this histogram's watermark."""
+        with self._lock:
+            for day, bucket in other._days.items():
+                for mine in self._buckets(day):
+                    mine.merge(bucket)
+            self.operations += other.operations
+            self.assignments += other.assignments
+            self.watermark = max(self.watermark, other.watermark)
+
+    def _merge_range(self, total: _SurveillanceBucket, per_month: Counter, buckets: Dict[date, _SurveillanceBucket],
+                     keys: List[date], start: date, end: date):
+        for key in keys[bisect.bisect_left(keys, start):bisect.bisect_left(keys, end)]:
+            bucket = buckets[key]
+            total.merge(bucket)
+            per_month[key.replace(day=1)] += bucket.operations
+
+    def distribution(self, start: Optional[date] = None, end: Optional[date] = None,
+                     top: Optional[int] = None) -> Dict[str, Any]:
+        """Operations started in [start, end), either bound optional, with each breakdown cut to top entries."""
+        with self._lock:
+            total = _SurveillanceBucket()
+            per_month = Counter()
+            if self._day_keys:
+                first = start if start is not None else self._day_keys[0]
+                stop = end if end is not None else date.fromordinal(self._day_keys[-1].toordinal() + 1)
+                full_from = first if first.day == 1 else _add_months(first.replace(day=1), 1)
+                full_to = stop.replace(day=1)
+                if full_from < full_to:
+                    self._merge_range(total, per_month, self._days, self._day_keys, first, full_from)
+                    self._merge_range(total, per_month, self._months, self._month_keys, full_from, full_to)
+                    self._merge_range(total, per_month, self._days, self._day_keys, full_to, stop)
+                else:
+                    self._merge_range(total, per_month, self._days, self._day_keys, first, stop)
+
+        def ranked(counter: Counter, key: str) -> List[Dict[str, Any]]:
+            return [{key: value, "operations": count} for value, count in counter.most_common(top)]
+
+        return {
+            "start": start,
+            "end": end,
+            "operations": total.operations,
+            "by_month": [{"month": f"{month.year}-{month.month:02d}", "operations": per_month[month]}
+                         for month in sorted(per_month) if per_month[month]],
+            "by_nationality": ranked(total.nationalities, "Nationality"),
+            "by_location": ranked(total.locations, "Current_Location"),
+            "by_organization_type": ranked(total.organization_types, "Type"),
+            "surveillor_workload": ranked(total.surveillors, "Title")
+        }
+
+
+# Name of the IlluminatiDB operation running in the current context, used to
+# attribute statements to the operation that issued them.
+_current_operation = contextvars.ContextVar('illuminati_operation', default=None)
+
+# Set while a retrieval operation runs, so its connections may come from a replica.
+_reading = contextvars.ContextVar('illuminati_reading', default=False)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        buckets = []
+        for bound, count in zip(self.BUCKETS + (float('inf'),), self.counts):
+            running += count
+            buckets.append(('+Inf' if bound == float('inf') else repr(bound), running))
+        return buckets
+
+
+class _StatementStats:
+    __slots__ = ('sql', 'operations', 'execute', 'fetch_seconds', 'rows_returned', 'rows_affected')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.operations = set()
+        self.execute = _Histogram()
+        self.fetch_seconds = 0.0
+        self.rows_returned = 0
+        self.rows_affected = 0
+
+
+class QueryMetrics:
+    """Latency histograms, row counts and slow-query plans for IlluminatiDB.
+
+    Operations are timed end to end; every statement they issue is timed
+    separately for execute and fetch. Statements slower than
+    slow_threshold seconds get an EXPLAIN FORMAT=JSON captured alongside
+    them. Instances with metrics=None skip all of this.
+    """
+
+    def __init__(self, slow_threshold: Optional[float] = 1.0, max_slow_queries: int = 100):
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self._operations: Dict[str, _Histogram] = {}
+        self._errors: Counter = Counter()
+        self._statements: Dict[str, _StatementStats] = {}
+        self.slow_queries = deque(maxlen=max_slow_queries)
+
+    @contextmanager
+    def operation(self, name: str):
+        token = _current_operation.set(name)
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self._errors[name] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_operation.reset(token)
+            with self._lock:
+                self._operations.setdefault(name, _Histogram()).observe(elapsed)
+
+    @staticmethod
+    def statement_id(sql: str) -> str:
+        return hashlib.sha1(sql.encode()).hexdigest()[:12]
+
+    def _statement(self, sql: str) -> _StatementStats:
+        sql = ' '.join(sql.split())
+        key = self.statement_id(sql)
+        stats = self._statements.get(key)
+        if stats is None:
+            stats = self._statements[key] = _StatementStats(sql)
+        return stats
+
+    def record_execute(self, sql: str, seconds: float, rows_affected: int, is_select: bool):
+        with self._lock:
+            stats = self._statement(sql)
+            stats.operations.add(_current_operation.get() or '-')
+            stats.execute.observe(seconds)
+            if not is_select and rows_affected > 0:
+                stats.rows_affected += rows_affected
+
+    def record_fetch(self, sql: str, seconds: float, rows: int):
+        with self._lock:
+            stats = self._statement(sql)
+            stats.fetch_seconds += seconds
+            stats.rows_returned += rows
+
+    def record_slow(self, sql: str, args, seconds: float, plan):
+        self.slow_queries.append({
+            "operation": _current_operation.get(),
+            "statement": ' '.join(sql.split()),
+            "args": args,
+            "seconds": round(seconds, 6),
+            "plan": plan,
+            "captured_at": datetime.now().isoformat(timespec="seconds")
+        })
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "operations": {
+                    name: {
+                        "calls": histogram.count,
+                        "errors": self._errors[name],
+                        "seconds": round(histogram.total, 6),
+                        "buckets": histogram.cumulative()
+                    }
+                    for name, histogram in self._operations.items()
+                },
+                "statements": {
+                    key: {
+                        "sql": stats.sql,
+                        "operations": sorted(stats.operations),
+                        "calls": stats.execute.count,
+                        "execute_seconds": round(stats.execute.total, 6),
+                        "fetch_seconds": round(stats.fetch_seconds, 6),
+                        "rows_returned": stats.rows_returned,
+                        "rows_affected": stats.rows_affected,
+                        "buckets": stats.execute.cumulative()
+                    }
+                    for key, stats in self._statements.items()
+                },
+                "slow_queries": list(self.slow_queries)
+            }
+
+    def prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def histogram(metric: str, help_text: str, series):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, data in series:
+                for bound, count in data.cumulative():
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{metric}_sum{{{labels}}} {data.total}")
+                lines.append(f"{metric}_count{{{labels}}} {data.count}")
+
+        def counter(metric: str, help_text: str, series):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in series:
+                lines.append(f"{metric}{{{labels}}} {value}")
+
+        with self._lock:
+            histogram("illuminati_operation_seconds", "Latency of IlluminatiDB operations.",
+                      [(f'operation="{name}"', data) for name, data in sorted(self._operations.items())])
+            counter("illuminati_operation_errors_total", "Operations that raised an error.",
+                    [(f'operation="{name}"', count) for name, count in sorted(self._errors.items())])
+            statements = sorted(self._statements.items())
+            histogram("illuminati_statement_execute_seconds", "Time spent in cursor.execute per statement.",
+                      [(f'statement="{key}"', stats.execute) for key, stats in statements])
+            counter("illuminati_statement_fetch_seconds_total", "Time spent fetching rows per statement.",
+                    [(f'statement="{key}"', stats.fetch_seconds) for key, stats in statements])
+            counter("illuminati_statement_rows_returned_total", "Rows fetched per statement.",
+                    [(f'statement="{key}"', stats.rows_returned) for key, stats in statements])
+            counter("illuminati_statement_rows_affected_total", "Rows written per statement.",
+                    [(f'statement="{key}"', stats.rows_affected) for key, stats in statements])
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+            self._errors.clear()
+            self._statements.clear()
+            self.slow_queries.clear()
+
+
+class _InstrumentedCursor:
+    """Cursor proxy that reports execute and fetch timings to QueryMetrics."""
+
+    def __init__(self, cursor, metrics: QueryMetrics):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._sql = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _timed_execute(self, run, sql: str, args):
+        self._sql = sql
+        started = time.perf_counter()
+        result = run(sql, args)
+        elapsed = time.perf_counter() - started
+        is_select = sql.lstrip().upper().startswith(('SELECT', 'WITH'))
+        self._metrics.record_execute(sql, elapsed, self._cursor.rowcount, is_select)
+        threshold = self._metrics.slow_threshold
+        if threshold is not None and elapsed >= threshold:
+            self._metrics.record_slow(sql, args, elapsed, self._explain(sql, args) if is_select else None)
+        return result
+
+    def _explain(self, sql: str, args):
+        # An unbuffered result still owns the connection, so no EXPLAIN then.
+        # Other proxies (deadlines) may sit between this one and the pymysql cursor.
+        cursor = self._cursor
+        while not isinstance(cursor, pymysql.cursors.Cursor):
+            cursor = cursor._cursor
+        result = getattr(cursor.connection, '_result', None)
+        if isinstance(cursor, pymysql.cursors.SSCursor) or (result is not None and result.unbuffered_active):
+            return None
+        try:
+            with self._cursor.connection.cursor(pymysql.cursors.Cursor) as explain:
+                explain.execute("EXPLAIN FORMAT=JSON " + sql, args)
+                return json.loads(explain.fetchone()[0])
+        except (pymysql.err.Error, ValueError):
+            return None
+
+    def execute(self, query, args=None):
+        return self._timed_execute(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed_execute(self._cursor.executemany, query, args)
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        rows = fetch(*args)
+        return rows, time.perf_counter() - started
+
+    def fetchone(self):
+        row, elapsed = self._timed_fetch(self._cursor.fetchone)
+        if self._sql is not None:
+            self._metrics.record_fetch(self._sql, elapsed, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows, elapsed = self._timed_fetch(self._cursor.fetchmany, size)
+        if self._sql is not None:
+            self._metrics.record_fetch(self._sql, elapsed, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows, elapsed = self._timed_fetch(self._cursor.fetchall)
+        if self._sql is not None:
+            self._metrics.record_fetch(self._sql, elapsed, len(rows))
+        return rows
+
+
+class _InstrumentedConnection:
+    """Connection proxy whose cursors are instrumented."""
+
+    def __init__(self, connection, metrics: QueryMetrics):
+        self._connection = connection
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return _InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._metrics)
+
+
+@contextmanager
+def _instrumented(connections, metrics: QueryMetrics):
+    with connections as connection:
+        yield _InstrumentedConnection(connection, metrics)
+
+
+def _named_stream(name: str, rows: Iterator):
+    """Run a row generator with name as the current operation at every step."""
+    try:
+        while True:
+            token = _current_operation.set(name)
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            finally:
+                _current_operation.reset(token)
+            yield row
+    finally:
+        rows.close()
+
+
+# Monotonic time by which the current operation must finish, if any.
+_deadline = contextvars.ContextVar('illuminati_deadline', default=None)
+
+# Server errors for a statement stopped by KILL QUERY or MAX_EXECUTION_TIME.
+_INTERRUPTED_ERRORS = (1317, 3024)
+
+# How long past the deadline the socket read timeout waits, in case the
+# KILL QUERY from the watchdog never arrives.
+_READ_TIMEOUT_GRACE = 2.0
+
+# String literals, quoted identifiers, comments, parentheses and SELECT, for
+# finding the outermost SELECT of a statement.
+_SELECT_SCAN = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`|--[^\n]*|#[^\n]*|/\*.*?\*/|[()]|\bSELECT\b""",
+                          re.IGNORECASE | re.DOTALL)
+
+
+def _outer_select(statement: str) -> Optional[int]:
+    """Offset of the SELECT that starts the top-level query block, or None.
+
+    For WITH statements that is the SELECT after the common table
+    expressions; MySQL ignores a MAX_EXECUTION_TIME hint anywhere else.
+    """
+    if statement[:6].upper() == 'SELECT':
+        return 0
+    if statement[:4].upper() != 'WITH':
+        return None
+    depth = 0
+    for match in _SELECT_SCAN.finditer(statement):
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0 and token.upper() == 'SELECT':
+            return match.start()
+    return None
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when an operation runs past its timeout; a running statement is killed first."""
+
+
+class OverloadError(RuntimeError):
+    """Raised when an operation is turned away by AdmissionControl."""
+
+
+def _remaining() -> Optional[float]:
+    """Seconds left before the current deadline, None without one."""
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    remaining = expires - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Operation deadline exceeded")
+    return remaining
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Bound every IlluminatiDB call and statement in the block to finish within seconds.
+
+    Deadlines nest, but an inner one never extends an outer one.
+    """
+    if seconds is None:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(expires if outer is None else min(outer, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _deadline_stream(expires: float, rows: Iterator):
+    """Run a row generator with the deadline expires in force at every step."""
+    try:
+        while True:
+            outer = _deadline.get()
+            token = _deadline.set(expires if outer is None else min(outer, expires))
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            finally:
+                _deadline.reset(token)
+            yield row
+    finally:
+        rows.close()
+
+
+class _WatchedStatement:
+    __slots__ = ('thread_id', 'connect_kwargs', 'lock', 'finished', 'killed')
+
+    def __init__(self, thread_id: int, connect_kwargs: Dict[str, Any]):
+        self.thread_id = thread_id
+        self.connect_kwargs = connect_kwargs
+        self.lock = threading.Lock()
+        self.finished = False
+        self.killed = False
+
+    def finish(self):
+        # Waits for a KILL in progress, so it can't hit the connection's next statement.
+        with self.lock:
+            self.finished = True
+
+    def kill(self):
+        with self.lock:
+            if self.finished:
+                return
+            try:
+                side = pymysql.connect(**{**self.connect_kwargs, 'cursorclass': pymysql.cursors.Cursor})
+                try:
+                    with side.cursor() as cursor:
+                        cursor.execute("KILL QUERY %s", (self.thread_id,))
+                finally:
+                    side.close()
+                self.killed = True
+            except (pymysql.err.Error, OSError):
+                pass
+
+
+class _Watchdog:
+    """Background thread that kills statements still running at their deadline.
+
+    One per process (_WATCHDOG), started on first use.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, _WatchedStatement]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def watch(self, expires: float, statement: _WatchedStatement):
+        with self._condition:
+            heapq.heappush(self._heap, (expires, next(self._sequence), statement))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='illuminati-watchdog', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _next_expired(self) -> _WatchedStatement:
+        with self._condition:
+            while True:
+                while self._heap and self._heap[0][2].finished:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                wait = self._heap[0][0] - time.monotonic()
+                if wait <= 0:
+                    return heapq.heappop(self._heap)[2]
+                self._condition.wait(wait)
+
+    def _run(self):
+        while True:
+            self._next_expired().kill()
+
+
+_WATCHDOG = _Watchdog()
+
+
+class _DeadlineCursor:
+    """Cursor proxy that stops each statement at the current deadline.
+
+    SELECTs, including WITH ... SELECT, carry a MAX_EXECUTION_TIME hint in
+    their outermost query block, every statement is killed from a side
+    connection by the watchdog once the deadline passes, and the socket
+    read timeout is the last resort. An unbuffered result is
+    read off the socket as it is fetched, so its statement's read timeout
+    stays until the result is exhausted or the cursor closes, and each
+    fetch checks the deadline first.
+    """
+
+    def __init__(self, cursor, connect_kwargs: Dict[str, Any]):
+        self._cursor = cursor
+        self._connect_kwargs = connect_kwargs
+        self._unbuffered = isinstance(cursor, pymysql.cursors.SSCursor)
+        self._read_timeout = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _restore_read_timeout(self):
+        if self._read_timeout is not None:
+            self._cursor.connection._read_timeout = self._read_timeout[0]
+            self._read_timeout = None
+
+    def _bounded(self, run, sql: str, args):
+        remaining = _remaining()
+        if remaining is None:
+            return run(sql, args)
+        statement = sql.lstrip()
+        select = _outer_select(statement)
+        if select is not None:
+            hint = f"SELECT /*+ MAX_EXECUTION_TIME({max(1, int(remaining * 1000))}) */"
+            sql = statement[:select] + hint + statement[select + 6:]
+
+        connection = self._cursor.connection
+        watched = _WatchedStatement(connection.thread_id(), self._connect_kwargs)
+        self._restore_read_timeout()
+        self._read_timeout = (connection._read_timeout,)
+        connection._read_timeout = remaining + _READ_TIMEOUT_GRACE
+        _WATCHDOG.watch(time.monotonic() + remaining, watched)
+        try:
+            return run(sql, args)
+        except pymysql.err.OperationalError as e:
+            if watched.killed or e.args[0] in _INTERRUPTED_ERRORS or _deadline.get() <= time.monotonic():
+                raise DeadlineExceeded("Operation deadline exceeded; the statement was stopped") from e
+            raise
+        finally:
+            watched.finish()
+            if not self._streaming():
+                self._restore_read_timeout()
+
+    def _streaming(self) -> bool:
+        result = self._cursor._result
+        return self._unbuffered and result is not None and result.unbuffered_active
+
+    def _fetch(self, fetch, *args):
+        if not self._unbuffered or _deadline.get() is None:
+            return fetch(*args)
+        _remaining()
+        try:
+            return fetch(*args)
+        except pymysql.err.OperationalError as e:
+            if _deadline.get() <= time.monotonic():
+                raise DeadlineExceeded("Operation deadline exceeded while reading rows") from e
+            raise
+        finally:
+            if not self._streaming():
+                self._restore_read_timeout()
+
+    def execute(self, query, args=None):
+        return self._bounded(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._bounded(self._cursor.executemany, query, args)
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(self._cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def close(self):
+        try:
+            self._cursor.close()
+        finally:
+            self._restore_read_timeout()
+
+
+class _DeadlineConnection:
+    """Connection proxy whose cursors are bounded by the current deadline."""
+
+    def __init__(self, connection, connect_kwargs: Dict[str, Any]):
+        self._connection = connection
+        self._connect_kwargs = connect_kwargs
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return _DeadlineCursor(self._connection.cursor(*args, **kwargs), self._connect_kwargs)
+
+
+@contextmanager
+def _deadlined(connections, connect_kwargs: Dict[str, Any]):
+    with connections as connection:
+        yield _DeadlineConnection(connection, connect_kwargs)
+
+
+class _Gate:
+    __slots__ = ('limit', 'queue', 'running', 'waiting', 'admitted', 'rejected', 'condition')
+
+    def __init__(self, limit: int, queue: int):
+        if limit < 1 or queue < 0:
+            raise ValueError("Invalid admission limit")
+        self.limit = limit
+        self.queue = queue
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.condition = threading.Condition()
+
+
+class AdmissionControl:
+    """Concurrency limits per operation class, each with a bounded wait queue.
+
+    Retrieval operations are 'lookup' and modifications 'write' unless
+    classes says otherwise; the scans and reports are 'analytics'. limits
+    maps a class to (running, queued) operations, or None for no limit.
+    An operation that finds its class's queue full is rejected with
+    OverloadError at once, and one that waits longer than queue_timeout
+    (or past its deadline) gives up, so a burst of analytics fails fast
+    rather than taking the connections the lookups need.
+    """
+
+    CLASSES = {
+        'get_factions_by_member_count': 'analytics',
+        'get_total_members': 'analytics',
+        'search_artifacts_by_power': 'analytics',
+        'generate_monthly_faction_report': 'analytics',
+        'generate_faction_report': 'analytics',
+        'analyze_surveillance_targets': 'analytics',
+        'surveillance_distribution': 'analytics',
+        'page_factions_by_member_count': 'analytics',
+        'page_artifacts_by_power': 'analytics',
+    }
+
+    LIMITS = {'lookup': (32, 128), 'write': (8, 32), 'analytics': (2, 4)}
+
+    def __init__(self, limits: Optional[Dict[str, Optional[Tuple[int, int]]]] = None,
+                 classes: Optional[Dict[str, str]] = None, queue_timeout: float = 1.0):
+        self.classes = {**self.CLASSES, **(classes or {})}
+        self.queue_timeout = queue_timeout
+        self._gates = {name: _Gate(*limit) for name, limit in {**self.LIMITS, **(limits or {})}.items()
+                       if limit is not None}
+        self._local = threading.local()
+
+    def _wait(self, gate: _Gate, operation: str, kind: str):
+        if gate.running < gate.limit:
+            return
+        if gate.waiting >= gate.queue:
+            gate.rejected += 1
+            raise OverloadError(f"{operation} rejected: too many {kind} operations")
+        gate.waiting += 1
+        try:
+            expires = time.monotonic() + self.queue_timeout
+            while gate.running >= gate.limit:
+                wait = expires - time.monotonic()
+                remaining = _remaining()
+                if remaining is not None:
+                    wait = min(wait, remaining)
+                if wait <= 0:
+                    gate.rejected += 1
+                    raise OverloadError(f"{operation} rejected: timed out waiting behind {kind} operations")
+                gate.condition.wait(wait)
+        finally:
+            gate.waiting -= 1
+
+    @contextmanager
+    def admit(self, operation: str, default: str):
+        """Hold a slot of operation's class for the with-block.
+
+        Operations called by an admitted operation run on its slot.
+        """
+        kind = self.classes.get(operation, default)
+        gate = self._gates.get(kind)
+        if gate is None or getattr(self._local, 'admitted', False):
+            yield
+            return
+        with gate.condition:
+            self._wait(gate, operation, kind)
+            gate.running += 1
+            gate.admitted += 1
+        self._local.admitted = True
+        try:
+            yield
+        finally:
+            self._local.admitted = False
+            with gate.condition:
+                gate.running -= 1
+                gate.condition.notify()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        stats = {}
+        for kind, gate in self._gates.items():
+            with gate.condition:
+                stats[kind] = {"limit": gate.limit, "queue": gate.queue, "running": gate.running,
+                               "waiting": gate.waiting, "admitted": gate.admitted, "rejected": gate.rejected}
+        return stats
+
+
+class TransactionError(ValueError):
+    """Raised when queued operations of a transaction fail validation; nothing was written.
+
+    failures lists {"index", "op", "error"} for every rejected operation,
+    index being its position in the order the calls were made.
+    """
+
+    def __init__(self, failures: List[Dict[str, Any]]):
+        first = failures[0]
+        super().__init__(f"{len(failures)} queued operation(s) failed, "
+                         f"first #{first['index']} {first['op']}: {first['error']}")
+        self.failures = failures
+
+
+class UnitOfWork:
+    """Modification calls queued by IlluminatiDB.transaction().
+
+    applied holds the number of operations written once the block exits.
+    """
+
+    OPERATIONS = ('add_faction_member', 'update_sanctum_location', 'delete_artifact',
+                  'update_illuminati_name', 'update_faction_head')
 
-class IlluminatiDB:
     def __init__(self):
-        self.connection = pymysql.connect(
-            host='localhost',
-            user='root',
-            password='mysql',
-            database='Illuminati',
-            cursorclass=pymysql.cursors.DictCursor
+        self.operations: List[Tuple[str, Dict[str, Any]]] = []
+        self.tables: Set[str] = set()
+        self.applied = 0
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def queue(self, name: str, tables: Iterable[str], arguments: Dict[str, Any]):
+        if name not in self.OPERATIONS:
+            raise RuntimeError(f"{name} cannot run inside a transaction")
+        self.operations.append((name, arguments))
+        self.tables.update(tables)
+
+
+def _retrieval(*tables: str):
+    """Mark a method as reading tables; its results go through the instance cache.
+
+    The method also takes a timeout keyword, in seconds (see deadline()).
+    """
+    def decorator(method):
+        name = method.__name__
+
+        def run(self, args, kwargs):
+            if self.admission is None:
+                return method(self, *args, **kwargs)
+            with self.admission.admit(name, 'lookup'):
+                return method(self, *args, **kwargs)
+
+        def call(self, args, kwargs):
+            cache = self.cache
+            if cache is None:
+                return run(self, args, kwargs)
+            try:
+                key = (name, args, tuple(sorted(kwargs.items())))
+                hash(key)
+            except TypeError:
+                return run(self, args, kwargs)
+            found, value = cache.get(key)
+            if found:
+                return value
+            generation = cache.generation
+            value = run(self, args, kwargs)
+            cache.put(key, value, tables, generation)
+            return value
+
+        @functools.wraps(method)
+        def wrapper(self, *args, timeout: Optional[float] = None, **kwargs):
+            token = _reading.set(True)
+            try:
+                with deadline(self.default_timeout if timeout is None else timeout):
+                    if self.metrics is None:
+                        return call(self, args, kwargs)
+                    with self.metrics.operation(name):
+                        return call(self, args, kwargs)
+            finally:
+                _reading.reset(token)
+        wrapper.tables = tables
+        return wrapper
+    return decorator
+
+
+def _modification(*tables: str):
+    """Mark a method as writing tables; cached reads of them are dropped once it returns.
+
+    Inside IlluminatiDB.transaction() the call is queued instead of run,
+    and the timeout keyword that it otherwise takes is ignored.
+    """
+    def decorator(method):
+        name = method.__name__
+        signature = inspect.signature(method)
+
+        def call(self, args, kwargs):
+            try:
+                if self.admission is None:
+                    return method(self, *args, **kwargs)
+                with self.admission.admit(name, 'write'):
+                    return method(self, *args, **kwargs)
+            finally:
+                # A failed bulk write may still have committed some chunks.
+                self._wrote()
+                if self.cache is not None:
+                    self.cache.invalidate(tables)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, timeout: Optional[float] = None, **kwargs):
+            unit = getattr(self._local, 'unit_of_work', None)
+            if unit is not None:
+                arguments = signature.bind(self, *args, **kwargs)
+                arguments.apply_defaults()
+                unit.queue(name, tables, dict(list(arguments.arguments.items())[1:]))
+                return None
+            with deadline(self.default_timeout if timeout is None else timeout):
+                if self.metrics is None:
+                    return call(self, args, kwargs)
+                with self.metrics.operation(name):
+                    return call(self, args, kwargs)
+        wrapper.tables = tables
+        return wrapper
+    return decorator
+
+
+def _batched_update(cursor, table: str, key: str, columns: Tuple[str, ...],
+                    changes: Dict[Any, Tuple], chunk_size: int):
+    """Apply {key value: column values} to table with one joined UPDATE per chunk."""
+    names = (key,) + columns
+    first_row = 'SELECT ' + ', '.join(f'%s AS {name}' for name in names)
+    other_row = 'SELECT ' + ', '.join(['%s'] * len(names))
+    assignments = ', '.join(f't.{column} = changes.{column}' for column in columns)
+    for chunk in _chunks(list(changes.items()), chunk_size):
+        rows = ' UNION ALL '.join([first_row] + [other_row] * (len(chunk) - 1))
+        cursor.execute(
+            f"UPDATE {table} t JOIN ({rows}) AS changes ON changes.{key} = t.{key} SET {assignments}",
+            [value for key_value, values in chunk for value in (key_value,) + tuple(values)]
         )
 
+
+def _streaming(method):
+    """Mark a method as returning a row generator, so its statements are attributed to it.
+
+    The method also takes a timeout keyword, in seconds, counted from the
+    call and covering the whole stream.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, timeout: Optional[float] = None, **kwargs):
+        rows = method(self, *args, **kwargs)
+        seconds = self.default_timeout if timeout is None else timeout
+        if seconds is not None:
+            rows = _deadline_stream(time.monotonic() + seconds, rows)
+        if self.metrics is not None:
+            rows = _named_stream(method.__name__, rows)
+        return rows
+    return wrapper
+
+
+# Queries shared by the variants of the operations (list, streaming and async).
+TIMELINE_EVENTS_QUERY = """
+SELECT ste.*, kim.Name as Member_Name
+FROM Sacred_Timeline_Events ste
+JOIN Orchestrates o ON ste.Event_Id = o.Event_Id
+JOIN Key_Illuminati_Members kim ON o.Title = kim.Title
+WHERE o.Title = %s
+"""
+
+FACTION_MEMBER_COUNTS_QUERY = """
+SELECT
+    f.Faction_Id,
+    f.Aim,
+    f.Symbol,
+    kim.Name as Head_Name,
+    COUNT(fm.Member_Id) as Member_Count
+FROM Factions f
+LEFT JOIN Faction_Members fm ON f.Faction_Id = fm.Faction_Id
+LEFT JOIN Key_Illuminati_Members kim ON f.HeadTitle = kim.Title
+GROUP BY f.Faction_Id
+HAVING Member_Count > %s
+"""
+
+FACTIONS_BY_MEMBER_COUNT_QUERY = FACTION_MEMBER_COUNTS_QUERY + "ORDER BY Member_Count DESC\n"
+
+TOTAL_MEMBERS_QUERY = """
+SELECT
+    COUNT(DISTINCT Member_Id) as total_members,
+    COUNT(DISTINCT Faction_Id) as total_factions,
+    ROUND(COUNT(DISTINCT Member_Id) / COUNT(DISTINCT Faction_Id), 2) as avg_members_per_faction
+FROM Faction_Members
+"""
+
+INDIVIDUAL_STATS_QUERY = """
+SELECT
+    COUNT(*) as count,
+    COUNT(DISTINCT Nationality) as unique_nationalities,
+    COUNT(DISTINCT Current_Location) as unique_locations
+FROM Individuals
+"""
+
+ORGANIZATION_STATS_QUERY = """
+SELECT
+    COUNT(*) as count,
+    COUNT(DISTINCT Type) as unique_types,
+    COUNT(DISTINCT President) as unique_presidents
+FROM Organizations
+"""
+
+SURVEILLANCE_SUMMARY_QUERY = """
+SELECT
+    COUNT(DISTINCT s.Surveillance_Id) as total_surveillance_ops,
+    COUNT(DISTINCT sur.Title) as active_surveillors,
+    MIN(s.Start_Date_Of_Survey) as earliest_surveillance,
+    MAX(s.Start_Date_Of_Survey) as latest_surveillance
+FROM Surveillance s
+LEFT JOIN Surveys sur ON s.Surveillance_Id = sur.Surveillance_Id
+"""
+
+# Tables an artifact's rows are deleted from, children first.
+ARTIFACT_TABLES = ('Powers', 'Guards', 'Perform_Rituals', 'Artifacts_And_Treasures')
+
+# An artifact exists for deletion only while its faction does, as in
+# delete_artifact; both paths of delete_artifacts select through this join.
+EXISTING_ARTIFACTS_FROM = """
+FROM Artifacts_And_Treasures a
+JOIN Factions f ON a.Faction_Id = f.Faction_Id
+"""
+
+EXISTING_ARTIFACTS_QUERY = "SELECT a.Artifact_Id" + EXISTING_ARTIFACTS_FROM + "WHERE a.Artifact_Id IN ({})\n"
+
+# Surveillance rollups, grouped by start day. {condition} limits the
+# Surveillance rows, either to an Id range (incremental loads) or to a window.
+SURVEILLANCE_HISTOGRAM_QUERY = """
+SELECT
+    s.Start_Date_Of_Survey as Day,
+    i.Nationality,
+    i.Current_Location,
+    o.Type,
+    COUNT(*) as Operations
+FROM Surveillance s
+LEFT JOIN Individuals i ON i.Target_Id = s.Target_Id
+LEFT JOIN Organizations o ON o.Target_Id = s.Target_Id
+WHERE {condition}
+GROUP BY s.Start_Date_Of_Survey, i.Nationality, i.Current_Location, o.Type
+"""
+
+SURVEYS_HISTOGRAM_QUERY = """
+SELECT
+    s.Start_Date_Of_Survey as Day,
+    sur.Title,
+    COUNT(*) as Assignments
+FROM Surveys sur
+JOIN Surveillance s ON s.Surveillance_Id = sur.Surveillance_Id
+WHERE {condition}
+GROUP BY s.Start_Date_Of_Survey, sur.Title
+"""
+
+# The highest Surveillance_Id, and the Surveillance and Surveys row counts at
+# or below a histogram's watermark (passed twice).
+SURVEILLANCE_WATERMARK_QUERY = """
+SELECT
+    (SELECT COALESCE(MAX(Surveillance_Id), 0) FROM Surveillance) as High,
+    (SELECT COUNT(*) FROM Surveillance WHERE Surveillance_Id <= %s) as Operations,
+    (SELECT COUNT(*)
+     FROM Surveys sur
+     JOIN Surveillance s ON s.Surveillance_Id = sur.Surveillance_Id
+     WHERE s.Surveillance_Id <= %s) as Assignments
+"""
+
+INSERT_MEMBER_QUERY = """
+INSERT INTO Faction_Members
+(Member_Id, Fname, Mname, Lname, Dob, Faction_Id, Leader_Id)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+# Meetings in [start, end). The range predicate can use an index on Date (see
+# migrations.py), and member counts are aggregated once per faction instead of
+# joining every meeting to every member of its faction.
+MEETINGS_QUERY = """
+SELECT
+    f.Faction_Id,
+    f.Aim,
+    fm.Date,
+    fm.Time,
+    fm.Agenda,
+    fm.City,
+    fm.Country,
+    COALESCE(mc.Member_Count, 0) as Member_Count,
+    kim.Name as Faction_Head
+FROM Faction_Meetings fm
+JOIN Factions f ON fm.Faction_Id = f.Faction_Id
+LEFT JOIN (
+    SELECT Faction_Id, COUNT(*) as Member_Count
+    FROM Faction_Members
+    GROUP BY Faction_Id
+) mc ON mc.Faction_Id = f.Faction_Id
+LEFT JOIN Key_Illuminati_Members kim ON f.HeadTitle = kim.Title
+WHERE fm.Date >= %s AND fm.Date < %s
+ORDER BY fm.Date, fm.Time
+"""
+
+HIERARCHY_QUERY = """
+WITH RECURSIVE MemberHierarchy AS (
+    -- Base case: top-level leaders (no Leader_Id)
+    SELECT
+        Member_Id,
+        Fname,
+        Lname,
+        Faction_Id,
+        Leader_Id,
+        0 as Level
+    FROM Faction_Members
+    WHERE Leader_Id IS NULL
+
+    UNION ALL
+
+    -- Recursive case: members with leaders
+    SELECT
+        fm.Member_Id,
+        fm.Fname,
+        fm.Lname,
+        fm.Faction_Id,
+        fm.Leader_Id,
+        mh.Level + 1
+    FROM Faction_Members fm
+    JOIN MemberHierarchy mh ON fm.Leader_Id = mh.Member_Id
+)
+SELECT
+    mh.Member_Id,
+    mh.Fname,
+    mh.Lname,
+    mh.Faction_Id,
+    mh.Leader_Id,
+    mh.Level,
+    f.Aim as Faction_Name,
+    (SELECT COUNT(*)
+    FROM Faction_Members sub
+    WHERE sub.Leader_Id = mh.Member_Id) as Subordinates
+FROM MemberHierarchy mh
+JOIN Factions f ON mh.Faction_Id = f.Faction_Id
+ORDER BY mh.Faction_Id, mh.Level, mh.Member_Id
+"""
+
+
+def _month_range(year: int, month: int) -> Tuple[date, date]:
+    start = date(year, month, 1)
+    return start, _add_months(start, 1)
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return parser.parse(value).date()
+
+
+def _report_periods(start: date, end: date, granularity: str) -> List[Tuple[str, date, date]]:
+    """Split [start, end) into calendar months or quarters, labelled 2024-01 or 2024-Q1."""
+    step = {'month': 1, 'quarter': 3}[granularity]
+    period_start = date(start.year, start.month - (start.month - 1) % step, 1)
+    periods = []
+    while period_start < end:
+        period_end = _add_months(period_start, step)
+        if granularity == 'month':
+            label = f"{period_start.year}-{period_start.month:02d}"
+        else:
+            label = f"{period_start.year}-Q{(period_start.month - 1) // 3 + 1}"
+        periods.append((label, max(period_start, start), min(period_end, end)))
+        period_start = period_end
+    return periods
+
+
+def _power_search_query(terms: List[str], match: str, ordered: bool = False,
+                        after: Optional[Tuple[int, str]] = None) -> Tuple[str, List]:
+    """Build the power search; after = (Artifact_Id, Power) skips rows up to that key.
+
+    Term searches ('all', 'any') also select Relevance, the share of the
+    power covered by occurrences of the terms.
+    """
+    joiner = " OR " if match == 'any' else " AND "
+    conditions = joiner.join(["p.Power LIKE %s"] * max(len(terms), 1))
+    relevance = ""
+    args = []
+    if match != 'substring':
+        covered = " + ".join(["CHAR_LENGTH(p.Power) - CHAR_LENGTH(REPLACE(LOWER(p.Power), %s, ''))"]
+                             * max(len(terms), 1))
+        relevance = f",\n        COALESCE(ROUND(CAST({covered} AS DOUBLE) / CHAR_LENGTH(p.Power), 4), 0) as Relevance"
+        args += [term.lower() for term in terms] or [""]
+    args += [f"%{term}%" for term in terms] or ["%%"]
+    seek = ""
+    if after is not None:
+        seek = " AND (at.Artifact_Id > %s OR (at.Artifact_Id = %s AND p.Power > %s))"
+        args += [after[0], after[0], after[1]]
+    query = f"""
+    SELECT DISTINCT
+        at.Artifact_Id,
+        at.Origin,
+        at.Date_Of_Procurement,
+        p.Power,
+        f.Aim as Controlling_Faction,
+        COUNT(DISTINCT g.Member_Id) as Guard_Count{relevance}
+    FROM Artifacts_And_Treasures at
+    JOIN Powers p ON at.Artifact_Id = p.Artifact_Id
+    LEFT JOIN Factions f ON at.Faction_Id = f.Faction_Id
+    LEFT JOIN Guards g ON at.Artifact_Id = g.Artifact_Id
+    WHERE ({conditions}){seek}
+    GROUP BY at.Artifact_Id, at.Origin, at.Date_Of_Procurement, f.Aim, p.Power
+    """
+    if ordered:
+        query += "ORDER BY at.Artifact_Id, p.Power\n"
+    return query, args
+
+
+def _encode_cursor(operation: str, query_args: List, key: List) -> str:
+    return base64.urlsafe_b64encode(json.dumps([operation, query_args, key]).encode()).decode()
+
+
+def _decode_cursor(operation: str, query_args: List, token: Optional[str], arity: int) -> Optional[List]:
+    """Return the key a page token resumes after, or None for the first page.
+
+    A token only continues the query it came from: the operation and its
+    arguments must match the ones it was issued for, and its key must hold
+    arity plain values.
+    """
+    if token is None:
+        return None
+    try:
+        token_operation, token_args, key = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+    if token_operation != operation:
+        raise ValueError(f"Cursor was not issued by {operation}")
+    if token_args != json.loads(json.dumps(query_args)):
+        raise ValueError(f"Cursor was issued for different {operation} arguments")
+    if (not isinstance(key, list) or len(key) != arity
+            or any(isinstance(value, (list, dict)) for value in key)):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+# Precomputed faction hierarchy. Member_Hierarchy holds one row per member
+# reachable from a top-level leader; Member_Ancestry is the closure table of
+# (ancestor, member) pairs, including each member paired with itself.
+HIERARCHY_STORE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS Member_Hierarchy (
+        Member_Id INT NOT NULL PRIMARY KEY,
+        Faction_Id INT NOT NULL,
+        Level INT NOT NULL,
+        Subordinates INT NOT NULL DEFAULT 0,
+        KEY idx_member_hierarchy_order (Faction_Id, Level, Member_Id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Member_Ancestry (
+        Ancestor_Id INT NOT NULL,
+        Member_Id INT NOT NULL,
+        Distance INT NOT NULL,
+        PRIMARY KEY (Ancestor_Id, Member_Id),
+        KEY idx_member_ancestry_member (Member_Id, Distance)
+    )
+    """
+]
+
+HIERARCHY_STORE_EXISTS_QUERY = """
+SELECT 1
+FROM information_schema.TABLES
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Member_Hierarchy'
+"""
+
+# Adding one new leaf member to the store, for writers that can't run
+# IlluminatiDB._hierarchy_insert (the async API). Members whose leader is not
+# in the store are left out, as they are by _hierarchy_insert.
+HIERARCHY_ADD_ROOT = [
+    "INSERT INTO Member_Hierarchy (Member_Id, Faction_Id, Level, Subordinates) VALUES (%(member)s, %(faction)s, 0, 0)",
+    "INSERT INTO Member_Ancestry (Ancestor_Id, Member_Id, Distance) VALUES (%(member)s, %(member)s, 0)",
+]
+
+HIERARCHY_ADD_SUBORDINATE = """
+INSERT INTO Member_Hierarchy (Member_Id, Faction_Id, Level, Subordinates)
+SELECT %(member)s, %(faction)s, Level + 1, 0
+FROM Member_Hierarchy
+WHERE Member_Id = %(leader)s
+"""
+
+# Run only when HIERARCHY_ADD_SUBORDINATE inserted a row.
+HIERARCHY_LINK_SUBORDINATE = [
+    "UPDATE Member_Hierarchy SET Subordinates = Subordinates + 1 WHERE Member_Id = %(leader)s",
+    """
+    INSERT INTO Member_Ancestry (Ancestor_Id, Member_Id, Distance)
+    SELECT Ancestor_Id, %(member)s, Distance + 1
+    FROM Member_Ancestry
+    WHERE Member_Id = %(leader)s
+    UNION ALL
+    SELECT %(member)s, %(member)s, 0
+    """,
+]
+
+HIERARCHY_STORE_QUERY = """
+SELECT
+    mh.Member_Id,
+    fmem.Fname,
+    fmem.Lname,
+    mh.Faction_Id,
+    fmem.Leader_Id,
+    mh.Level,
+    f.Aim as Faction_Name,
+    mh.Subordinates
+FROM Member_Hierarchy mh
+JOIN Faction_Members fmem ON mh.Member_Id = fmem.Member_Id
+JOIN Factions f ON mh.Faction_Id = f.Faction_Id
+ORDER BY mh.Faction_Id, mh.Level, mh.Member_Id
+"""
+
+# Level and subordinate count of every member, computed from scratch.
+HIERARCHY_LEVELS_CTE = """
+WITH RECURSIVE MemberHierarchy AS (
+    SELECT Member_Id, Faction_Id, 0 as Level
+    FROM Faction_Members
+    WHERE Leader_Id IS NULL
+
+    UNION ALL
+
+    SELECT fm.Member_Id, fm.Faction_Id, mh.Level + 1
+    FROM Faction_Members fm
+    JOIN MemberHierarchy mh ON fm.Leader_Id = mh.Member_Id
+)
+SELECT
+    mh.Member_Id,
+    mh.Faction_Id,
+    mh.Level,
+    COALESCE(sub.Subordinates, 0) as Subordinates
+FROM MemberHierarchy mh
+LEFT JOIN (
+    SELECT Leader_Id, COUNT(*) as Subordinates
+    FROM Faction_Members
+    WHERE Leader_Id IS NOT NULL
+    GROUP BY Leader_Id
+) sub ON sub.Leader_Id = mh.Member_Id
+"""
+
+
+class IlluminatiDB:
+    def __init__(self, pool: Optional[ConnectionPool] = None, hierarchy_store: bool = False,
+                 power_index: bool = False, cache: Optional[QueryCache] = None,
+                 metrics: Optional[QueryMetrics] = None, stats: bool = False,
+                 stats_refresh: Optional[float] = 60.0,
+                 replicas: Optional[ReplicaSet] = None, read_your_writes: float = 5.0,
+                 compact_rows: bool = False, surveillance_histogram: bool = False,
+                 histogram_rebuild: Optional[float] = 300.0,
+                 default_timeout: Optional[float] = None, admission: Optional[AdmissionControl] = None,
+                 **pool_options):
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else ConnectionPool(**pool_options)
+        # Retrieval operations read from a replica when one is set, except
+        # for read_your_writes seconds after a thread's last write, when they
+        # read from the primary. Seconds_Behind_Source cannot show that a
+        # replica has applied a given write, so no replica is trusted then.
+        self.replicas = replicas
+        self.read_your_writes = read_your_writes
+        # Rows come back as Record objects instead of dicts.
+        self.compact_rows = compact_rows
+        # When set, hierarchy reads come from Member_Hierarchy. Build it once
+        # with create_hierarchy_store(). The write paths keep it up to date
+        # whenever its tables exist, whether this instance reads it or not.
+        self.hierarchy_store = hierarchy_store
+        self._hierarchy_tables = hierarchy_store
+        self.cache = cache
+        self.metrics = metrics
+        # Operations called without a timeout get default_timeout seconds.
+        self.default_timeout = default_timeout
+        self.admission = admission
+        self._local = threading.local()
+        self.power_index = None
+        if power_index:
+            self.power_index = PowerIndex()
+            self.rebuild_power_index()
+        # Counters answering get_total_members and analyze_surveillance_targets
+        # without scanning. Library writes keep them current; they are rebuilt
+        # once they are stats_refresh seconds old, to pick up other writers.
+        self.stats = None
+        self.stats_refresh = stats_refresh
+        self._stats_refreshing = threading.Lock()
+        if stats:
+            self.stats = AggregateStats()
+            self.rebuild_stats()
+        # Pre-bucketed surveillance rollups; new Surveillance rows are merged in
+        # by refresh_surveillance_histogram(), which also rebuilds the whole
+        # histogram every histogram_rebuild seconds to pick up edited targets.
+        self.surveillance_histogram = None
+        self.histogram_rebuild = histogram_rebuild
+        self._histogram_refreshing = threading.Lock()
+        if surveillance_histogram:
+            self.surveillance_histogram = SurveillanceHistogram()
+            self.refresh_surveillance_histogram()
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.connection.close()
+        self.close()
+
+    def close(self):
+        if self._owns_pool:
+            self.pool.close()
+
+    def _connection(self, exclusive: bool = False, read: Optional[bool] = None):
+        pool = self.pool
+        if self.replicas is not None and (_reading.get() if read is None else read):
+            pool = self._read_pool()
+        remaining = _remaining()
+        connections = pool.connection(exclusive, remaining)
+        if self.compact_rows:
+            connections = _compact(connections)
+        if remaining is not None:
+            connections = _deadlined(connections, pool.connect_kwargs)
+        if self.metrics is None:
+            return connections
+        return _instrumented(connections, self.metrics)
+
+    def _read_pool(self) -> ConnectionPool:
+        written_at = getattr(self._local, 'written_at', None)
+        if written_at is not None and time.monotonic() - written_at < self.read_your_writes:
+            return self.pool
+        return self.replicas.choose() or self.pool
+
+    def _wrote(self):
+        self._local.written_at = time.monotonic()
+
+    def _stream(self, query: str, args=None, batch_size: int = 1000):
+        """Yield the rows of query from an unbuffered server-side cursor."""
+        with self._connection(exclusive=True, read=True) as connection:
+            cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+            cursor.execute(query, args)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+            cursor.close()
+
+    def _hierarchy_query(self) -> str:
+        return HIERARCHY_STORE_QUERY if self.hierarchy_store else HIERARCHY_QUERY
+
+    def _maintains_hierarchy(self, cursor) -> bool:
+        """Whether member writes must update the hierarchy store.
+
+        Only finding the tables is remembered: until then every write looks
+        again, so a store created by another process or instance is kept
+        current from its next write on.
+        """
+        if not self._hierarchy_tables:
+            cursor.execute(HIERARCHY_STORE_EXISTS_QUERY)
+            self._hierarchy_tables = cursor.fetchone() is not None
+        return self._hierarchy_tables
+
+    def rebuild_power_index(self) -> int:
+        """Load every row of Powers into the in-memory search index."""
+        with self._connection() as connection, connection.cursor(pymysql.cursors.SSCursor) as cursor:
+            cursor.execute("SELECT Artifact_Id, Power FROM Powers")
+            self.power_index.rebuild(cursor)
+        return len(self.power_index)
+
+    def rebuild_stats(self):
+        """Backfill the aggregate counters from grouped counts of the source tables."""
+        with self._connection() as connection, connection.cursor(pymysql.cursors.Cursor) as cursor:
+            cursor.execute("SELECT Faction_Id, COUNT(*) FROM Faction_Members GROUP BY Faction_Id")
+            members = cursor.fetchall()
+            cursor.execute("""
+            SELECT Nationality, Current_Location, COUNT(*)
+            FROM Individuals
+            GROUP BY Nationality, Current_Location
+            """)
+            individuals = cursor.fetchall()
+            cursor.execute("SELECT Type, President, COUNT(*) FROM Organizations GROUP BY Type, President")
+            organizations = cursor.fetchall()
+            cursor.execute("SELECT Start_Date_Of_Survey, COUNT(*) FROM Surveillance GROUP BY Start_Date_Of_Survey")
+            surveillance = cursor.fetchall()
+            cursor.execute("""
+            SELECT sur.Title, COUNT(*)
+            FROM Surveys sur
+            JOIN Surveillance s ON s.Surveillance_Id = sur.Surveillance_Id
+            GROUP BY sur.Title
+            """)
+            surveyors = cursor.fetchall()
+        self.stats.rebuild(members, individuals, organizations, surveillance, surveyors)
 
+    def _current_stats(self) -> AggregateStats:
+        """The counters, rebuilt first if they are older than stats_refresh.
+
+        One caller rebuilds at a time; the others answer from the old
+        counters meanwhile.
+        """
+        stats = self.stats
+        if (self.stats_refresh is not None and time.monotonic() - stats.rebuilt_at >= self.stats_refresh
+                and self._stats_refreshing.acquire(blocking=False)):
+            try:
+                self.rebuild_stats()
+            finally:
+                self._stats_refreshing.release()
+        return stats
+
+    def _load_surveillance(self, histogram: SurveillanceHistogram, condition: str, args: List):
+        """Load the operations and survey assignments matching condition from one snapshot."""
+        # Unbuffered results need a connection of their own (see _stream).
+        with self._connection(exclusive=True) as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+            with connection.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(SURVEILLANCE_HISTOGRAM_QUERY.format(condition=condition), args)
+                for day, nationality, location, organization_type, count in cursor:
+                    histogram.add_operations(day, nationality, location, organization_type, count)
+            with connection.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(SURVEYS_HISTOGRAM_QUERY.format(condition=condition), args)
+                for day, title, count in cursor:
+                    histogram.add_surveys(day, title, count)
+            connection.commit()
+
+    def refresh_surveillance_histogram(self) -> int:
+        """Bring the histogram up to date; returns its new watermark.
+
+        Rows above the watermark are loaded into a separate histogram and
+        merged in, so readers only wait for the in-memory merge. If the row
+        counts at or below the watermark no longer match what was loaded
+        (rows committed out of Surveillance_Id order, Surveys added to
+        merged operations, deletes), or the histogram is histogram_rebuild
+        seconds old, a new one is built and swapped in. One caller
+        refreshes at a time; the others use the histogram as it is.
+        """
+        if not self._histogram_refreshing.acquire(blocking=False):
+            return self.surveillance_histogram.watermark
+        try:
+            histogram = self.surveillance_histogram
+            with self._connection() as connection, connection.cursor() as cursor:
+                cursor.execute(SURVEILLANCE_WATERMARK_QUERY, (histogram.watermark, histogram.watermark))
+                current = cursor.fetchone()
+            rebuild = (current['Operations'] != histogram.operations
+                       or current['Assignments'] != histogram.assignments
+                       or (self.histogram_rebuild is not None
+                           and time.monotonic() - histogram.built_at >= self.histogram_rebuild))
+            if rebuild or current['High'] > histogram.watermark:
+                loaded = SurveillanceHistogram()
+                if rebuild:
+                    self._load_surveillance(loaded, "s.Surveillance_Id <= %s", [current['High']])
+                else:
+                    self._load_surveillance(loaded, "s.Surveillance_Id > %s AND s.Surveillance_Id <= %s",
+                                            [histogram.watermark, current['High']])
+                loaded.watermark = current['High']
+                if rebuild:
+                    self.surveillance_histogram = histogram = loaded
+                else:
+                    histogram.merge(loaded)
+            return histogram.watermark
+        finally:
+            self._histogram_refreshing.release()
+
+    def verify_stats(self) -> Dict[str, Any]:
+        """Compare the aggregate counters against the live aggregate queries."""
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(TOTAL_MEMBERS_QUERY)
+            live = {"members": cursor.fetchone()}
+            cursor.execute(INDIVIDUAL_STATS_QUERY)
+            live["individuals"] = cursor.fetchone()
+            cursor.execute(ORGANIZATION_STATS_QUERY)
+            live["organizations"] = cursor.fetchone()
+            cursor.execute(SURVEILLANCE_SUMMARY_QUERY)
+            live["summary"] = cursor.fetchone()
+
+        stored = dict(self.stats.surveillance_targets(), members=self.stats.total_members())
+        mismatches = {
+            f"{group}.{field}": {"stored": stored[group][field], "live": value}
+            for group, row in live.items()
+            for field, value in row.items()
+            if stored[group][field] != value
+        }
+        return {"mismatches": mismatches, "consistent": not mismatches}
+
+    @_retrieval('Sacred_Timeline_Events', 'Orchestrates', 'Key_Illuminati_Members')
     def get_timeline_events_by_member(self, member_title: str) -> List[Dict]:
-        with self.connection.cursor() as cursor:
-            query = """
-            SELECT ste.*, kim.Name as Member_Name
-            FROM Sacred_Timeline_Events ste
-            JOIN Orchestrates o ON ste.Event_Id = o.Event_Id
-            JOIN Key_Illuminati_Members kim ON o.Title = kim.Title
-            WHERE o.Title = %s
-            """
-            cursor.execute(query, (member_title,))
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(TIMELINE_EVENTS_QUERY, (member_title,))
             return cursor.fetchall()
 
+    @_retrieval('Factions', 'Faction_Members', 'Key_Illuminati_Members')
     def get_factions_by_member_count(self, min_members: int) -> List[Dict]:
-        with self.connection.cursor() as cursor:
-            query = """
-            SELECT
-                f.Faction_Id,
-                f.Aim,
-                f.Symbol,
-                kim.Name as Head_Name,
-                COUNT(fm.Member_Id) as Member_Count
-            FROM Factions f
-            LEFT JOIN Faction_Members fm ON f.Faction_Id = fm.Faction_Id
-            LEFT JOIN Key_Illuminati_Members kim ON f.HeadTitle = kim.Title
-            GROUP BY f.Faction_Id
-            HAVING Member_Count > %s
-            ORDER BY Member_Count DESC
-            """
-            cursor.execute(query, (min_members,))
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(FACTIONS_BY_MEMBER_COUNT_QUERY, (min_members,))
             return cursor.fetchall()
 
+    @_retrieval('Faction_Members')
     def get_total_members(self) -> Dict[str, int]:
-        with self.connection.cursor() as cursor:
-            query = """
-            SELECT
-                COUNT(DISTINCT Member_Id) as total_members,
-                COUNT(DISTINCT Faction_Id) as total_factions,
-                ROUND(COUNT(DISTINCT Member_Id) / COUNT(DISTINCT Faction_Id), 2) as avg_members_per_faction
-            FROM Faction_Members
-            """
-            cursor.execute(query)
+        if self.stats is not None:
+            return self._current_stats().total_members()
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(TOTAL_MEMBERS_QUERY)
             return cursor.fetchone()
 
-    def search_artifacts_by_power(self, power_text: str) -> List[Dict]:
-        with self.connection.cursor() as cursor:
-            query = """
-            SELECT DISTINCT
-                at.Artifact_Id,
-                at.Origin,
-                at.Date_Of_Procurement,
-                p.Power,
-                f.Aim as Controlling_Faction,
-                COUNT(DISTINCT g.Member_Id) as Guard_Count
-            FROM Artifacts_And_Treasures at
-            JOIN Powers p ON at.Artifact_Id = p.Artifact_Id
-            LEFT JOIN Factions f ON at.Faction_Id = f.Faction_Id
-            LEFT JOIN Guards g ON at.Artifact_Id = g.Artifact_Id
-            WHERE p.Power LIKE %s
-            GROUP BY at.Artifact_Id, at.Origin, at.Date_Of_Procurement, f.Aim, p.Power
-            """
-            cursor.execute(query, (f"%{power_text}%",))
-            return cursor.fetchall()
+    @_retrieval('Artifacts_And_Treasures', 'Powers', 'Factions', 'Guards')
+    def search_artifacts_by_power(self, power_text: str, match: str = 'substring',
+                                  limit: Optional[int] = None) -> List[Dict]:
+        """Find artifacts with a power containing power_text.
+
+        match='all' or 'any' splits the text into terms instead (quote a
+        phrase to keep it whole) and requires every term, or at least one,
+        in a power; those rows are ranked by Relevance. limit keeps the
+        first limit artifacts, each with all of its matching powers.
+        """
+        _check_match(match)
+        terms = _parse_search_terms(power_text, match)
+        # LIKE wildcards in a term can only be honoured by MySQL.
+        if self.power_index is not None and not any('%' in term or '_' in term for term in terms):
+            return self._search_power_index(terms, match, limit)
+
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(*_power_search_query(terms, match))
+            rows = list(cursor.fetchall())
+        if match == 'substring':
+            return _limit_artifacts(rows, limit)
+        return _rank_power_matches(rows, limit)
+
+    def _search_power_index(self, terms: List[str], match: str, limit: Optional[int]) -> List[Dict]:
+        pairs = self.power_index.search([term for term in terms if term], 'any' if match == 'any' else 'all')
+        if match == 'substring':
+            matches = _limit_artifacts([{'Artifact_Id': artifact_id, 'Power': power}
+                                        for artifact_id, power in sorted(pairs)], limit)
+        else:
+            lowered_terms = [term.lower() for term in terms]
+            matches = _rank_power_matches([{'Artifact_Id': artifact_id, 'Power': power,
+                                            'Relevance': _power_relevance(power, lowered_terms)}
+                                           for artifact_id, power in pairs], limit)
+
+        artifacts = {}
+        artifact_ids = list(dict.fromkeys(row['Artifact_Id'] for row in matches))
+        with self._connection() as connection, connection.cursor() as cursor:
+            for chunk in _chunks(artifact_ids, 1000):
+                query = f"""
+                SELECT
+                    at.Artifact_Id,
+                    at.Origin,
+                    at.Date_Of_Procurement,
+                    f.Aim as Controlling_Faction,
+                    COUNT(DISTINCT g.Member_Id) as Guard_Count
+                FROM Artifacts_And_Treasures at
+                LEFT JOIN Factions f ON at.Faction_Id = f.Faction_Id
+                LEFT JOIN Guards g ON at.Artifact_Id = g.Artifact_Id
+                WHERE at.Artifact_Id IN ({', '.join(['%s'] * len(chunk))})
+                GROUP BY at.Artifact_Id, at.Origin, at.Date_Of_Procurement, f.Aim
+                """
+                cursor.execute(query, chunk)
+                for artifact in cursor.fetchall():
+                    artifacts[artifact['Artifact_Id']] = artifact
+
+        results = []
+        for row in matches:
+            artifact = artifacts.get(row['Artifact_Id'])
+            if artifact:
+                results.append({
+                    'Artifact_Id': artifact['Artifact_Id'],
+                    'Origin': artifact['Origin'],
+                    'Date_Of_Procurement': artifact['Date_Of_Procurement'],
+                    'Power': row['Power'],
+                    'Controlling_Faction': artifact['Controlling_Faction'],
+                    'Guard_Count': artifact['Guard_Count'],
+                    **({'Relevance': row['Relevance']} if 'Relevance' in row else {})
+                })
+        return results
 
+    @_retrieval('Faction_Meetings', 'Factions', 'Faction_Members', 'Key_Illuminati_Members', 'Member_Hierarchy')
     def generate_monthly_faction_report(self, year: int, month: int) -> Dict[str, Any]:
-        with self.connection.cursor() as cursor:
-            meetings_query = """
-            SELECT 
-                f.Faction_Id,
-                f.Aim,
-                fm.Date,
-                fm.Time,
-                fm.Agenda,
-                fm.City,
-                fm.Country,
-                COUNT(DISTINCT fmem.Member_Id) as Member_Count,
-                kim.Name as Faction_Head
-            FROM Faction_Meetings fm
-            JOIN Factions f ON fm.Faction_Id = f.Faction_Id
-            LEFT JOIN Faction_Members fmem ON f.Faction_Id = fmem.Faction_Id
-            LEFT JOIN Key_Illuminati_Members kim ON f.HeadTitle = kim.Title
-            WHERE YEAR(fm.Date) = %s AND MONTH(fm.Date) = %s
-            GROUP BY f.Faction_Id, f.Aim, fm.Date, fm.Time, fm.Agenda, fm.City, fm.Country, kim.Name
-            ORDER BY fm.Date, fm.Time
-            """
-            cursor.execute(meetings_query, (year, month))
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(MEETINGS_QUERY, _month_range(year, month))
             meetings = cursor.fetchall()
 
-            hierarchy_query = """
-            WITH RECURSIVE MemberHierarchy AS (
-                -- Base case: top-level leaders (no Leader_Id)
-                SELECT 
-                    Member_Id,
-                    Fname,
-                    Lname,
-                    Faction_Id,
-                    Leader_Id,
-                    0 as Level
-                FROM Faction_Members
-                WHERE Leader_Id IS NULL
-                
-                UNION ALL
-                
-                -- Recursive case: members with leaders
-                SELECT 
-                    fm.Member_Id,
-                    fm.Fname,
-                    fm.Lname,
-                    fm.Faction_Id,
-                    fm.Leader_Id,
-                    mh.Level + 1
-                FROM Faction_Members fm
-                JOIN MemberHierarchy mh ON fm.Leader_Id = mh.Member_Id
-            )
-            SELECT 
-                mh.Member_Id,
-                mh.Fname,
-                mh.Lname,
-                mh.Faction_Id,
-                mh.Leader_Id,
-                mh.Level,
-                f.Aim as Faction_Name,
-                (SELECT COUNT(*)
-                FROM Faction_Members sub
-                WHERE sub.Leader_Id = mh.Member_Id) as Subordinates
-            FROM MemberHierarchy mh
-            JOIN Factions f ON mh.Faction_Id = f.Faction_Id
-            ORDER BY mh.Faction_Id, mh.Level, mh.Member_Id
-            """
-            cursor.execute(hierarchy_query)
+            cursor.execute(self._hierarchy_query())
             hierarchy = cursor.fetchall()
 
             return {
                 "meetings": meetings,
                 "hierarchy": hierarchy
             }
+
+    @_retrieval('Faction_Meetings', 'Factions', 'Faction_Members', 'Key_Illuminati_Members', 'Member_Hierarchy')
+    def generate_faction_report(self, start, end, granularity: str = 'month') -> Dict[str, Any]:
+        """Faction report for every month or quarter in [start, end).
+
+        Meetings for the whole range come from one date-range scan and the
+        hierarchy, which doesn't depend on the period, is read once.
+        """
+        if granularity not in ('month', 'quarter'):
+            raise ValueError("granularity must be 'month' or 'quarter'")
+        start, end = _as_date(start), _as_date(end)
+        if start >= end:
+            raise ValueError("start must be before end")
+
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(MEETINGS_QUERY, (start, end))
+            meetings = cursor.fetchall()
+
+            cursor.execute(self._hierarchy_query())
+            hierarchy = cursor.fetchall()
+
+        periods = []
+        position = 0
+        for label, period_start, period_end in _report_periods(start, end, granularity):
+            bucket = []
+            # Meetings are ordered by date, so each bucket is the next run of them.
+            while position < len(meetings) and _as_date(meetings[position]['Date']) < period_end:
+                bucket.append(meetings[position])
+                position += 1
+            periods.append({
+                "period": label,
+                "start": period_start,
+                "end": period_end,
+                "meetings": bucket
+            })
+
+        return {
+            "periods": periods,
+            "hierarchy": hierarchy
+        }
+
+    @_streaming
+    def iter_timeline_events_by_member(self, member_title: str, batch_size: int = 1000) -> Iterator[Dict]:
+        return self._stream(TIMELINE_EVENTS_QUERY, (member_title,), batch_size)
+
+    @_streaming
+    def iter_factions_by_member_count(self, min_members: int, batch_size: int = 1000) -> Iterator[Dict]:
+        return self._stream(FACTIONS_BY_MEMBER_COUNT_QUERY, (min_members,), batch_size)
+
+    @_streaming
+    def iter_artifacts_by_power(self, power_text: str, match: str = 'substring',
+                                batch_size: int = 1000) -> Iterator[Dict]:
+        """Streaming search_artifacts_by_power. Rows come in Artifact_Id order, not ranked."""
+        _check_match(match)
+        query, args = _power_search_query(_parse_search_terms(power_text, match), match, ordered=True)
+        return self._stream(query, args, batch_size)
+
+    @_streaming
+    def iter_monthly_faction_meetings(self, year: int, month: int, batch_size: int = 1000) -> Iterator[Dict]:
+        """Streaming version of the meetings part of generate_monthly_faction_report."""
+        return self._stream(MEETINGS_QUERY, _month_range(year, month), batch_size)
+
+    @_streaming
+    def iter_faction_hierarchy(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Streaming version of the hierarchy part of generate_monthly_faction_report."""
+        return self._stream(self._hierarchy_query(), None, batch_size)
+
+    def _page(self, operation: str, query_args: List, query: str, args: List, limit: int,
+              key: Callable[[Dict], List]) -> Dict[str, Any]:
+        """Fetch one keyset page; query must end before its LIMIT.
+
+        query_args are the operation's own arguments, recorded in the
+        next page token.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(query + "LIMIT %s\n", args + [limit + 1])
+            rows = list(cursor.fetchall())
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = _encode_cursor(operation, query_args, key(rows[limit - 1]))
+        return {"rows": rows[:limit], "next_cursor": next_cursor}
+
+    @_retrieval('Sacred_Timeline_Events', 'Orchestrates', 'Key_Illuminati_Members')
+    def page_timeline_events_by_member(self, member_title: str, limit: int = 50, cursor: Optional[str] = None,
+                                       with_total: bool = False) -> Dict[str, Any]:
+        """One page of get_timeline_events_by_member in Event_Id order.
+
+        Returns {"rows", "next_cursor"}; pass next_cursor back for the next
+        page, None means this was the last. with_total adds
+        "approximate_total", a count that is cached like any retrieval.
+        """
+        after = _decode_cursor('page_timeline_events_by_member', [member_title], cursor, 1)
+        query = TIMELINE_EVENTS_QUERY + ("AND ste.Event_Id > %s\n" if after else "") + "ORDER BY ste.Event_Id\n"
+        page = self._page('page_timeline_events_by_member', [member_title], query, [member_title] + (after or []),
+                          limit, lambda row: [row['Event_Id']])
+        if with_total:
+            page["approximate_total"] = self._count_timeline_events(member_title)
+        return page
+
+    @_retrieval('Factions', 'Faction_Members', 'Key_Illuminati_Members')
+    def page_factions_by_member_count(self, min_members: int, limit: int = 50, cursor: Optional[str] = None,
+                                      with_total: bool = False) -> Dict[str, Any]:
+        """One page of get_factions_by_member_count, largest first, ties by Faction_Id."""
+        after = _decode_cursor('page_factions_by_member_count', [min_members], cursor, 2)
+        query = FACTION_MEMBER_COUNTS_QUERY
+        if after:
+            query += "AND (Member_Count < %s OR (Member_Count = %s AND f.Faction_Id > %s))\n"
+        query += "ORDER BY Member_Count DESC, f.Faction_Id\n"
+        args = [min_members] + ([after[0], after[0], after[1]] if after else [])
+        page = self._page('page_factions_by_member_count', [min_members], query, args, limit,
+                          lambda row: [row['Member_Count'], row['Faction_Id']])
+        if with_total:
+            page["approximate_total"] = self._count_factions_by_member_count(min_members)
+        return page
+
+    @_retrieval('Artifacts_And_Treasures', 'Powers', 'Factions', 'Guards')
+    def page_artifacts_by_power(self, power_text: str, match: str = 'substring', limit: int = 50,
+                                cursor: Optional[str] = None, with_total: bool = False) -> Dict[str, Any]:
+        """One page of search_artifacts_by_power in (Artifact_Id, Power) order, not ranked."""
+        _check_match(match)
+        after = _decode_cursor('page_artifacts_by_power', [power_text, match], cursor, 2)
+        query, args = _power_search_query(_parse_search_terms(power_text, match), match, ordered=True, after=after)
+        page = self._page('page_artifacts_by_power', [power_text, match], query, args, limit,
+                          lambda row: [row['Artifact_Id'], row['Power']])
+        if with_total:
+            page["approximate_total"] = self._count_artifacts_by_power(power_text, match)
+        return page
+
+    @_retrieval('Sacred_Timeline_Events', 'Orchestrates', 'Key_Illuminati_Members')
+    def _count_timeline_events(self, member_title: str) -> int:
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) as total FROM ({TIMELINE_EVENTS_QUERY}) events", (member_title,))
+            return cursor.fetchone()['total']
+
+    @_retrieval('Factions', 'Faction_Members', 'Key_Illuminati_Members')
+    def _count_factions_by_member_count(self, min_members: int) -> int:
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) as total FROM ({FACTION_MEMBER_COUNTS_QUERY}) factions",
+                           (min_members,))
+            return cursor.fetchone()['total']
+
+    @_retrieval('Artifacts_And_Treasures', 'Powers', 'Factions', 'Guards')
+    def _count_artifacts_by_power(self, power_text: str, match: str) -> int:
+        query, args = _power_search_query(_parse_search_terms(power_text, match), match)
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) as total FROM ({query}) matches", args)
+            return cursor.fetchone()['total']
+
+    @_retrieval('Individuals', 'Organizations', 'Surveillance', 'Surveys')
+    def surveillance_distribution(self, start=None, end=None, top: Optional[int] = None) -> Dict[str, Any]:
+        """Surveillance operations started in [start, end), by month, nationality,
+        location, organization type and surveillor.
+
+        Either bound may be omitted. With surveillance_histogram enabled the
+        answer comes from the pre-bucketed histogram, after merging any new
+        Surveillance rows; otherwise the window is grouped in SQL.
+        """
+        start = _as_date(start) if start is not None else None
+        end = _as_date(end) if end is not None else None
+        if self.surveillance_histogram is not None:
+            self.refresh_surveillance_histogram()
+            return self.surveillance_histogram.distribution(start, end, top)
+
+        conditions, args = [], []
+        if start is not None:
+            conditions.append("s.Start_Date_Of_Survey >= %s")
+            args.append(start)
+        if end is not None:
+            conditions.append("s.Start_Date_Of_Survey < %s")
+            args.append(end)
+        histogram = SurveillanceHistogram()
+        self._load_surveillance(histogram, " AND ".join(conditions) or "TRUE", args)
+        return histogram.distribution(start, end, top)
+
+    @_retrieval('Individuals', 'Organizations', 'Surveillance', 'Surveys')
     def analyze_surveillance_targets(self) -> Dict[str, Any]:
-        with self.connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as count,
-                    COUNT(DISTINCT Nationality) as unique_nationalities,
-                    COUNT(DISTINCT Current_Location) as unique_locations
-                FROM Individuals
-            """)
+        if self.stats is not None:
+            return self._current_stats().surveillance_targets()
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(INDIVIDUAL_STATS_QUERY)
             individual_stats = cursor.fetchone()
 
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as count,
-                    COUNT(DISTINCT Type) as unique_types,
-                    COUNT(DISTINCT President) as unique_presidents
-                FROM Organizations
-            """)
+            cursor.execute(ORGANIZATION_STATS_QUERY)
             org_stats = cursor.fetchone()
 
-            cursor.execute("""
-                SELECT 
-                    COUNT(DISTINCT s.Surveillance_Id) as total_surveillance_ops,
-                    COUNT(DISTINCT sur.Title) as active_surveillors,
-                    MIN(s.Start_Date_Of_Survey) as earliest_surveillance,
-                    MAX(s.Start_Date_Of_Survey) as latest_surveillance
-                FROM Surveillance s
-                LEFT JOIN Surveys sur ON s.Surveillance_Id = sur.Surveillance_Id
-            """)
+            cursor.execute(SURVEILLANCE_SUMMARY_QUERY)
             summary = cursor.fetchone()
 
             return {
@@ -192,148 +2700,692 @@ class IlluminatiDB:
                 "summary": summary
             }
 
+    @_modification('Faction_Members')
     def add_faction_member(self, member_data: Dict) -> bool:
-        try:
-            with self.connection.cursor() as cursor:
-                check_query = """
-                SELECT Member_Id
-                FROM Faction_Members
-                WHERE Member_Id = %s
-                """
-                cursor.execute(check_query, (member_data['Member_Id'],))
-                if cursor.fetchone():
-                    raise ValueError("Member ID already exists")
-
-                faction_query = "SELECT Faction_Id FROM Factions WHERE Faction_Id = %s"
-                cursor.execute(faction_query, (member_data['Faction_Id'],))
-                if not cursor.fetchone():
-                    raise ValueError("Invalid Faction ID")
-
-                if member_data.get('Leader_Id'):
-                    leader_query = """
+        with self._connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    check_query = """
                     SELECT Member_Id
                     FROM Faction_Members
-                    WHERE Member_Id = %s AND Faction_Id = %s
+                    WHERE Member_Id = %s
                     """
-                    cursor.execute(leader_query, (member_data['Leader_Id'], member_data['Faction_Id']))
+                    cursor.execute(check_query, (member_data['Member_Id'],))
+                    if cursor.fetchone():
+                        raise ValueError("Member ID already exists")
+
+                    faction_query = "SELECT Faction_Id FROM Factions WHERE Faction_Id = %s"
+                    cursor.execute(faction_query, (member_data['Faction_Id'],))
                     if not cursor.fetchone():
-                        raise ValueError("Invalid Leader ID or Leader not in same faction")
+                        raise ValueError("Invalid Faction ID")
 
-                insert_query = """
-                INSERT INTO Faction_Members
-                (Member_Id, Fname, Mname, Lname, Dob, Faction_Id, Leader_Id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """
-                cursor.execute(insert_query, (
-                    member_data['Member_Id'],
-                    member_data['Fname'],
-                    member_data.get('Mname'),
-                    member_data['Lname'],
-                    member_data['Dob'],
-                    member_data['Faction_Id'],
-                    member_data.get('Leader_Id')
-                ))
-                self.connection.commit()
-                return True
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+                    if member_data.get('Leader_Id'):
+                        leader_query = """
+                        SELECT Member_Id
+                        FROM Faction_Members
+                        WHERE Member_Id = %s AND Faction_Id = %s
+                        """
+                        cursor.execute(leader_query, (member_data['Leader_Id'], member_data['Faction_Id']))
+                        if not cursor.fetchone():
+                            raise ValueError("Invalid Leader ID or Leader not in same faction")
+
+                    cursor.execute(INSERT_MEMBER_QUERY, (
+                        member_data['Member_Id'],
+                        member_data['Fname'],
+                        member_data.get('Mname'),
+                        member_data['Lname'],
+                        member_data['Dob'],
+                        member_data['Faction_Id'],
+                        member_data.get('Leader_Id')
+                    ))
+                    if self._maintains_hierarchy(cursor):
+                        self._hierarchy_insert(cursor, [(member_data['Member_Id'], member_data['Faction_Id'],
+                                                         member_data.get('Leader_Id'))])
+                    connection.commit()
+                    if self.stats is not None:
+                        self.stats.record_member(member_data['Faction_Id'])
+                    return True
+            except Exception as e:
+                connection.rollback()
+                raise e
 
+    def _validate_members(self, cursor, members: List[Dict],
+                          chunk_size: int) -> Tuple[List[Tuple[int, Dict]], List[Dict]]:
+        """Check new members with set-based queries.
+
+        Returns the (index, member_data) pairs that may be inserted in order,
+        and an error entry for each rejected member.
+        """
+        errors = []
+        required = ('Member_Id', 'Fname', 'Lname', 'Dob', 'Faction_Id')
+
+        candidates = []
+        for index, member_data in enumerate(members):
+            missing = [field for field in required if member_data.get(field) is None]
+            if missing:
+                errors.append({"index": index, "Member_Id": member_data.get('Member_Id'),
+                               "error": f"Missing {', '.join(missing)}"})
+                continue
+            # Ids are compared with what MySQL returns, so "42" must become 42.
+            # A Leader_Id of 0 or "0" means no leader, as an empty one does.
+            try:
+                leader_id = member_data.get('Leader_Id')
+                member_data = dict(member_data, Member_Id=_as_id(member_data['Member_Id']),
+                                   Faction_Id=_as_id(member_data['Faction_Id']),
+                                   Leader_Id=(_as_id(leader_id) or None) if leader_id not in (None, '') else None)
+            except ValueError as e:
+                errors.append({"index": index, "Member_Id": member_data.get('Member_Id'), "error": str(e)})
+                continue
+            candidates.append((index, member_data))
+
+        member_ids = list({member_data['Member_Id'] for _, member_data in candidates})
+        leader_ids = list({member_data['Leader_Id'] for _, member_data in candidates
+                           if member_data['Leader_Id']})
+        faction_ids = list({member_data['Faction_Id'] for _, member_data in candidates})
+
+        existing = _existing_keys(cursor, "SELECT Member_Id FROM Faction_Members WHERE Member_Id IN ({})",
+                                  member_ids, chunk_size)
+        factions = _existing_keys(cursor, "SELECT Faction_Id FROM Factions WHERE Faction_Id IN ({})",
+                                  faction_ids, chunk_size)
+
+        leader_factions = {}
+        for chunk in _chunks(leader_ids, chunk_size):
+            cursor.execute(f"""
+            SELECT Member_Id, Faction_Id
+            FROM Faction_Members
+            WHERE Member_Id IN ({', '.join(['%s'] * len(chunk))})
+            """, chunk)
+            leader_factions.update((row['Member_Id'], row['Faction_Id']) for row in cursor.fetchall())
+
+        valid = []
+        for index, member_data in candidates:
+            member_id = member_data['Member_Id']
+            leader_id = member_data['Leader_Id']
+            if member_id in existing:
+                error = "Member ID already exists"
+            elif member_data['Faction_Id'] not in factions:
+                error = "Invalid Faction ID"
+            elif leader_id and leader_factions.get(leader_id) != member_data['Faction_Id']:
+                error = "Invalid Leader ID or Leader not in same faction"
+            else:
+                # Later rows may use this member as their leader.
+                existing.add(member_id)
+                leader_factions.setdefault(member_id, member_data['Faction_Id'])
+                valid.append((index, member_data))
+                continue
+            errors.append({"index": index, "Member_Id": member_id, "error": error})
+        return valid, errors
+
+    def _insert_members(self, cursor, rows: List[Tuple[int, Dict]]):
+        cursor.executemany(INSERT_MEMBER_QUERY, [(
+            member_data['Member_Id'],
+            member_data['Fname'],
+            member_data.get('Mname'),
+            member_data['Lname'],
+            member_data['Dob'],
+            member_data['Faction_Id'],
+            member_data['Leader_Id']
+        ) for _, member_data in rows])
+        if self._maintains_hierarchy(cursor):
+            self._hierarchy_insert(cursor, [
+                (member_data['Member_Id'], member_data['Faction_Id'], member_data['Leader_Id'])
+                for _, member_data in rows
+            ])
+
+    @_modification('Faction_Members')
+    def add_faction_members(self, members: Iterable[Dict], chunk_size: int = 1000) -> Dict[str, Any]:
+        """Bulk version of add_faction_member.
+
+        The whole batch is validated with a few set-based queries; a leader
+        may be an existing member or one defined earlier in the batch. Valid
+        rows are inserted in chunks of chunk_size, each in its own
+        transaction. A chunk the server rejects is retried one row at a
+        time, so only the rows at fault are reported. Bad rows are reported
+        instead of aborting the batch.
+        """
+        members = list(members)
+        with self._connection() as connection:
+            with connection.cursor() as cursor:
+                valid, errors = self._validate_members(cursor, members, chunk_size)
+
+            inserted = 0
+            failed = set()
+
+            def insert(rows: List[Tuple[int, Dict]]):
+                nonlocal inserted
+                with connection.cursor() as cursor:
+                    self._insert_members(cursor, rows)
+                connection.commit()
+                inserted += len(rows)
+                if self.stats is not None:
+                    for _, member_data in rows:
+                        self.stats.record_member(member_data['Faction_Id'])
+
+            for chunk in _chunks(valid, chunk_size):
+                rows = []
+                for index, member_data in chunk:
+                    if member_data['Leader_Id'] in failed:
+                        failed.add(member_data['Member_Id'])
+                        errors.append({"index": index, "Member_Id": member_data['Member_Id'],
+                                       "error": "Leader was not inserted"})
+                    else:
+                        rows.append((index, member_data))
+                if not rows:
+                    continue
+                try:
+                    insert(rows)
+                except pymysql.err.Error:
+                    connection.rollback()
+                    for index, member_data in rows:
+                        if member_data['Leader_Id'] in failed:
+                            failed.add(member_data['Member_Id'])
+                            errors.append({"index": index, "Member_Id": member_data['Member_Id'],
+                                           "error": "Leader was not inserted"})
+                            continue
+                        try:
+                            insert([(index, member_data)])
+                        except pymysql.err.Error as e:
+                            connection.rollback()
+                            failed.add(member_data['Member_Id'])
+                            errors.append({"index": index, "Member_Id": member_data['Member_Id'], "error": str(e)})
+
+        errors.sort(key=lambda error: error["index"])
+        return {"inserted": inserted, "errors": errors}
+
+    @_modification('Sanctum_Sanctorum')
     def update_sanctum_location(self, mantra: str, new_location: Dict) -> bool:
-        try:
-            with self.connection.cursor() as cursor:
-                check_query = "SELECT Mantra FROM Sanctum_Sanctorum WHERE Mantra = %s"
-                cursor.execute(check_query, (mantra,))
-                if not cursor.fetchone():
-                    raise ValueError("Sanctum not found")
-
-                update_query = """
-                UPDATE Sanctum_Sanctorum
-                SET Street = %s, City = %s, Country = %s
-                WHERE Mantra = %s
-                """
-                cursor.execute(update_query, (
-                    new_location['Street'],
-                    new_location['City'],
-                    new_location['Country'],
-                    mantra
-                ))
-                self.connection.commit()
-                return True
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+        with self._connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    check_query = "SELECT Mantra FROM Sanctum_Sanctorum WHERE Mantra = %s"
+                    cursor.execute(check_query, (mantra,))
+                    if not cursor.fetchone():
+                        raise ValueError("Sanctum not found")
 
+                    update_query = """
+                    UPDATE Sanctum_Sanctorum
+                    SET Street = %s, City = %s, Country = %s
+                    WHERE Mantra = %s
+                    """
+                    cursor.execute(update_query, (
+                        new_location['Street'],
+                        new_location['City'],
+                        new_location['Country'],
+                        mantra
+                    ))
+                    connection.commit()
+                    return True
+            except Exception as e:
+                connection.rollback()
+                raise e
+
+    @_modification('Powers', 'Guards', 'Perform_Rituals', 'Artifacts_And_Treasures')
     def delete_artifact(self, artifact_id: int) -> bool:
-        try:
-            with self.connection.cursor() as cursor:
-                check_query = """
-                SELECT a.*, f.Aim as Faction_Name
-                FROM Artifacts_And_Treasures a
-                JOIN Factions f ON a.Faction_Id = f.Faction_Id
-                WHERE a.Artifact_Id = %s
-                """
-                cursor.execute(check_query, (artifact_id,))
-                artifact = cursor.fetchone()
-                if not artifact:
-                    raise ValueError("Artifact not found")
-
-                cursor.execute("DELETE FROM Powers WHERE Artifact_Id = %s", (artifact_id,))
-                cursor.execute("DELETE FROM Guards WHERE Artifact_Id = %s", (artifact_id,))
-                cursor.execute("DELETE FROM Perform_Rituals WHERE Artifact_Id = %s", (artifact_id,))
-                cursor.execute("DELETE FROM Artifacts_And_Treasures WHERE Artifact_Id = %s", (artifact_id,))
-
-                self.connection.commit()
-                return True
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+        with self._connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    check_query = """
+                    SELECT a.*, f.Aim as Faction_Name
+                    FROM Artifacts_And_Treasures a
+                    JOIN Factions f ON a.Faction_Id = f.Faction_Id
+                    WHERE a.Artifact_Id = %s
+                    """
+                    cursor.execute(check_query, (artifact_id,))
+                    artifact = cursor.fetchone()
+                    if not artifact:
+                        raise ValueError("Artifact not found")
+
+                    cursor.execute("DELETE FROM Powers WHERE Artifact_Id = %s", (artifact_id,))
+                    cursor.execute("DELETE FROM Guards WHERE Artifact_Id = %s", (artifact_id,))
+                    cursor.execute("DELETE FROM Perform_Rituals WHERE Artifact_Id = %s", (artifact_id,))
+                    cursor.execute("DELETE FROM Artifacts_And_Treasures WHERE Artifact_Id = %s", (artifact_id,))
+
+                    connection.commit()
+                    if self.power_index is not None:
+                        self.power_index.remove_artifact(artifact_id)
+                    return True
+            except Exception as e:
+                connection.rollback()
+                raise e
+
+    def _delete_artifact_rows(self, cursor, artifact_ids: List[int]) -> Dict[str, int]:
+        """Delete the artifacts and their dependent rows; returns rows removed per table."""
+        placeholders = ', '.join(['%s'] * len(artifact_ids))
+        removed = {}
+        for table in ARTIFACT_TABLES:
+            cursor.execute(f"DELETE FROM {table} WHERE Artifact_Id IN ({placeholders})", artifact_ids)
+            removed[table] = cursor.rowcount
+        return removed
+
+    @_modification(*ARTIFACT_TABLES)
+    def delete_artifacts(self, artifact_ids: Optional[Iterable[int]] = None, faction_id: Optional[int] = None,
+                         origin: Optional[str] = None, procured_before: Optional[date] = None,
+                         chunk_size: int = 1000,
+                         progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Bulk version of delete_artifact.
+
+        Deletes the given artifact_ids, or every artifact matching all of the
+        filters given: faction_id, origin (exact match) and procured_before
+        (Date_Of_Procurement earlier than it). Artifacts are removed
+        chunk_size at a time with IN (...) deletes, each chunk in its own
+        transaction, so chunks committed before an error stay deleted.
+        Either way, as in delete_artifact, an artifact whose faction is
+        missing counts as not found. Ids may be digit strings.
+        """
+        filters = [(column, value) for column, value in (
+            ("a.Faction_Id = %s", faction_id),
+            ("a.Origin = %s", origin),
+            ("a.Date_Of_Procurement < %s", procured_before),
+        ) if value is not None]
+        if (artifact_ids is None) == (not filters):
+            raise ValueError("Pass either artifact_ids or at least one of faction_id, origin and procured_before")
+        # not_found is compared with what MySQL returns, so "4" must become 4.
+        ids = None
+        if artifact_ids is not None:
+            ids = list(dict.fromkeys(_as_id(artifact_id) for artifact_id in artifact_ids))
+        where = " AND ".join(condition for condition, _ in filters)
+        params = [value for _, value in filters]
+        removed = dict.fromkeys(ARTIFACT_TABLES, 0)
+        not_found = []
+        deleted = 0
+
+        with self._connection() as connection:
+            offset, last_id = 0, None
+            while True:
+                try:
+                    with connection.cursor() as cursor:
+                        if ids is not None:
+                            chunk = ids[offset:offset + chunk_size]
+                            offset += len(chunk)
+                            found = _existing_keys(cursor, EXISTING_ARTIFACTS_QUERY, chunk, chunk_size)
+                            not_found.extend(artifact_id for artifact_id in chunk if artifact_id not in found)
+                            chunk = [artifact_id for artifact_id in chunk if artifact_id in found]
+                            done = offset >= len(ids)
+                        else:
+                            # Walk the matches in Artifact_Id order so each chunk starts where the last ended.
+                            after = "AND a.Artifact_Id > %s" if last_id is not None else ""
+                            cursor.execute(f"""
+                            SELECT a.Artifact_Id
+                            {EXISTING_ARTIFACTS_FROM}
+                            WHERE {where} {after}
+                            ORDER BY a.Artifact_Id
+                            LIMIT %s
+                            """, params + ([last_id] if last_id is not None else []) + [chunk_size])
+                            chunk = [row['Artifact_Id'] for row in cursor.fetchall()]
+                            done = len(chunk) < chunk_size
+                            if chunk:
+                                last_id = chunk[-1]
+                        counts = self._delete_artifact_rows(cursor, chunk) if chunk else {}
+                    connection.commit()
+                except Exception as e:
+                    connection.rollback()
+                    raise e
+
+                for table, count in counts.items():
+                    removed[table] += count
+                deleted += len(chunk)
+                if self.power_index is not None:
+                    for artifact_id in chunk:
+                        self.power_index.remove_artifact(artifact_id)
+                if progress:
+                    total = f" of {len(ids)}" if ids is not None else ""
+                    progress(f"Deleted {deleted}{total} artifacts")
+                if done:
+                    break
+
+        return {"deleted": deleted, "removed": removed, "not_found": not_found}
+
+    @_modification('Key_Illuminati_Members')
     def update_illuminati_name(self, title: str, new_name: str) -> bool:
         """Update: Change the name of a Key Illuminati Member"""
-        try:
-            with self.connection.cursor() as cursor:
-                # First verify member exists
-                cursor.execute("SELECT Title FROM Key_Illuminati_Members WHERE Title = %s", (title,))
-                if not cursor.fetchone():
-                    raise ValueError("Illuminati member not found")
-
-                update_query = """
-                UPDATE Key_Illuminati_Members
-                SET Name = %s
-                WHERE Title = %s
-                """
-                cursor.execute(update_query, (new_name, title))
-                self.connection.commit()
-                return True
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+        with self._connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    # First verify member exists
+                    cursor.execute("SELECT Title FROM Key_Illuminati_Members WHERE Title = %s", (title,))
+                    if not cursor.fetchone():
+                        raise ValueError("Illuminati member not found")
+
+                    update_query = """
+                    UPDATE Key_Illuminati_Members
+                    SET Name = %s
+                    WHERE Title = %s
+                    """
+                    cursor.execute(update_query, (new_name, title))
+                    connection.commit()
+                    return True
+            except Exception as e:
+                connection.rollback()
+                raise e
 
+    @_modification('Factions')
     def update_faction_head(self, faction_id: int, new_head_title: str) -> bool:
         """Update: Change the HeadTitle of a Faction"""
-        try:
-            with self.connection.cursor() as cursor:
-                # Verify faction exists
-                cursor.execute("SELECT Faction_Id FROM Factions WHERE Faction_Id = %s", (faction_id,))
-                if not cursor.fetchone():
-                    raise ValueError("Faction not found")
+        with self._connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    # Verify faction exists
+                    cursor.execute("SELECT Faction_Id FROM Factions WHERE Faction_Id = %s", (faction_id,))
+                    if not cursor.fetchone():
+                        raise ValueError("Faction not found")
                 
-                # Verify new head title exists in Key_Illuminati_Members
-                cursor.execute("SELECT Title FROM Key_Illuminati_Members WHERE Title = %s", (new_head_title,))
-                if not cursor.fetchone():
-                    raise ValueError("New head title not found in Key Illuminati Members")
-
-                update_query = """
-                UPDATE Factions
-                SET HeadTitle = %s
-                WHERE Faction_Id = %s
-                """
-                cursor.execute(update_query, (new_head_title, faction_id))
-                self.connection.commit()
-                return True
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+                    # Verify new head title exists in Key_Illuminati_Members
+                    cursor.execute("SELECT Title FROM Key_Illuminati_Members WHERE Title = %s", (new_head_title,))
+                    if not cursor.fetchone():
+                        raise ValueError("New head title not found in Key Illuminati Members")
+
+                    update_query = """
+                    UPDATE Factions
+                    SET HeadTitle = %s
+                    WHERE Faction_Id = %s
+                    """
+                    cursor.execute(update_query, (new_head_title, faction_id))
+                    connection.commit()
+                    return True
+            except Exception as e:
+                connection.rollback()
+                raise e
+
+
+    @contextmanager
+    def transaction(self, chunk_size: int = 1000):
+        """Queue the modification calls made in the block and apply them in one commit.
+
+        Queued calls return None. When the block exits normally, every
+        existence check is resolved with set-based queries; if any fails a
+        TransactionError naming the operations is raised and nothing is
+        written. Otherwise the writes go out as batched statements and are
+        committed together. Nested blocks join the outer transaction.
+        """
+        unit = getattr(self._local, 'unit_of_work', None)
+        if unit is not None:
+            yield unit
+            return
+        unit = self._local.unit_of_work = UnitOfWork()
+        try:
+            yield unit
+        finally:
+            self._local.unit_of_work = None
+        if not unit.operations:
+            return
+        try:
+            if self.metrics is None:
+                self._flush(unit, chunk_size)
+            else:
+                with self.metrics.operation('transaction'):
+                    self._flush(unit, chunk_size)
+        finally:
+            self._wrote()
+        if self.cache is not None:
+            self.cache.invalidate(unit.tables)
+
+    def _flush(self, unit: UnitOfWork, chunk_size: int):
+        queued = {name: [] for name in UnitOfWork.OPERATIONS}
+        for index, (name, arguments) in enumerate(unit.operations):
+            queued[name].append((index, arguments))
+        failures = []
+
+        def reject(index: int, error: str):
+            failures.append({"index": index, "op": unit.operations[index][0], "error": error})
+
+        with self._connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    new_members = [arguments['member_data'] for _, arguments in queued['add_faction_member']]
+                    valid_members, errors = self._validate_members(cursor, new_members, chunk_size)
+                    for error in errors:
+                        reject(queued['add_faction_member'][error['index']][0], error['error'])
+
+                    mantras = _existing_keys(
+                        cursor, "SELECT Mantra FROM Sanctum_Sanctorum WHERE Mantra IN ({})",
+                        list({arguments['mantra'] for _, arguments in queued['update_sanctum_location']}),
+                        chunk_size
+                    )
+                    locations = {}
+                    for index, arguments in queued['update_sanctum_location']:
+                        mantra, location = arguments['mantra'], arguments['new_location']
+                        if _sql_key(mantra) not in mantras:
+                            reject(index, "Sanctum not found")
+                        else:
+                            # The last change to a row wins, as it would unbatched.
+                            locations[_sql_key(mantra)] = (mantra, (location['Street'], location['City'],
+                                                                    location['Country']))
+
+                    artifacts = _existing_keys(
+                        cursor, EXISTING_ARTIFACTS_QUERY,
+                        list({arguments['artifact_id'] for _, arguments in queued['delete_artifact']}),
+                        chunk_size
+                    )
+                    deleted = []
+                    for index, arguments in queued['delete_artifact']:
+                        if _sql_key(arguments['artifact_id']) not in artifacts:
+                            reject(index, "Artifact not found")
+                        else:
+                            # A second delete of the same artifact finds nothing, as it would unbatched.
+                            artifacts.discard(_sql_key(arguments['artifact_id']))
+                            deleted.append(arguments['artifact_id'])
+
+                    titles = _existing_keys(
+                        cursor, "SELECT Title FROM Key_Illuminati_Members WHERE Title IN ({})",
+                        list({arguments['title'] for _, arguments in queued['update_illuminati_name']}
+                             | {arguments['new_head_title'] for _, arguments in queued['update_faction_head']}),
+                        chunk_size
+                    )
+                    names = {}
+                    for index, arguments in queued['update_illuminati_name']:
+                        if _sql_key(arguments['title']) not in titles:
+                            reject(index, "Illuminati member not found")
+                        else:
+                            names[_sql_key(arguments['title'])] = (arguments['title'], (arguments['new_name'],))
+
+                    factions = _existing_keys(
+                        cursor, "SELECT Faction_Id FROM Factions WHERE Faction_Id IN ({})",
+                        list({arguments['faction_id'] for _, arguments in queued['update_faction_head']}),
+                        chunk_size
+                    )
+                    heads = {}
+                    for index, arguments in queued['update_faction_head']:
+                        if _sql_key(arguments['faction_id']) not in factions:
+                            reject(index, "Faction not found")
+                        elif _sql_key(arguments['new_head_title']) not in titles:
+                            reject(index, "New head title not found in Key Illuminati Members")
+                        else:
+                            heads[_sql_key(arguments['faction_id'])] = (arguments['faction_id'],
+                                                                        (arguments['new_head_title'],))
+
+                    if failures:
+                        failures.sort(key=lambda failure: failure["index"])
+                        raise TransactionError(failures)
+
+                    for chunk in _chunks([member_data for _, member_data in valid_members], chunk_size):
+                        cursor.executemany(INSERT_MEMBER_QUERY, [(
+                            member_data['Member_Id'],
+                            member_data['Fname'],
+                            member_data.get('Mname'),
+                            member_data['Lname'],
+                            member_data['Dob'],
+                            member_data['Faction_Id'],
+                            member_data.get('Leader_Id') or None
+                        ) for member_data in chunk])
+                        if self._maintains_hierarchy(cursor):
+                            self._hierarchy_insert(cursor, [
+                                (member_data['Member_Id'], member_data['Faction_Id'], member_data.get('Leader_Id'))
+                                for member_data in chunk
+                            ])
+
+                    _batched_update(cursor, 'Sanctum_Sanctorum', 'Mantra', ('Street', 'City', 'Country'),
+                                    dict(locations.values()), chunk_size)
+                    _batched_update(cursor, 'Key_Illuminati_Members', 'Title', ('Name',),
+                                    dict(names.values()), chunk_size)
+                    _batched_update(cursor, 'Factions', 'Faction_Id', ('HeadTitle',),
+                                    dict(heads.values()), chunk_size)
+
+                    for chunk in _chunks(deleted, chunk_size):
+                        self._delete_artifact_rows(cursor, chunk)
+
+                    connection.commit()
+            except Exception as e:
+                connection.rollback()
+                raise e
+
+        if self.power_index is not None:
+            for artifact_id in deleted:
+                self.power_index.remove_artifact(artifact_id)
+        if self.stats is not None:
+            for _, member_data in valid_members:
+                self.stats.record_member(member_data['Faction_Id'])
+        unit.applied = len(unit.operations)
+
+    @_modification('Member_Hierarchy', 'Member_Ancestry')
+    def create_hierarchy_store(self) -> int:
+        """Create the hierarchy tables if needed and backfill them. Returns the member count."""
+        with self._connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    for statement in HIERARCHY_STORE_SCHEMA:
+                        cursor.execute(statement)
+                    count = self._backfill_hierarchy(cursor)
+                    connection.commit()
+                    self._hierarchy_tables = True
+                    return count
+            except Exception as e:
+                connection.rollback()
+                raise e
+
+    def _backfill_hierarchy(self, cursor) -> int:
+        cursor.execute("DELETE FROM Member_Ancestry")
+        cursor.execute("DELETE FROM Member_Hierarchy")
+        cursor.execute(
+            "INSERT INTO Member_Hierarchy (Member_Id, Faction_Id, Level, Subordinates)"
+            + HIERARCHY_LEVELS_CTE
+        )
+        count = cursor.rowcount
+        cursor.execute("""
+        INSERT INTO Member_Ancestry (Ancestor_Id, Member_Id, Distance)
+        WITH RECURSIVE Ancestry AS (
+            SELECT Member_Id as Ancestor_Id, Member_Id, 0 as Distance
+            FROM Member_Hierarchy
+
+            UNION ALL
+
+            SELECT a.Ancestor_Id, fm.Member_Id, a.Distance + 1
+            FROM Ancestry a
+            JOIN Faction_Members fm ON fm.Leader_Id = a.Member_Id
+        )
+        SELECT Ancestor_Id, Member_Id, Distance FROM Ancestry
+        """)
+        return count
+
+    def _hierarchy_insert(self, cursor, members: List[Tuple[int, int, Optional[int]]]):
+        """Add new leaf members, given as (Member_Id, Faction_Id, Leader_Id) in insertion order."""
+        new_ids = {member_id for member_id, _, _ in members}
+        outside = list({leader_id for _, _, leader_id in members if leader_id} - new_ids)
+
+        levels = {}
+        ancestors = {}
+        for chunk in _chunks(outside, 1000):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"SELECT Member_Id, Level FROM Member_Hierarchy WHERE Member_Id IN ({placeholders})", chunk)
+            levels.update((row['Member_Id'], row['Level']) for row in cursor.fetchall())
+            cursor.execute(f"""
+            SELECT Member_Id, Ancestor_Id, Distance
+            FROM Member_Ancestry
+            WHERE Member_Id IN ({placeholders})
+            """, chunk)
+            for row in cursor.fetchall():
+                ancestors.setdefault(row['Member_Id'], []).append((row['Ancestor_Id'], row['Distance']))
+
+        hierarchy_rows = []
+        ancestry_rows = []
+        subordinates = Counter()
+        for member_id, faction_id, leader_id in members:
+            if leader_id:
+                if leader_id not in levels:
+                    # The leader is not reachable from a top-level member, so
+                    # the new member isn't either.
+                    continue
+                level = levels[leader_id] + 1
+                chain = [(ancestor_id, distance + 1) for ancestor_id, distance in ancestors[leader_id]]
+                subordinates[leader_id] += 1
+            else:
+                level = 0
+                chain = []
+            chain.append((member_id, 0))
+            levels[member_id] = level
+            ancestors[member_id] = chain
+            hierarchy_rows.append((member_id, faction_id, level))
+            ancestry_rows.extend((ancestor_id, member_id, distance) for ancestor_id, distance in chain)
+
+        if hierarchy_rows:
+            cursor.executemany("""
+            INSERT INTO Member_Hierarchy (Member_Id, Faction_Id, Level, Subordinates)
+            VALUES (%s, %s, %s, %s)
+            """, [(member_id, faction_id, level, subordinates.pop(member_id, 0))
+                  for member_id, faction_id, level in hierarchy_rows])
+            cursor.executemany("""
+            INSERT INTO Member_Ancestry (Ancestor_Id, Member_Id, Distance)
+            VALUES (%s, %s, %s)
+            """, ancestry_rows)
+        if subordinates:
+            cursor.executemany(
+                "UPDATE Member_Hierarchy SET Subordinates = Subordinates + %s WHERE Member_Id = %s",
+                [(count, leader_id) for leader_id, count in subordinates.items()]
+            )
+
+    def verify_hierarchy_store(self) -> Dict[str, Any]:
+        """Compare the hierarchy store against the recursive CTE."""
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(HIERARCHY_LEVELS_CTE)
+            expected = {row['Member_Id']: row for row in cursor.fetchall()}
+            cursor.execute("SELECT Member_Id, Faction_Id, Level, Subordinates FROM Member_Hierarchy")
+            stored = {row['Member_Id']: row for row in cursor.fetchall()}
+
+            cursor.execute("""
+            WITH RECURSIVE MemberHierarchy AS (
+                SELECT Member_Id FROM Faction_Members WHERE Leader_Id IS NULL
+                UNION ALL
+                SELECT fm.Member_Id
+                FROM Faction_Members fm
+                JOIN MemberHierarchy mh ON fm.Leader_Id = mh.Member_Id
+            ),
+            Ancestry AS (
+                SELECT Member_Id as Ancestor_Id, Member_Id, 0 as Distance
+                FROM MemberHierarchy
+
+                UNION ALL
+
+                SELECT a.Ancestor_Id, fm.Member_Id, a.Distance + 1
+                FROM Ancestry a
+                JOIN Faction_Members fm ON fm.Leader_Id = a.Member_Id
+            )
+            SELECT
+                COUNT(*) as expected_links,
+                SUM(ma.Member_Id IS NULL) as missing_links
+            FROM Ancestry a
+            LEFT JOIN Member_Ancestry ma
+                ON ma.Ancestor_Id = a.Ancestor_Id
+                AND ma.Member_Id = a.Member_Id
+                AND ma.Distance = a.Distance
+            """)
+            links = cursor.fetchone()
+            cursor.execute("SELECT COUNT(*) as stored_links FROM Member_Ancestry")
+            stored_links = cursor.fetchone()['stored_links']
+
+        missing_links = int(links['missing_links'] or 0)
+        unexpected_links = stored_links - (links['expected_links'] - missing_links)
+        report = {
+            "missing_members": sorted(set(expected) - set(stored)),
+            "unexpected_members": sorted(set(stored) - set(expected)),
+            "mismatched_members": sorted(
+                member_id for member_id in set(expected) & set(stored)
+                if expected[member_id] != stored[member_id]
+            ),
+            "missing_links": missing_links,
+            "unexpected_links": unexpected_links
+        }
+        report["consistent"] = not (report["missing_members"] or report["unexpected_members"]
+                                    or report["mismatched_members"] or missing_links or unexpected_links)
+        return report
 
 
 def print_menu():
@@ -382,7 +3434,7 @@ def main():
 
                     elif choice == '1':
                         member_title = input("\nEnter Illuminati Member Title: ")
-                        events = db.get_timeline_events_by_member(member_title)
+                        events = db.iter_timeline_events_by_member(member_title)
                         print(f"\n=== Sacred Timeline Events for {member_title} ===")
                         for event in events:
                             print(f"\nEvent ID: {event['Event_Id']}")
@@ -393,7 +3445,7 @@ def main():
 
                     elif choice == '2':
                         min_members = get_user_input("\nEnter minimum number of members: ", int)
-                        factions = db.get_factions_by_member_count(min_members)
+                        factions = db.iter_factions_by_member_count(min_members)
                         print(f"\n=== Factions with more than {min_members} members ===")
                         for faction in factions:
                             print(f"\nFaction ID: {faction['Faction_Id']}")
@@ -411,7 +3463,7 @@ def main():
 
                     elif choice == '4':
                         power = input("\nEnter power to search for: ")
-                        artifacts = db.search_artifacts_by_power(power)
+                        artifacts = db.iter_artifacts_by_power(power)
                         print("\n=== Artifacts ===")
                         last_id = None
                         for artifact in artifacts:
@@ -428,11 +3480,10 @@ def main():
                     elif choice == '5':
                         year = get_user_input("Enter year (YYYY): ", int)
                         month = get_user_input("Enter month (1-12): ", int)
-                        report = db.generate_monthly_faction_report(year, month)
                         
                         print("\n=== Monthly Faction Report ===")
                         print("\nMeetings:")
-                        for meeting in report['meetings']:
+                        for meeting in db.iter_monthly_faction_meetings(year, month):
                             print(f"\nFaction: {meeting['Aim']}")
                             print(f"Date: {meeting['Date']}")
                             print(f"Time: {meeting['Time']}")
@@ -443,7 +3494,7 @@ def main():
 
                         print("\nHierarchy:")
                         current_faction = None
-                        for member in report['hierarchy']:
+                        for member in db.iter_faction_hierarchy():
                             if current_faction != member['Faction_Id']:
                                 current_faction = member['Faction_Id']
                                 print(f"\nFaction: {member['Faction_Name']}")
@@ -0,0 +1,412 @@
+"""Fill the Illuminati schema with synthetic, referentially consistent data.
+
+    python seed.py --members 100000 --reset
+
+The number of Faction_Members rows sets the scale; every other table is
+sized in proportion to it. The same --seed always produces the same data,
+so benchmark runs against equal scales are comparable.
+"""
+import argparse
+import random
+import time
+from array import array
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import pymysql
+
+from script import DB_CONFIG
+
+# Tables in foreign-key dependency order: every table only references
+# tables listed before it.
+TABLES = [
+    'Key_Illuminati_Members',
+    'Factions',
+    'Faction_Members',
+    'Sacred_Timeline_Events',
+    'Orchestrates',
+    'Artifacts_And_Treasures',
+    'Powers',
+    'Guards',
+    'Perform_Rituals',
+    'Faction_Meetings',
+    'Sanctum_Sanctorum',
+    'Individuals',
+    'Organizations',
+    'Surveillance',
+    'Surveys',
+]
+
+SCHEMA = {
+    'Key_Illuminati_Members': """
+    CREATE TABLE IF NOT EXISTS Key_Illuminati_Members (
+        Title VARCHAR(100) NOT NULL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL
+    )
+    """,
+    'Factions': """
+    CREATE TABLE IF NOT EXISTS Factions (
+        Faction_Id INT NOT NULL PRIMARY KEY,
+        Aim VARCHAR(255) NOT NULL,
+        Symbol VARCHAR(100),
+        HeadTitle VARCHAR(100),
+        FOREIGN KEY (HeadTitle) REFERENCES Key_Illuminati_Members (Title)
+    )
+    """,
+    'Faction_Members': """
+    CREATE TABLE IF NOT EXISTS Faction_Members (
+        Member_Id INT NOT NULL PRIMARY KEY,
+        Fname VARCHAR(50) NOT NULL,
+        Mname VARCHAR(50),
+        Lname VARCHAR(50) NOT NULL,
+        Dob DATE NOT NULL,
+        Faction_Id INT NOT NULL,
+        Leader_Id INT,
+        FOREIGN KEY (Faction_Id) REFERENCES Factions (Faction_Id),
+        FOREIGN KEY (Leader_Id) REFERENCES Faction_Members (Member_Id)
+    )
+    """,
+    'Sacred_Timeline_Events': """
+    CREATE TABLE IF NOT EXISTS Sacred_Timeline_Events (
+        Event_Id INT NOT NULL PRIMARY KEY,
+        Date DATE NOT NULL,
+        Time TIME NOT NULL,
+        Status VARCHAR(50) NOT NULL,
+        Description TEXT
+    )
+    """,
+    'Orchestrates': """
+    CREATE TABLE IF NOT EXISTS Orchestrates (
+        Title VARCHAR(100) NOT NULL,
+        Event_Id INT NOT NULL,
+        PRIMARY KEY (Title, Event_Id),
+        FOREIGN KEY (Title) REFERENCES Key_Illuminati_Members (Title),
+        FOREIGN KEY (Event_Id) REFERENCES Sacred_Timeline_Events (Event_Id)
+    )
+    """,
+    'Artifacts_And_Treasures': """
+    CREATE TABLE IF NOT EXISTS Artifacts_And_Treasures (
+        Artifact_Id INT NOT NULL PRIMARY KEY,
+        Origin VARCHAR(255) NOT NULL,
+        Date_Of_Procurement DATE,
+        Faction_Id INT NOT NULL,
+        FOREIGN KEY (Faction_Id) REFERENCES Factions (Faction_Id)
+    )
+    """,
+    'Powers': """
+    CREATE TABLE IF NOT EXISTS Powers (
+        Artifact_Id INT NOT NULL,
+        Power VARCHAR(255) NOT NULL,
+        PRIMARY KEY (Artifact_Id, Power),
+        FOREIGN KEY (Artifact_Id) REFERENCES Artifacts_And_Treasures (Artifact_Id)
+    )
+    """,
+    'Guards': """
+    CREATE TABLE IF NOT EXISTS Guards (
+        Artifact_Id INT NOT NULL,
+        Member_Id INT NOT NULL,
+        PRIMARY KEY (Artifact_Id, Member_Id),
+        FOREIGN KEY (Artifact_Id) REFERENCES Artifacts_And_Treasures (Artifact_Id),
+        FOREIGN KEY (Member_Id) REFERENCES Faction_Members (Member_Id)
+    )
+    """,
+    'Perform_Rituals': """
+    CREATE TABLE IF NOT EXISTS Perform_Rituals (
+        Title VARCHAR(100) NOT NULL,
+        Artifact_Id INT NOT NULL,
+        Ritual VARCHAR(255),
+        PRIMARY KEY (Title, Artifact_Id),
+        FOREIGN KEY (Title) REFERENCES Key_Illuminati_Members (Title),
+        FOREIGN KEY (Artifact_Id) REFERENCES Artifacts_And_Treasures (Artifact_Id)
+    )
+    """,
+    'Faction_Meetings': """
+    CREATE TABLE IF NOT EXISTS Faction_Meetings (
+        Faction_Id INT NOT NULL,
+        Date DATE NOT NULL,
+        Time TIME NOT NULL,
+        Agenda VARCHAR(255),
+        City VARCHAR(100),
+        Country VARCHAR(100),
+        PRIMARY KEY (Faction_Id, Date, Time),
+        FOREIGN KEY (Faction_Id) REFERENCES Factions (Faction_Id)
+    )
+    """,
+    'Sanctum_Sanctorum': """
+    CREATE TABLE IF NOT EXISTS Sanctum_Sanctorum (
+        Mantra VARCHAR(100) NOT NULL PRIMARY KEY,
+        Street VARCHAR(255),
+        City VARCHAR(100),
+        Country VARCHAR(100)
+    )
+    """,
+    'Individuals': """
+    CREATE TABLE IF NOT EXISTS Individuals (
+        Target_Id INT NOT NULL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Nationality VARCHAR(100),
+        Current_Location VARCHAR(100)
+    )
+    """,
+    'Organizations': """
+    CREATE TABLE IF NOT EXISTS Organizations (
+        Target_Id INT NOT NULL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Type VARCHAR(100),
+        President VARCHAR(100)
+    )
+    """,
+    'Surveillance': """
+    CREATE TABLE IF NOT EXISTS Surveillance (
+        Surveillance_Id INT NOT NULL PRIMARY KEY,
+        Target_Id INT NOT NULL,
+        Start_Date_Of_Survey DATE NOT NULL
+    )
+    """,
+    'Surveys': """
+    CREATE TABLE IF NOT EXISTS Surveys (
+        Title VARCHAR(100) NOT NULL,
+        Surveillance_Id INT NOT NULL,
+        PRIMARY KEY (Title, Surveillance_Id),
+        FOREIGN KEY (Title) REFERENCES Key_Illuminati_Members (Title),
+        FOREIGN KEY (Surveillance_Id) REFERENCES Surveillance (Surveillance_Id)
+    )
+    """,
+}
+
+POWERS = [
+    'Mind Control', 'Time Manipulation', 'Invisibility', 'Foresight', 'Healing', 'Teleportation',
+    'Fire Conjuring', 'Storm Calling', 'Shapeshifting', 'Memory Erasure', 'Wealth Multiplication',
+    'Dream Walking', 'Eternal Youth', 'Truth Compulsion', 'Shadow Binding', 'Gravity Control'
+]
+CITIES = [
+    ('Geneva', 'Switzerland'), ('Munich', 'Germany'), ('Cairo', 'Egypt'), ('Rome', 'Italy'),
+    ('London', 'United Kingdom'), ('New York', 'USA'), ('Tokyo', 'Japan'), ('Paris', 'France'),
+    ('Mumbai', 'India'), ('Buenos Aires', 'Argentina'), ('Prague', 'Czech Republic'), ('Sydney', 'Australia')
+]
+FIRST_NAMES = ['Adam', 'Bianca', 'Cyrus', 'Dara', 'Elias', 'Freya', 'Gideon', 'Helena', 'Ivo', 'Juno']
+LAST_NAMES = ['Weishaupt', 'Knigge', 'Zwack', 'Bode', 'Massenhausen', 'Hertel', 'Drexel', 'Loew']
+ORGANIZATION_TYPES = ['Bank', 'Government', 'Media', 'University', 'Church', 'Corporation', 'NGO']
+STATUSES = ['Planned', 'In Progress', 'Completed', 'Averted']
+
+EPOCH = date(2000, 1, 1)
+
+
+def plan(members: int) -> Dict[str, int]:
+    """Number of primary rows generated for each table at this scale."""
+    factions = max(5, members // 1000)
+    return {
+        'Key_Illuminati_Members': max(factions, members // 100),
+        'Factions': factions,
+        'Faction_Members': members,
+        'Sacred_Timeline_Events': max(10, members // 2),
+        'Artifacts_And_Treasures': max(10, members // 10),
+        'Faction_Meetings': max(10, members // 5),
+        'Sanctum_Sanctorum': max(10, members // 1000),
+        'Individuals': max(10, members // 4),
+        'Organizations': max(10, members // 20),
+        'Surveillance': max(10, members // 2),
+    }
+
+
+def _day(rng: random.Random, span_days: int = 9000) -> date:
+    return EPOCH + timedelta(days=rng.randrange(span_days))
+
+
+def _time(rng: random.Random) -> str:
+    return f"{rng.randrange(24):02d}:{rng.randrange(60):02d}:00"
+
+
+def _insert(connection, table: str, columns, rows, chunk_size: int) -> int:
+    # IGNORE drops the rare random collision on a composite natural key
+    # (two meetings of one faction at the same date and time).
+    query = (f"INSERT IGNORE INTO {table} ({', '.join(columns)}) "
+             f"VALUES ({', '.join(['%s'] * len(columns))})")
+    count = 0
+    batch = []
+    with connection.cursor() as cursor:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                count += cursor.executemany(query, batch)
+                connection.commit()
+                batch = []
+        if batch:
+            count += cursor.executemany(query, batch)
+            connection.commit()
+    return count
+
+
+def _members(rng: random.Random, members: int, factions: int, max_depth: int):
+    """Faction_Members rows in contiguous ID blocks per faction.
+
+    Most members extend the newest leader chain of their faction, so the
+    hierarchy gets deep chains (capped at max_depth levels) as well as
+    wide levels.
+    """
+    depth = array('H', bytes(2 * (members + 1)))
+    block = -(-members // factions)
+    for member_id in range(1, members + 1):
+        faction_id = (member_id - 1) // block + 1
+        first = (faction_id - 1) * block + 1
+        leader_id = None
+        if member_id > first:
+            candidate = member_id - 1 if rng.random() < 0.7 else rng.randrange(first, member_id)
+            if depth[candidate] + 1 < max_depth:
+                leader_id = candidate
+                depth[member_id] = depth[candidate] + 1
+        yield (
+            member_id,
+            rng.choice(FIRST_NAMES),
+            rng.choice(FIRST_NAMES) if rng.random() < 0.3 else None,
+            rng.choice(LAST_NAMES),
+            _day(rng, 20000) - timedelta(days=20000),
+            faction_id,
+            leader_id
+        )
+
+
+def seed(connection, members: int, random_seed: int = 42, max_depth: int = 50,
+         chunk_size: int = 5000, progress=print) -> Dict[str, int]:
+    """Insert a full synthetic data set; returns the row count per table."""
+    rng = random.Random(random_seed)
+    sizes = plan(members)
+    titles = sizes['Key_Illuminati_Members']
+    factions = sizes['Factions']
+    artifacts = sizes['Artifacts_And_Treasures']
+    individuals = sizes['Individuals']
+    targets = individuals + sizes['Organizations']
+
+    def title(index: int) -> str:
+        return f"Title{index}"
+
+    generators = {
+        'Key_Illuminati_Members': (('Title', 'Name'), (
+            (title(i), f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}") for i in range(1, titles + 1)
+        )),
+        'Factions': (('Faction_Id', 'Aim', 'Symbol', 'HeadTitle'), (
+            (i, f"Faction {i}: {rng.choice(POWERS)}", f"Sigil {i}", title(rng.randrange(1, titles + 1)))
+            for i in range(1, factions + 1)
+        )),
+        'Faction_Members': (('Member_Id', 'Fname', 'Mname', 'Lname', 'Dob', 'Faction_Id', 'Leader_Id'),
+                            _members(rng, members, factions, max_depth)),
+        'Sacred_Timeline_Events': (('Event_Id', 'Date', 'Time', 'Status', 'Description'), (
+            (i, _day(rng), _time(rng), rng.choice(STATUSES), f"Event {i} of the sacred timeline")
+            for i in range(1, sizes['Sacred_Timeline_Events'] + 1)
+        )),
+        'Orchestrates': (('Title', 'Event_Id'), (
+            (title(t), i)
+            for i in range(1, sizes['Sacred_Timeline_Events'] + 1)
+            for t in rng.sample(range(1, titles + 1), min(titles, rng.randint(1, 2)))
+        )),
+        'Artifacts_And_Treasures': (('Artifact_Id', 'Origin', 'Date_Of_Procurement', 'Faction_Id'), (
+            (i, f"{rng.choice(CITIES)[0]} vault {i}", _day(rng), rng.randrange(1, factions + 1))
+            for i in range(1, artifacts + 1)
+        )),
+        'Powers': (('Artifact_Id', 'Power'), (
+            (i, power)
+            for i in range(1, artifacts + 1)
+            for power in rng.sample(POWERS, rng.randint(1, 3))
+        )),
+        'Guards': (('Artifact_Id', 'Member_Id'), (
+            (i, member_id)
+            for i in range(1, artifacts + 1)
+            for member_id in rng.sample(range(1, members + 1), min(members, rng.randint(0, 4)))
+        )),
+        'Perform_Rituals': (('Title', 'Artifact_Id', 'Ritual'), (
+            (title(t), i, f"Rite of {rng.choice(POWERS)}")
+            for i in range(1, artifacts + 1)
+            for t in rng.sample(range(1, titles + 1), min(titles, rng.randint(0, 2)))
+        )),
+        'Faction_Meetings': (('Faction_Id', 'Date', 'Time', 'Agenda', 'City', 'Country'), (
+            (rng.randrange(1, factions + 1), _day(rng), f"{i % 24:02d}:{i // 24 % 60:02d}:{i // 1440 % 60:02d}",
+             f"Agenda item {i}", *rng.choice(CITIES))
+            for i in range(1, sizes['Faction_Meetings'] + 1)
+        )),
+        'Sanctum_Sanctorum': (('Mantra', 'Street', 'City', 'Country'), (
+            (f"Mantra{i}", f"{rng.randrange(1, 999)} Hidden Lane", *rng.choice(CITIES))
+            for i in range(1, sizes['Sanctum_Sanctorum'] + 1)
+        )),
+        'Individuals': (('Target_Id', 'Name', 'Nationality', 'Current_Location'), (
+            (i, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.choice(CITIES)[1], rng.choice(CITIES)[0])
+            for i in range(1, individuals + 1)
+        )),
+        'Organizations': (('Target_Id', 'Name', 'Type', 'President'), (
+            (i, f"Organization {i}", rng.choice(ORGANIZATION_TYPES), f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+            for i in range(individuals + 1, targets + 1)
+        )),
+        'Surveillance': (('Surveillance_Id', 'Target_Id', 'Start_Date_Of_Survey'), (
+            (i, rng.randrange(1, targets + 1), _day(rng))
+            for i in range(1, sizes['Surveillance'] + 1)
+        )),
+        'Surveys': (('Title', 'Surveillance_Id'), (
+            (title(t), i)
+            for i in range(1, sizes['Surveillance'] + 1)
+            for t in rng.sample(range(1, titles + 1), min(titles, rng.randint(1, 2)))
+        )),
+    }
+
+    counts = {}
+    with connection.cursor() as cursor:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    try:
+        for table in TABLES:
+            started = time.perf_counter()
+            columns, rows = generators[table]
+            counts[table] = _insert(connection, table, columns, rows, chunk_size)
+            if progress:
+                progress(f"{table}: {counts[table]} rows in {time.perf_counter() - started:.1f}s")
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    return counts
+
+
+def create_schema(connection, reset: bool = False):
+    with connection.cursor() as cursor:
+        if reset:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            for table in reversed(TABLES):
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        for table in TABLES:
+            cursor.execute(SCHEMA[table])
+    connection.commit()
+
+
+def connect(host: Optional[str] = None, port: Optional[int] = None, user: Optional[str] = None,
+            password: Optional[str] = None, database: Optional[str] = None):
+    overrides = {'host': host, 'port': port, 'user': user, 'password': password, 'database': database}
+    config = {**DB_CONFIG, **{key: value for key, value in overrides.items() if value is not None}}
+    return pymysql.connect(**config)
+
+
+def add_connection_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("--host")
+    arg_parser.add_argument("--port", type=int)
+    arg_parser.add_argument("--user")
+    arg_parser.add_argument("--password")
+    arg_parser.add_argument("--database")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Seed the Illuminati database with synthetic data")
+    arg_parser.add_argument("--members", type=int, default=1000, help="Faction_Members rows; sets the scale")
+    arg_parser.add_argument("--seed", type=int, default=42)
+    arg_parser.add_argument("--max-depth", type=int, default=50, help="deepest leader chain")
+    arg_parser.add_argument("--chunk-size", type=int, default=5000)
+    arg_parser.add_argument("--reset", action="store_true", help="drop and recreate every table first")
+    add_connection_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    connection = connect(args.host, args.port, args.user, args.password, args.database)
+    try:
+        create_schema(connection, reset=args.reset)
+        counts = seed(connection, args.members, args.seed, args.max_depth, args.chunk_size)
+        print(f"Seeded {sum(counts.values())} rows")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
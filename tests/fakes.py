@@ -0,0 +1,90 @@
+"""Stand-ins for pymysql connections and cursors, for tests that run without a server."""
+import pymysql
+
+
+class FakeCursor:
+    """Records statements; results come from responses, matched by a substring of the SQL."""
+
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.statements = []
+        self.rows = []
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def execute(self, sql, args=None):
+        self.statements.append((sql, args))
+        self.rows = []
+        for fragment, response in self.responses.items():
+            if fragment in sql:
+                self.rows = list(response(args) if callable(response) else response)
+                break
+        self.rowcount = len(self.rows) or 1
+        return self.rowcount
+
+    def executemany(self, sql, args):
+        args = list(args)
+        self.statements.append((sql, args))
+        self.rowcount = len(args)
+        return self.rowcount
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchmany(self, size=1):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+    def executed(self, fragment):
+        return [args for sql, args in self.statements if fragment in sql]
+
+
+class FakeConnection:
+    """Hands out one shared cursor and counts commits, rollbacks and pings.
+
+    server_status and open are read by ConnectionPool; alive=False makes
+    ping fail the way a dropped connection does.
+    """
+
+    def __init__(self, cursor=None):
+        self.shared_cursor = cursor or FakeCursor()
+        self.commits = 0
+        self.rollbacks = 0
+        self.pings = 0
+        self.server_status = 0
+        self.open = True
+        self.alive = True
+
+    def cursor(self, cursorclass=None):
+        return self.shared_cursor
+
+    def commit(self):
+        self.commits += 1
+        self.server_status = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.server_status = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.alive:
+            raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+    def close(self):
+        self.open = False
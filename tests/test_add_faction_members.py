@@ -0,0 +1,87 @@
+import contextlib
+
+import pymysql
+import pytest
+
+from script import ConnectionPool, IlluminatiDB, _as_id
+
+from fakes import FakeConnection, FakeCursor
+
+
+class RejectingCursor(FakeCursor):
+    """Fails any insert batch that contains one of the rejected member ids."""
+
+    def __init__(self, rejected, responses=None):
+        super().__init__(responses)
+        self.rejected = set(rejected)
+        self.inserted = []
+
+    def executemany(self, sql, args):
+        args = list(args)
+        if "INSERT INTO Faction_Members" in sql:
+            if any(row[0] in self.rejected for row in args):
+                raise pymysql.err.IntegrityError(1452, "foreign key constraint fails")
+            self.inserted.extend(row[0] for row in args)
+        return super().executemany(sql, args)
+
+
+def _db(cursor):
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0))
+    db._hierarchy_tables = False
+    connection = FakeConnection(cursor)
+
+    @contextlib.contextmanager
+    def connect(exclusive=False, read=None):
+        yield connection
+    db._connection = connect
+    return db, connection
+
+
+def _member(member_id, faction_id=1, leader_id=None):
+    return {"Member_Id": member_id, "Fname": "A", "Lname": "B", "Dob": "1990-01-01",
+            "Faction_Id": faction_id, "Leader_Id": leader_id}
+
+
+def test_as_id_accepts_digit_strings_only():
+    assert _as_id("42") == 42
+    assert _as_id(7) == 7
+    for value in (True, "4x", 1.5, None):
+        with pytest.raises(ValueError):
+            _as_id(value)
+
+
+def test_string_ids_from_json_are_validated_like_integers():
+    cursor = RejectingCursor((), {
+        "FROM Factions": [{"Faction_Id": 1}],
+        "FROM Faction_Members WHERE Member_Id IN": lambda args: [{"Member_Id": 5}] if 5 in args else [],
+        "FROM Faction_Members": [{"Member_Id": 5, "Faction_Id": 1}],
+    })
+    db, _ = _db(cursor)
+    result = db.add_faction_members([_member("5"), _member("6", "1", "5"), _member("x")])
+
+    assert result["inserted"] == 1
+    assert cursor.inserted == [6]
+    assert [(error["index"], error["error"]) for error in result["errors"]] == [
+        (0, "Member ID already exists"), (2, "'x' is not an integer id")]
+
+
+def test_rejected_chunk_is_retried_row_by_row():
+    cursor = RejectingCursor({11}, {"FROM Factions": [{"Faction_Id": 1}]})
+    db, connection = _db(cursor)
+    result = db.add_faction_members([_member(10), _member(11), _member(12, leader_id=11), _member(13)])
+
+    assert result["inserted"] == 2
+    assert cursor.inserted == [10, 13]
+    assert [(error["Member_Id"], error["error"]) for error in result["errors"]] == [
+        (11, "(1452, 'foreign key constraint fails')"), (12, "Leader was not inserted")]
+    assert connection.rollbacks == 2
+
+
+def test_zero_leader_id_means_no_leader():
+    cursor = RejectingCursor((), {"FROM Factions": [{"Faction_Id": 1}]})
+    db, _ = _db(cursor)
+    result = db.add_faction_members([_member(20, leader_id="0"), _member(21, leader_id=0)])
+
+    assert result["inserted"] == 2
+    inserted = cursor.executed("INSERT INTO Faction_Members")[0]
+    assert [row[-1] for row in inserted] == [None, None]
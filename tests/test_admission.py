@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from script import AdmissionControl, OverloadError
+
+
+def test_full_queue_rejects_at_once():
+    admission = AdmissionControl(limits={'analytics': (1, 0)})
+    with admission.admit('get_total_members', 'lookup'):
+        with pytest.raises(OverloadError, match="too many analytics"):
+            _in_thread(lambda: admission.admit('analyze_surveillance_targets', 'lookup').__enter__())
+    assert admission.stats()['analytics']['rejected'] == 1
+
+
+def test_waiters_give_up_after_queue_timeout():
+    admission = AdmissionControl(limits={'write': (1, 1)}, queue_timeout=0.01)
+    with admission.admit('update_faction_head', 'write'):
+        with pytest.raises(OverloadError, match="timed out"):
+            _in_thread(lambda: admission.admit('delete_artifact', 'write').__enter__())
+    stats = admission.stats()['write']
+    assert (stats['running'], stats['waiting'], stats['admitted']) == (0, 0, 1)
+
+
+def test_nested_operations_share_the_outer_slot():
+    admission = AdmissionControl(limits={'lookup': (1, 0), 'analytics': None})
+    with admission.admit('get_timeline_events_by_member', 'lookup'):
+        with admission.admit('_count_timeline_events', 'lookup'):
+            pass
+    with admission.admit('get_total_members', 'lookup'):
+        pass
+    assert admission.stats() == {'lookup': {"limit": 1, "queue": 0, "running": 0, "waiting": 0,
+                                            "admitted": 1, "rejected": 0},
+                                 'write': {"limit": 8, "queue": 32, "running": 0, "waiting": 0,
+                                           "admitted": 0, "rejected": 0}}
+
+
+def _in_thread(call):
+    """Run call on another thread, which has no admitted slot of its own, and re-raise its error."""
+    errors = []
+
+    def run():
+        try:
+            call()
+        except Exception as e:
+            errors.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,39 @@
+from datetime import date
+
+from script import AggregateStats, ConnectionPool, IlluminatiDB
+
+
+def test_reference_counts_track_distinct_values():
+    stats = AggregateStats()
+    stats.rebuild([(1, 2), (2, 1)], [("US", "NY", 2)], [], [(date(2020, 1, 1), 1), (date(2021, 1, 1), 1)], [])
+    stats.record_member(2, -1)
+    stats.record_individual("US", "NY", -1)
+    stats.record_surveillance(date(2021, 1, 1), -1)
+
+    assert stats.total_members()["total_factions"] == 1
+    targets = stats.surveillance_targets()
+    assert targets["individuals"] == {"count": 1, "unique_nationalities": 1, "unique_locations": 1}
+    assert targets["summary"]["latest_surveillance"] == date(2020, 1, 1)
+
+
+def test_stale_counters_are_rebuilt_before_answering():
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0), stats_refresh=60.0)
+    db.stats = AggregateStats()
+    db.stats.rebuild([(1, 3)], [], [], [], [])
+    rebuilds = []
+
+    def rebuild_stats():
+        rebuilds.append(True)
+        db.stats.rebuild([(1, 3), (2, 4)], [], [], [], [])
+    db.rebuild_stats = rebuild_stats
+
+    assert db._current_stats().total_members()["total_members"] == 3
+    db.stats.rebuilt_at -= 61
+    assert db._current_stats().total_members()["total_members"] == 7
+    assert len(rebuilds) == 1
+
+    # Another reader already rebuilding: answer from the old counters.
+    db.stats.rebuilt_at -= 61
+    with db._stats_refreshing:
+        db._current_stats()
+    assert len(rebuilds) == 1
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from async_db import AsyncIlluminatiDB
+
+
+class AsyncCursor:
+    """aiomysql-style cursor whose every statement takes a scheduler turn."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def execute(self, sql, args=None):
+        self.pool.statements.append((sql, args))
+        self.rows = []
+        for fragment, rows in self.pool.responses.items():
+            if fragment in sql:
+                self.rows = list(rows)
+                break
+        await asyncio.sleep(0)
+
+    async def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    async def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+
+class AsyncConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        self.pool.active += 1
+        self.pool.peak = max(self.pool.peak, self.pool.active)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.pool.active -= 1
+
+    def cursor(self):
+        return AsyncCursor(self.pool)
+
+    async def begin(self):
+        self.pool.events.append("begin")
+
+    async def commit(self):
+        self.pool.events.append("commit")
+
+    async def rollback(self):
+        self.pool.events.append("rollback")
+
+
+class AsyncPool:
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.statements = []
+        self.events = []
+        self.active = 0
+        self.peak = 0
+
+    def acquire(self):
+        return AsyncConnection(self)
+
+
+def _db(responses=None):
+    db = AsyncIlluminatiDB()
+    db.pool = AsyncPool(responses)
+    return db
+
+
+def test_surveillance_analysis_runs_its_queries_concurrently():
+    db = _db({
+        "FROM Individuals": [{"count": 3}],
+        "FROM Organizations": [{"count": 2}],
+        "FROM Surveillance": [{"total": 5}],
+    })
+    result = asyncio.run(db.analyze_surveillance_targets())
+
+    assert len(db.pool.statements) == 3
+    assert db.pool.peak == 3
+    assert result == {"individuals": {"count": 3}, "organizations": {"count": 2}, "summary": {"total": 5}}
+
+
+def test_failed_member_insert_is_rolled_back():
+    db = _db()
+    member = {"Member_Id": 9, "Fname": "A", "Lname": "B", "Dob": "1990-01-01", "Faction_Id": 4}
+    with pytest.raises(ValueError, match="Invalid Faction ID"):
+        asyncio.run(db.add_faction_member(member))
+    assert db.pool.events == ["begin", "rollback"]
+    assert not any("INSERT" in sql for sql, _ in db.pool.statements)
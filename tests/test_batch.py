@@ -0,0 +1,31 @@
+import json
+
+from batch import _parse, _segments
+
+
+def test_malformed_lines_carry_their_error():
+    lines = [
+        json.dumps({"id": "q1", "op": "get_total_members"}),
+        "",
+        "not json",
+        json.dumps({"op": ["get_total_members"]}),
+        json.dumps({"op": {"name": "delete_artifact"}}),
+        json.dumps({"op": "drop_everything"}),
+        json.dumps({"op": "delete_artifact", "args": 4}),
+    ]
+    requests = list(_parse(lines))
+
+    assert requests[0] == {"id": "q1", "op": "get_total_members"}
+    assert [request["id"] for request in requests] == ["q1", 3, 4, 5, 6, 7]
+    assert all(request["op"] is None for request in requests[1:])
+    assert requests[2]["error"] == "unknown operation ['get_total_members']"
+    assert requests[3]["error"] == "unknown operation {'name': 'delete_artifact'}"
+    assert requests[5]["error"] == "args must be an object or a list"
+
+
+def test_reads_are_grouped_up_to_the_window_and_writes_run_alone():
+    ops = ["get_total_members"] * 3 + ["delete_artifact"] + ["get_total_members"] * 2 + [None]
+    requests = [{"id": index, "op": op} for index, op in enumerate(ops)]
+    segments = [(parallel, [request["id"] for request in group]) for parallel, group in _segments(iter(requests), 2)]
+
+    assert segments == [(True, [0, 1]), (True, [2]), (False, [3]), (True, [4, 5]), (True, [6])]
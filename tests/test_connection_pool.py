@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+from pymysql.constants import SERVER_STATUS
+
+from script import ConnectionPool, _PooledConnection
+
+from fakes import FakeConnection
+
+
+def _pool(**options):
+    pool = ConnectionPool(min_size=0, **options)
+    pool.created = []
+
+    def create():
+        connection = FakeConnection()
+        pool.created.append(connection)
+        return _PooledConnection(connection)
+    pool._create = create
+    return pool
+
+
+def test_nested_checkouts_on_a_thread_share_one_connection():
+    pool = _pool()
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+        with pool.connection(exclusive=True) as exclusive:
+            assert exclusive is not outer
+    assert len(pool.created) == 2 and pool.in_use == 0
+
+    seen = []
+    with pool.connection() as mine:
+        thread = threading.Thread(target=lambda: seen.append(pool.connection().__enter__()))
+        thread.start()
+        thread.join()
+    assert seen[0] is not mine
+
+
+def test_checkin_rolls_back_only_an_open_transaction():
+    pool = _pool()
+    with pool.connection() as connection:
+        pass
+    assert connection.rollbacks == 0
+    with pool.connection() as connection:
+        connection.server_status = SERVER_STATUS.SERVER_STATUS_IN_TRANS
+    assert connection.rollbacks == 1
+    assert pool.size == 1 and pool.in_use == 0
+
+
+def test_dead_and_worn_out_connections_are_replaced():
+    pool = _pool(max_uses=2)
+    with pool.connection() as first:
+        pass
+    first.alive = False
+    with pool.connection() as second:
+        assert second is not first
+    assert first.pings == 1 and not first.open
+
+    with pool.connection() as again:
+        assert again is second
+    assert not second.open and pool.size == 0
+
+
+def test_exhausted_pool_times_out():
+    pool = _pool(max_size=1, checkout_timeout=0.05)
+    with pool.connection():
+        errors = []
+
+        def checkout():
+            try:
+                with pool.connection():
+                    pass
+            except TimeoutError as e:
+                errors.append(e)
+        thread = threading.Thread(target=checkout)
+        thread.start()
+        thread.join()
+    assert len(errors) == 1
+    with pool.connection():
+        pass
+
+
+def test_an_exception_discards_an_exclusive_connection():
+    pool = _pool()
+    with pytest.raises(RuntimeError):
+        with pool.connection(exclusive=True) as connection:
+            raise RuntimeError("stream abandoned")
+    assert not connection.open and pool.size == 0
@@ -0,0 +1,109 @@
+import time
+
+import pymysql
+import pytest
+
+import script
+from script import DeadlineExceeded, QueryMetrics, deadline
+
+from fakes import FakeCursor
+
+
+class FakeResult:
+    def __init__(self, unbuffered_active):
+        self.unbuffered_active = unbuffered_active
+
+
+class FakeRawConnection:
+    """Just enough of a pymysql connection for cursors that never talk to a server."""
+
+    def __init__(self, unbuffered_active=False):
+        self._result = FakeResult(unbuffered_active)
+        self._read_timeout = None
+        self.explain = FakeCursor({"EXPLAIN": [('{"query_block": {}}',)]})
+
+    def cursor(self, cursorclass=None):
+        return self.explain
+
+
+def _layered(cursor):
+    """A cursor wrapped the way IlluminatiDB._connection wraps it under a deadline with metrics."""
+    return script._InstrumentedCursor(script._DeadlineCursor(cursor, {}), QueryMetrics())
+
+
+def test_explain_sees_an_unbuffered_cursor_through_the_deadline_proxy():
+    connection = FakeRawConnection()
+    assert _layered(pymysql.cursors.SSDictCursor(connection))._explain("SELECT 1", None) is None
+    assert not connection.explain.statements
+
+
+def test_explain_skips_a_connection_with_a_result_still_streaming():
+    connection = FakeRawConnection(unbuffered_active=True)
+    assert _layered(pymysql.cursors.Cursor(connection))._explain("SELECT 1", None) is None
+    assert not connection.explain.statements
+
+
+def test_explain_runs_for_a_buffered_cursor():
+    connection = FakeRawConnection()
+    assert _layered(pymysql.cursors.Cursor(connection))._explain("SELECT 1", None) == {"query_block": {}}
+    assert connection.explain.executed("EXPLAIN FORMAT=JSON SELECT 1") == [None]
+
+
+def test_unbuffered_fetches_stop_at_the_deadline():
+    cursor = script._DeadlineCursor(pymysql.cursors.SSCursor(FakeRawConnection()), {})
+    with deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceeded):
+            cursor.fetchone()
+
+
+def test_stream_deadline_applies_at_every_step_and_never_extends_an_outer_one():
+    def rows():
+        while True:
+            yield script._deadline.get()
+
+    expires = time.monotonic() + 60
+    stream = script._deadline_stream(expires, rows())
+    assert next(stream) == expires
+    with deadline(1):
+        assert next(stream) < expires
+    assert script._deadline.get() is None
+    stream.close()
+
+
+def test_iter_operations_take_a_timeout():
+    db = script.IlluminatiDB(pool=script.ConnectionPool(min_size=0), default_timeout=60)
+    seen = []
+
+    def stream(query, args=None, batch_size=1000):
+        seen.append(script._deadline.get())
+        yield {}
+    db._stream = stream
+
+    list(db.iter_timeline_events_by_member("The Architect", timeout=5))
+    list(db.iter_timeline_events_by_member("The Architect"))
+    assert seen[0] - time.monotonic() < 5 < seen[1] - time.monotonic()
+    assert not hasattr(db, '_watchdog')
+
+
+class BoundedCursor(FakeCursor):
+    """A FakeCursor with the connection attributes _DeadlineCursor touches."""
+
+    def __init__(self):
+        super().__init__()
+        self.connection = FakeRawConnection()
+        self.connection.thread_id = lambda: 1
+        self._result = None
+
+
+def test_recursive_reads_get_the_hint_in_their_outer_select():
+    cursor = BoundedCursor()
+    with deadline(5):
+        script._DeadlineCursor(cursor, {}).execute(script.HIERARCHY_QUERY)
+    sql = cursor.statements[0][0]
+    assert sql.count("MAX_EXECUTION_TIME") == 1
+    cte, outer = sql.rsplit("MAX_EXECUTION_TIME", 1)
+    assert cte.startswith("WITH RECURSIVE") and cte.count("(") == cte.count(")")
+    statement = "WITH t AS (SELECT ')' AS x /* ( */) SELECT * FROM t"
+    assert script._outer_select(statement) == statement.index(") SELECT") + 2
+    assert script._outer_select("UPDATE Factions SET Aim = 'SELECT'") is None
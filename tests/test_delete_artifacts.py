@@ -0,0 +1,60 @@
+import contextlib
+
+import pytest
+
+from script import ConnectionPool, IlluminatiDB
+
+from fakes import FakeConnection, FakeCursor
+
+
+def _db(cursor):
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0))
+    connection = FakeConnection(cursor)
+
+    @contextlib.contextmanager
+    def connect(exclusive=False, read=None):
+        yield connection
+    db._connection = connect
+    return db
+
+
+def test_filters_are_sent_as_parameters():
+    cursor = FakeCursor({"SELECT a.Artifact_Id": [{"Artifact_Id": 4}, {"Artifact_Id": 9}]})
+    result = _db(cursor).delete_artifacts(faction_id=3, origin="x' OR '1'='1", chunk_size=5)
+
+    sql, args = cursor.statements[0]
+    assert "a.Faction_Id = %s AND a.Origin = %s" in sql
+    assert "'1'='1" not in sql
+    assert args == [3, "x' OR '1'='1", 5]
+    assert result["deleted"] == 2
+    assert cursor.executed("DELETE FROM Powers") == [[4, 9]]
+
+
+def test_ids_and_filters_are_exclusive():
+    db = _db(FakeCursor())
+    with pytest.raises(ValueError):
+        db.delete_artifacts()
+    with pytest.raises(ValueError):
+        db.delete_artifacts([1], faction_id=3)
+
+
+def test_ids_and_filters_check_existence_the_same_way():
+    found = lambda args: [{"Artifact_Id": artifact_id} for artifact_id in args if artifact_id in (4, 9)]
+    by_ids = FakeCursor({"SELECT a.Artifact_Id": found})
+    result = _db(by_ids).delete_artifacts(["4", 5, "9", 4])
+
+    assert result["deleted"] == 2
+    assert result["not_found"] == [5]
+    assert by_ids.executed("DELETE FROM Powers") == [[4, 9]]
+
+    by_filter = FakeCursor({"SELECT a.Artifact_Id": [{"Artifact_Id": 4}]})
+    _db(by_filter).delete_artifacts(origin="Rome")
+    for cursor in (by_ids, by_filter):
+        assert "JOIN Factions f ON a.Faction_Id = f.Faction_Id" in cursor.statements[0][0]
+
+
+def test_invalid_ids_are_rejected_before_anything_is_deleted():
+    cursor = FakeCursor()
+    with pytest.raises(ValueError):
+        _db(cursor).delete_artifacts([4, "x"])
+    assert cursor.statements == []
@@ -0,0 +1,49 @@
+import contextlib
+from datetime import date, datetime
+
+import pytest
+
+from script import ConnectionPool, IlluminatiDB, _report_periods
+
+from fakes import FakeConnection, FakeCursor
+
+
+def test_periods_are_clipped_to_the_range():
+    assert _report_periods(date(2024, 2, 15), date(2024, 8, 1), 'quarter') == [
+        ("2024-Q1", date(2024, 2, 15), date(2024, 4, 1)),
+        ("2024-Q2", date(2024, 4, 1), date(2024, 7, 1)),
+        ("2024-Q3", date(2024, 7, 1), date(2024, 8, 1)),
+    ]
+    assert [label for label, _, _ in _report_periods(date(2023, 12, 1), date(2024, 2, 10), 'month')] == [
+        "2023-12", "2024-01", "2024-02"]
+
+
+def _db(cursor):
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0))
+    connection = FakeConnection(cursor)
+
+    @contextlib.contextmanager
+    def connect(exclusive=False, read=None):
+        yield connection
+    db._connection = connect
+    return db
+
+
+def test_meetings_are_bucketed_by_period_from_one_scan():
+    meetings = [{"Date": date(2024, 1, 3)}, {"Date": datetime(2024, 1, 31, 23, 0)},
+                {"Date": date(2024, 3, 2)}]
+    cursor = FakeCursor({"FROM Faction_Meetings": meetings, "Leader_Id": [{"Member_Id": 1}]})
+    report = _db(cursor).generate_faction_report("2024-01-01", "2024-04-01")
+
+    assert [(period["period"], len(period["meetings"])) for period in report["periods"]] == [
+        ("2024-01", 2), ("2024-02", 0), ("2024-03", 1)]
+    assert cursor.executed("FROM Faction_Meetings") == [(date(2024, 1, 1), date(2024, 4, 1))]
+    assert report["hierarchy"] == [{"Member_Id": 1}]
+
+
+def test_report_rejects_unknown_granularity_and_empty_ranges():
+    db = _db(FakeCursor())
+    with pytest.raises(ValueError):
+        db.generate_faction_report("2024-01-01", "2024-04-01", granularity="week")
+    with pytest.raises(ValueError):
+        db.generate_faction_report("2024-04-01", "2024-04-01")
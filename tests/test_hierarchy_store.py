@@ -0,0 +1,45 @@
+from script import ConnectionPool, IlluminatiDB
+
+from fakes import FakeCursor
+
+
+def _db(**options):
+    return IlluminatiDB(pool=ConnectionPool(min_size=0), **options)
+
+
+def test_store_is_maintained_when_its_tables_exist():
+    db = _db()
+    cursor = FakeCursor({"information_schema.TABLES": [{"1": 1}]})
+    assert db._maintains_hierarchy(cursor)
+    assert db._maintains_hierarchy(cursor)
+    assert len(cursor.executed("information_schema.TABLES")) == 1
+
+
+def test_store_is_skipped_when_its_tables_are_missing():
+    db = _db()
+    assert not db._maintains_hierarchy(FakeCursor())
+    assert _db(hierarchy_store=True)._maintains_hierarchy(FakeCursor())
+
+
+def test_store_created_elsewhere_is_picked_up_on_the_next_write():
+    db = _db()
+    missing = FakeCursor()
+    assert not db._maintains_hierarchy(missing)
+    assert not db._maintains_hierarchy(missing)
+    assert len(missing.executed("information_schema.TABLES")) == 2
+    assert db._maintains_hierarchy(FakeCursor({"information_schema.TABLES": [{"1": 1}]}))
+
+
+def test_hierarchy_insert_chains_new_members_below_existing_leaders():
+    db = _db(hierarchy_store=True)
+    cursor = FakeCursor({
+        "SELECT Member_Id, Level FROM Member_Hierarchy": [{"Member_Id": 1, "Level": 0}],
+        "FROM Member_Ancestry": [{"Member_Id": 1, "Ancestor_Id": 1, "Distance": 0}],
+    })
+    # 10 reports to existing member 1, 11 to new member 10; 12's leader (99) isn't in the store.
+    db._hierarchy_insert(cursor, [(10, 5, 1), (11, 5, 10), (12, 5, 99)])
+
+    hierarchy, ancestry = [args for sql, args in cursor.statements if "INSERT INTO" in sql]
+    assert hierarchy == [(10, 5, 1, 1), (11, 5, 2, 0)]
+    assert sorted(ancestry) == [(1, 10, 1), (1, 11, 2), (10, 10, 0), (10, 11, 1), (11, 11, 0)]
+    assert cursor.executed("Subordinates = Subordinates + %s") == [[(1, 1)]]
@@ -0,0 +1,51 @@
+import migrations
+from script import _current_operation
+
+from fakes import FakeConnection, FakeCursor
+
+SCAN = '{"query_block": {"table": {"table_name": "Factions", "access_type": "ALL", "rows_examined_per_scan": 7}}}'
+
+
+def _cursor():
+    cursor = FakeCursor({"FROM Factions": [{"Faction_Id": 1}]})
+    explain = FakeCursor({"EXPLAIN": lambda args: [(SCAN,)]})
+    cursor.connection = FakeConnection(explain)
+    plans = []
+    return migrations._ExplainingCursor(cursor, plans), cursor, explain, plans
+
+
+def test_reads_are_explained_then_run():
+    proxy, cursor, explain, plans = _cursor()
+    token = _current_operation.set('get_total_members')
+    try:
+        proxy.execute("SELECT Faction_Id\n  FROM Factions WHERE Faction_Id = %s", (1,))
+    finally:
+        _current_operation.reset(token)
+
+    assert explain.executed("EXPLAIN FORMAT=JSON SELECT") == [(1,)]
+    assert proxy.fetchall() == [{"Faction_Id": 1}]
+    assert plans[0]["operation"] == 'get_total_members'
+    assert plans[0]["statement"] == "SELECT Faction_Id FROM Factions WHERE Faction_Id = %s"
+    assert migrations._plan_issues(plans[0]["plan"]) == ({"full scan of Factions"}, 7)
+
+
+def test_writes_are_only_explained():
+    proxy, cursor, explain, plans = _cursor()
+    proxy.execute("UPDATE Factions SET HeadTitle = %s WHERE Faction_Id = %s", ("X", 1))
+    proxy.executemany("INSERT INTO Factions (Faction_Id) VALUES (%s)", [(2,), (3,)])
+
+    assert [args for _, args in explain.statements] == [("X", 1), (2,)]
+    assert not cursor.statements
+    assert len(plans) == 2
+
+
+def test_other_statements_run_without_a_plan():
+    proxy, cursor, explain, plans = _cursor()
+    proxy.execute("SET FOREIGN_KEY_CHECKS = 0")
+    assert cursor.executed("SET FOREIGN_KEY_CHECKS") and not explain.statements and not plans
+
+
+def test_compare_plans_reports_new_issues_only():
+    baseline = {"operations": {"a": {"issues": ["filesort"]}}}
+    candidate = {"operations": {"a": {"issues": ["filesort", "full scan of Powers"]}, "b": {"issues": ["x"]}}}
+    assert migrations.compare_plans(baseline, candidate) == {"a": ["full scan of Powers"]}
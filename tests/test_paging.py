@@ -0,0 +1,48 @@
+import contextlib
+
+import pytest
+
+from script import ConnectionPool, IlluminatiDB, _decode_cursor, _encode_cursor
+
+from fakes import FakeConnection, FakeCursor
+
+
+def test_token_round_trips_for_the_same_arguments():
+    token = _encode_cursor('page_artifacts_by_power', ['fire', 'substring'], [7, 'Fireball'])
+    assert _decode_cursor('page_artifacts_by_power', ['fire', 'substring'], token, 2) == [7, 'Fireball']
+    assert _decode_cursor('page_artifacts_by_power', ['fire', 'substring'], None, 2) is None
+
+
+def test_token_is_rejected_for_other_arguments_or_operations():
+    token = _encode_cursor('page_factions_by_member_count', [5], [12, 3])
+    with pytest.raises(ValueError, match="different"):
+        _decode_cursor('page_factions_by_member_count', [6], token, 2)
+    with pytest.raises(ValueError, match="not issued"):
+        _decode_cursor('page_timeline_events_by_member', [5], token, 1)
+    with pytest.raises(ValueError, match="Invalid"):
+        _decode_cursor('page_factions_by_member_count', [5], "not a token", 2)
+
+
+@pytest.mark.parametrize("key", [[5], [1, 2, 3], 5, None, [[5], [1]], [{"a": 1}, 2]])
+def test_token_with_a_malformed_key_is_invalid(key):
+    token = _encode_cursor('page_factions_by_member_count', [5], key)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        _decode_cursor('page_factions_by_member_count', [5], token, 2)
+
+
+def test_page_issues_a_token_bound_to_its_arguments():
+    cursor = FakeCursor({"ORDER BY ste.Event_Id": [{"Event_Id": 1}, {"Event_Id": 2}, {"Event_Id": 3}]})
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0))
+    connection = FakeConnection(cursor)
+
+    @contextlib.contextmanager
+    def connect(exclusive=False, read=None):
+        yield connection
+    db._connection = connect
+
+    page = db.page_timeline_events_by_member("The Architect", limit=2)
+    assert [row["Event_Id"] for row in page["rows"]] == [1, 2]
+    db.page_timeline_events_by_member("The Architect", limit=2, cursor=page["next_cursor"])
+    assert cursor.statements[-1][1] == ["The Architect", 2, 3]
+    with pytest.raises(ValueError):
+        db.page_timeline_events_by_member("The Oracle", limit=2, cursor=page["next_cursor"])
@@ -0,0 +1,62 @@
+import pytest
+
+from script import PowerIndex, _limit_artifacts, _parse_search_terms, _power_search_query, _rank_power_matches
+
+
+@pytest.fixture
+def index():
+    index = PowerIndex()
+    index.rebuild([(1, 'Mind Control'), (1, 'Time Manipulation'), (2, 'Storm Calling'), (3, 'Mind Reading')])
+    return index
+
+
+def test_index_matches_substrings_case_insensitively(index):
+    assert sorted(index.search(['mind'])) == [(1, 'Mind Control'), (3, 'Mind Reading')]
+    assert index.search(['D CON']) == [(1, 'Mind Control')]
+    assert index.search(['ll']) == [(2, 'Storm Calling')]
+
+
+def test_index_all_and_any(index):
+    assert index.search(['mind', 'read'], 'all') == [(3, 'Mind Reading')]
+    assert sorted(index.search(['storm', 'time'], 'any')) == [(1, 'Time Manipulation'), (2, 'Storm Calling')]
+    assert len(index.search([])) == 4
+
+
+def test_index_remove_artifact(index):
+    index.remove_artifact(1)
+    assert index.search(['mind']) == [(3, 'Mind Reading')]
+    assert len(index) == 2
+    index.add(1, 'Mind Control')
+    assert sorted(index.search(['control'])) == [(1, 'Mind Control')]
+
+
+def test_substring_search_keeps_the_text_whole():
+    assert _parse_search_terms('Mind Control') == ['Mind Control']
+    assert _parse_search_terms('"Mind Control" time', 'all') == ['Mind Control', 'time']
+    query, args = _power_search_query(_parse_search_terms('Mind Control'), 'substring')
+    assert args == ['%Mind Control%']
+    assert 'Relevance' not in query
+
+
+def test_term_search_selects_relevance():
+    query, args = _power_search_query(['Mind', 'ctrl'], 'any')
+    assert 'as Relevance' in query and 'LIKE %s OR p.Power LIKE %s' in query
+    assert args == ['mind', 'ctrl', '%Mind%', '%ctrl%']
+
+
+def test_limit_counts_artifacts_not_rows():
+    rows = [{'Artifact_Id': 1, 'Power': 'a'}, {'Artifact_Id': 1, 'Power': 'b'}, {'Artifact_Id': 2, 'Power': 'c'}]
+    assert _limit_artifacts(rows, 1) == rows[:2]
+    assert _limit_artifacts(rows, None) == rows
+
+
+def test_ranking_groups_powers_under_the_best_artifact():
+    rows = [
+        {'Artifact_Id': 1, 'Power': 'Mind Control', 'Relevance': 0.33},
+        {'Artifact_Id': 2, 'Power': 'Mind', 'Relevance': 1.0},
+        {'Artifact_Id': 1, 'Power': 'Mind Mind', 'Relevance': 0.89},
+    ]
+    ranked = _rank_power_matches(rows, limit=1)
+    assert [(row['Artifact_Id'], row['Power']) for row in ranked] == [(2, 'Mind')]
+    ranked = _rank_power_matches(rows)
+    assert [row['Power'] for row in ranked] == ['Mind', 'Mind Mind', 'Mind Control']
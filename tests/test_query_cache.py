@@ -0,0 +1,66 @@
+import contextlib
+import time
+
+from script import ConnectionPool, IlluminatiDB, QueryCache
+
+from fakes import FakeConnection, FakeCursor
+
+
+def test_cache_invalidates_by_table_and_evicts_lru():
+    cache = QueryCache(max_entries=2)
+    cache.put(('a',), 1, ['Factions'], cache.generation)
+    cache.put(('b',), 2, ['Powers'], cache.generation)
+    assert cache.get(('a',)) == (True, 1)
+    cache.put(('c',), 3, ['Powers'], cache.generation)
+    assert cache.get(('b',)) == (False, None)
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate(['Powers'])
+    assert cache.get(('c',)) == (False, None)
+    assert cache.get(('a',)) == (True, 1)
+
+
+def test_cache_drops_results_computed_across_a_write():
+    cache = QueryCache()
+    generation = cache.generation
+    cache.invalidate(['Factions'])
+    cache.put(('a',), 1, ['Powers'], generation)
+    assert cache.get(('a',)) == (False, None)
+
+
+def test_cache_entries_expire():
+    cache = QueryCache(ttl=0.01)
+    cache.put(('a',), 1, [], cache.generation)
+    time.sleep(0.02)
+    assert cache.get(('a',)) == (False, None)
+
+
+def _db(cursor, cache):
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0), cache=cache)
+    connection = FakeConnection(cursor)
+
+    @contextlib.contextmanager
+    def connect(exclusive=False, read=None):
+        yield connection
+    db._connection = connect
+    return db
+
+
+def test_a_write_drops_the_cached_reads_of_its_tables():
+    cursor = FakeCursor({
+        "JOIN Factions f ON a.Faction_Id": [{"Artifact_Id": 4, "Faction_Id": 1}],
+        "p.Power LIKE": [{"Artifact_Id": 4, "Power": "Fireball"}],
+        "HAVING Member_Count": [{"Faction_Id": 1, "Member_Count": 3}],
+    })
+    db = _db(cursor, QueryCache())
+
+    assert db.search_artifacts_by_power("fire") == db.search_artifacts_by_power("fire")
+    db.get_factions_by_member_count(1)
+    assert len(cursor.executed("p.Power LIKE")) == 1
+
+    db.delete_artifact(4)
+    db.search_artifacts_by_power("fire")
+    db.get_factions_by_member_count(1)
+
+    assert len(cursor.executed("p.Power LIKE")) == 2
+    assert len(cursor.executed("HAVING Member_Count")) == 1
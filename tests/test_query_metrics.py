@@ -0,0 +1,53 @@
+import pytest
+
+from script import ConnectionPool, IlluminatiDB, QueryMetrics, _Histogram, _PooledConnection
+
+from fakes import FakeConnection, FakeCursor
+
+
+def _db(cursor, metrics):
+    pool = ConnectionPool(min_size=0)
+    pool._create = lambda: _PooledConnection(FakeConnection(cursor))
+    return IlluminatiDB(pool=pool, metrics=metrics)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = _Histogram()
+    for seconds in (0.0005, 0.003, 0.005, 20.0):
+        histogram.observe(seconds)
+
+    buckets = dict(histogram.cumulative())
+    assert (buckets["0.001"], buckets["0.0025"], buckets["0.005"], buckets["10.0"], buckets["+Inf"]) == (1, 1, 3, 3, 4)
+    assert histogram.count == 4 and histogram.total == pytest.approx(20.0085)
+
+
+def test_operations_and_their_statements_are_recorded():
+    cursor = FakeCursor({"HAVING Member_Count": [{"Faction_Id": 1}, {"Faction_Id": 2}]})
+    metrics = QueryMetrics(slow_threshold=None)
+    db = _db(cursor, metrics)
+    db.get_factions_by_member_count(3)
+    with pytest.raises(ValueError):
+        db.search_artifacts_by_power("fire", match="fuzzy")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["operations"]["get_factions_by_member_count"]["calls"] == 1
+    assert snapshot["operations"]["search_artifacts_by_power"]["errors"] == 1
+    [statement] = snapshot["statements"].values()
+    assert statement["operations"] == ["get_factions_by_member_count"]
+    assert (statement["calls"], statement["rows_returned"], statement["rows_affected"]) == (1, 2, 0)
+
+
+def test_prometheus_text_has_a_series_per_operation_and_statement():
+    cursor = FakeCursor({"HAVING Member_Count": [{"Faction_Id": 1}]})
+    metrics = QueryMetrics(slow_threshold=None)
+    _db(cursor, metrics).get_factions_by_member_count(3)
+    key = next(iter(metrics.snapshot()["statements"]))
+
+    lines = metrics.prometheus().splitlines()
+    assert "# TYPE illuminati_operation_seconds histogram" in lines
+    assert 'illuminati_operation_seconds_count{operation="get_factions_by_member_count"} 1' in lines
+    assert 'illuminati_operation_seconds_bucket{operation="get_factions_by_member_count",le="+Inf"} 1' in lines
+    assert f'illuminati_statement_rows_returned_total{{statement="{key}"}} 1' in lines
+
+    metrics.reset()
+    assert metrics.snapshot() == {"operations": {}, "statements": {}, "slow_queries": []}
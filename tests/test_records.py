@@ -0,0 +1,40 @@
+import pymysql
+
+import script
+from script import Record, record_type
+
+
+def test_record_reads_like_a_dict_and_by_attribute():
+    Row = record_type(('Faction_Id', 'Member Count', 'class', 'get'))
+    row = Row((3, 12, 'x', 'y'))
+
+    assert isinstance(row, Record)
+    assert row['Faction_Id'] == row.Faction_Id == 3
+    assert row.Member_Count == 12
+    assert row.f_class == 'x' and row.f_get == 'y'
+    assert dict(row) == {'Faction_Id': 3, 'Member Count': 12, 'class': 'x', 'get': 'y'}
+    assert record_type(('Faction_Id', 'Member Count', 'class', 'get')) is Row
+
+
+def test_record_keeps_unknown_keys_aside():
+    row = record_type(('Aim',))(('Order',))
+    assert row._extra is None
+    row['Aim'] = 'Chaos'
+    assert row._extra is None
+    row['Note'] = 1
+    assert dict(row) == {'Aim': 'Chaos', 'Note': 1}
+    assert len(row) == 2
+
+
+def test_compact_connections_swap_dict_cursors_for_record_cursors():
+    requested = []
+
+    class Connection:
+        def cursor(self, cursor=None):
+            requested.append(cursor)
+
+    connection = script._CompactConnection(Connection())
+    connection.cursor()
+    connection.cursor(pymysql.cursors.SSDictCursor)
+    connection.cursor(pymysql.cursors.Cursor)
+    assert requested == [script.RecordCursor, script.SSRecordCursor, pymysql.cursors.Cursor]
@@ -0,0 +1,28 @@
+import time
+
+from script import ConnectionPool, IlluminatiDB, ReplicaSet
+
+
+def _replicas(lags):
+    replicas = ReplicaSet([ConnectionPool(min_size=0) for _ in lags], lag_check_interval=60, max_lag=10)
+    measured = dict(zip(replicas.pools, lags))
+    replicas._measure_lag = lambda pool: measured[pool]
+    return replicas
+
+
+def test_choose_skips_lagging_and_unknown_replicas():
+    replicas = _replicas([None, 30.0, 0.0])
+    assert replicas.choose() is replicas.pools[2]
+
+
+def test_reads_go_to_the_primary_after_a_write():
+    replicas = _replicas([0.0])
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0), replicas=replicas, read_your_writes=5)
+    assert db._read_pool() is replicas.pools[0]
+
+    db._wrote()
+    # The replica reports no lag, but that does not prove it has the write.
+    assert db._read_pool() is db.pool
+
+    db._local.written_at = time.monotonic() - 6
+    assert db._read_pool() is replicas.pools[0]
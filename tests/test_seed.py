@@ -0,0 +1,36 @@
+import random
+
+import seed
+
+from fakes import FakeConnection
+
+
+def _rows(members, random_seed):
+    connection = FakeConnection()
+    counts = seed.seed(connection, members, random_seed=random_seed, chunk_size=50, progress=None)
+    inserted = {}
+    for sql, args in connection.shared_cursor.statements:
+        if sql.startswith("INSERT IGNORE INTO"):
+            inserted.setdefault(sql.split()[3], []).extend(args)
+    return counts, inserted
+
+
+def test_the_same_seed_produces_the_same_rows():
+    counts, rows = _rows(200, 7)
+    assert _rows(200, 7) == (counts, rows)
+    assert _rows(200, 8)[1] != rows
+    assert list(rows) == seed.TABLES
+    assert counts['Faction_Members'] == 200
+
+
+def test_leaders_are_earlier_members_of_the_same_faction_within_max_depth():
+    members = list(seed._members(random.Random(1), 500, 5, max_depth=4))
+    faction = {member[0]: member[5] for member in members}
+    depth = {}
+    for member_id, *_, faction_id, leader_id in members:
+        if leader_id is None:
+            depth[member_id] = 0
+            continue
+        assert leader_id < member_id and faction[leader_id] == faction_id
+        depth[member_id] = depth[leader_id] + 1
+    assert max(depth.values()) == 3
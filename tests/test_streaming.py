@@ -0,0 +1,34 @@
+from script import ConnectionPool, IlluminatiDB, _PooledConnection
+
+from fakes import FakeConnection, FakeCursor
+
+
+def _db(rows):
+    pool = ConnectionPool(min_size=0)
+    pool.created = []
+
+    def create():
+        connection = FakeConnection(FakeCursor({"HAVING Member_Count": rows}))
+        pool.created.append(connection)
+        return _PooledConnection(connection)
+    pool._create = create
+    return IlluminatiDB(pool=pool), pool
+
+
+def test_a_finished_stream_returns_its_connection_to_the_pool():
+    db, pool = _db([{"Faction_Id": n} for n in range(5)])
+    assert [row["Faction_Id"] for row in db.iter_factions_by_member_count(0, batch_size=2)] == [0, 1, 2, 3, 4]
+    assert pool.in_use == 0 and pool.size == 1
+    assert pool.created[0].open
+
+
+def test_closing_a_stream_early_releases_and_closes_its_connection():
+    db, pool = _db([{"Faction_Id": n} for n in range(5)])
+    rows = db.iter_factions_by_member_count(0, batch_size=2)
+    assert next(rows) == {"Faction_Id": 0}
+    assert pool.in_use == 1
+
+    rows.close()
+    # Unread rows may still be in flight, so the connection is not reused.
+    assert pool.in_use == 0 and pool.size == 0
+    assert not pool.created[0].open
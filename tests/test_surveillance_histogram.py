@@ -0,0 +1,102 @@
+import contextlib
+from datetime import date
+
+from script import ConnectionPool, IlluminatiDB, SurveillanceHistogram
+
+from fakes import FakeConnection, FakeCursor
+
+
+def test_distribution_combines_month_and_day_buckets():
+    histogram = SurveillanceHistogram()
+    histogram.add_operations(date(2020, 1, 20), "US", "NY", None, 2)
+    histogram.add_operations(date(2020, 2, 10), "UK", "London", "Cult")
+    histogram.add_operations(date(2020, 3, 5), "US", "LA", None)
+    histogram.add_surveys(date(2020, 2, 10), "The Eye", 3)
+
+    result = histogram.distribution(date(2020, 1, 25), date(2020, 3, 6), top=1)
+    assert result["operations"] == 2
+    assert result["by_month"] == [{"month": "2020-02", "operations": 1}, {"month": "2020-03", "operations": 1}]
+    assert result["by_nationality"] == [{"Nationality": "UK", "operations": 1}]
+    assert result["surveillor_workload"] == [{"Title": "The Eye", "operations": 3}]
+    assert histogram.distribution()["operations"] == 4
+
+
+def test_merge_adds_buckets_counts_and_watermark():
+    histogram = SurveillanceHistogram()
+    histogram.add_operations(date(2020, 1, 1), "US", "NY", None)
+    loaded = SurveillanceHistogram()
+    loaded.add_operations(date(2020, 1, 2), "US", "LA", None)
+    loaded.add_surveys(date(2020, 1, 2), "The Eye")
+    loaded.watermark = 9
+
+    histogram.merge(loaded)
+    assert (histogram.watermark, histogram.operations, histogram.assignments) == (9, 2, 1)
+    assert histogram.distribution(date(2020, 1, 1), date(2020, 2, 1))["by_nationality"] == [
+        {"Nationality": "US", "operations": 2}]
+
+
+def _db(watermark_row):
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0), histogram_rebuild=None)
+    db.surveillance_histogram = SurveillanceHistogram()
+    connection = FakeConnection(FakeCursor({"as High": lambda args: [dict(watermark_row)]}))
+
+    @contextlib.contextmanager
+    def connect(exclusive=False, read=None):
+        yield connection
+    db._connection = connect
+    loads = []
+
+    def load(histogram, condition, args):
+        loads.append((condition, args))
+        histogram.add_operations(date(2020, 1, 1), "US", "NY", None, args[-1])
+    db._load_surveillance = load
+    return db, loads
+
+
+def test_refresh_merges_only_rows_above_the_watermark():
+    db, loads = _db({"High": 5, "Operations": 0, "Assignments": 0})
+    original = db.surveillance_histogram
+    assert db.refresh_surveillance_histogram() == 5
+    assert loads == [("s.Surveillance_Id > %s AND s.Surveillance_Id <= %s", [0, 5])]
+    assert db.surveillance_histogram is original and original.operations == 5
+
+
+def test_refresh_rebuilds_when_rows_appear_below_the_watermark():
+    db, loads = _db({"High": 5, "Operations": 4, "Assignments": 0})
+    original = db.surveillance_histogram
+    original.watermark, original.operations = 5, 3
+
+    assert db.refresh_surveillance_histogram() == 5
+    assert loads == [("s.Surveillance_Id <= %s", [5])]
+    assert db.surveillance_histogram is not original
+
+
+def test_refresh_is_skipped_while_another_caller_refreshes():
+    db, loads = _db({"High": 5, "Operations": 0, "Assignments": 0})
+    with db._histogram_refreshing:
+        assert db.refresh_surveillance_histogram() == 0
+    assert not loads
+
+
+def test_operations_and_surveys_are_loaded_from_one_snapshot():
+    cursor = FakeCursor({
+        "as Assignments": [(date(2020, 1, 1), "The Eye", 2)],
+        "FROM Surveillance": [(date(2020, 1, 1), "US", "NY", None, 3)],
+    })
+    connection = FakeConnection(cursor)
+    checkouts = []
+
+    @contextlib.contextmanager
+    def connect(exclusive=False, read=None):
+        checkouts.append(exclusive)
+        yield connection
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0))
+    db._connection = connect
+
+    histogram = SurveillanceHistogram()
+    db._load_surveillance(histogram, "s.Surveillance_Id <= %s", [5])
+    assert checkouts == [True]
+    assert [sql.split()[0] for sql, _ in cursor.statements] == ["START", "SELECT", "SELECT"]
+    assert "CONSISTENT SNAPSHOT" in cursor.statements[0][0]
+    assert connection.commits == 1
+    assert (histogram.operations, histogram.assignments) == (3, 2)
@@ -0,0 +1,71 @@
+import contextlib
+import gzip
+from datetime import timedelta
+
+import pymysql
+
+import transfer
+from script import ConnectionPool, IlluminatiDB, SurveillanceHistogram
+
+from fakes import FakeConnection, FakeCursor
+
+
+class LockDeniedCursor(FakeCursor):
+    def execute(self, sql, args=None):
+        if sql.startswith("FLUSH TABLES"):
+            raise pymysql.err.OperationalError(1227, "Access denied; you need the RELOAD privilege")
+        return super().execute(sql, args)
+
+
+def test_fields_round_trip_through_the_text_format(tmp_path):
+    row = [1, "tab\there\\", None, b"\x00\xff\t", timedelta(hours=-1, seconds=1)]
+    with gzip.open(transfer._table_path(str(tmp_path), "T"), "wt", encoding="utf-8", newline="\n") as output:
+        output.write(transfer._format_row(row))
+
+    assert transfer._format_field(b"\x00\xff\t") == "00ff09"
+    parsed = next(transfer._read_rows(str(tmp_path), "T", [3]))
+    assert parsed == ["1", "tab\there\\", None, b"\x00\xff\t", "-00:59:59"]
+
+
+def test_snapshots_start_under_a_global_read_lock():
+    connections = [FakeConnection(FakeCursor()) for _ in range(3)]
+    assert transfer._start_snapshots(connections)
+
+    coordinator = [sql for sql, _ in connections[0].shared_cursor.statements]
+    assert coordinator[0] == "FLUSH TABLES WITH READ LOCK"
+    assert coordinator[-1] == "UNLOCK TABLES"
+    for connection in connections:
+        assert connection.shared_cursor.executed("WITH CONSISTENT SNAPSHOT")
+
+
+def test_snapshots_without_the_lock_are_not_consistent():
+    connections = [FakeConnection(LockDeniedCursor()), FakeConnection(FakeCursor())]
+    assert not transfer._start_snapshots(connections)
+    assert not connections[0].shared_cursor.executed("UNLOCK TABLES")
+    assert transfer._start_snapshots([FakeConnection(FakeCursor())])
+
+
+def test_load_data_unhexes_binary_columns(tmp_path):
+    with gzip.open(transfer._table_path(str(tmp_path), "T"), "wt") as output:
+        output.write("1\t00ff\n")
+    cursor = FakeCursor()
+    transfer._import_load_data(cursor, FakeConnection(cursor), str(tmp_path), "T", ["Id", "Data"], ["Data"])
+    assert cursor.statements[0][0].endswith("(Id, @Data) SET Data = UNHEX(@Data)")
+
+
+def test_import_rebuilds_the_derived_stores():
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0))
+    connection = FakeConnection(FakeCursor({"information_schema.TABLES": [{"1": 1}]}))
+
+    @contextlib.contextmanager
+    def connect(exclusive=False, read=None):
+        yield connection
+    db._connection = connect
+    calls = []
+    db.create_hierarchy_store = lambda: calls.append("hierarchy")
+    db.refresh_surveillance_histogram = lambda: calls.append("histogram")
+    old = db.surveillance_histogram = SurveillanceHistogram()
+
+    assert transfer._rebuild_derived(db, None) == ["hierarchy_store", "surveillance_histogram"]
+    assert calls == ["hierarchy", "histogram"]
+    assert db.surveillance_histogram is not old
@@ -0,0 +1,65 @@
+import contextlib
+
+import pytest
+
+from script import ConnectionPool, IlluminatiDB, TransactionError, UnitOfWork
+
+from fakes import FakeConnection, FakeCursor
+
+
+def _db(cursor):
+    db = IlluminatiDB(pool=ConnectionPool(min_size=0))
+    db._hierarchy_tables = False
+    connection = FakeConnection(cursor)
+
+    @contextlib.contextmanager
+    def connect(exclusive=False, read=None):
+        yield connection
+    db._connection = connect
+    return db, connection
+
+
+def _existing(column, values):
+    """A response listing the args found in values, compared the way the collation does."""
+    return lambda args: [{column: value} for value in args
+                         if (value.casefold() if isinstance(value, str) else value) in values]
+
+
+def test_queue_rejects_operations_it_cannot_batch():
+    unit = UnitOfWork()
+    unit.queue('delete_artifact', ['Powers'], {'artifact_id': 1})
+    with pytest.raises(RuntimeError):
+        unit.queue('add_faction_members', ['Faction_Members'], {})
+    assert len(unit) == 1 and unit.tables == {'Powers'}
+
+
+def test_later_changes_to_a_row_win_and_nested_blocks_join():
+    cursor = FakeCursor({"FROM Key_Illuminati_Members": _existing('Title', {'the architect', 'the oracle'}),
+                         "FROM Factions": _existing('Faction_Id', {3})})
+    db, connection = _db(cursor)
+    with db.transaction() as unit:
+        assert db.update_illuminati_name('The Architect', 'Adam') is None
+        with db.transaction() as inner:
+            assert inner is unit
+            db.update_faction_head(3, 'The Oracle')
+        db.update_illuminati_name('The Architect', 'Eve')
+
+    assert unit.applied == 3
+    assert connection.commits == 1
+    assert cursor.executed("UPDATE Key_Illuminati_Members") == [['The Architect', 'Eve']]
+    assert cursor.executed("UPDATE Factions") == [[3, 'The Oracle']]
+
+
+def test_failures_are_reported_in_call_order_and_nothing_is_written():
+    cursor = FakeCursor({"FROM Key_Illuminati_Members": _existing('Title', {'the architect'})})
+    db, connection = _db(cursor)
+    with pytest.raises(TransactionError) as raised:
+        with db.transaction():
+            db.update_faction_head(9, 'The Architect')
+            db.update_illuminati_name('Nobody', 'X')
+            db.update_illuminati_name('The Architect', 'Adam')
+
+    assert [(failure["index"], failure["error"]) for failure in raised.value.failures] == [
+        (0, "Faction not found"), (1, "Illuminati member not found")]
+    assert connection.commits == 0 and connection.rollbacks == 1
+    assert not cursor.executed("UPDATE")
@@ -0,0 +1,427 @@
+"""Bulk export and import of the Illuminati schema.
+
+    python transfer.py export dump/ --parallel 4
+    python transfer.py import dump/ --truncate --method load-data
+    python transfer.py verify dump/
+
+A dump is a directory with one gzip file per table plus manifest.json.
+Each file is in MySQL's default LOAD DATA text format: tab-separated
+fields, one row per line, backslash escapes and \\N for NULL; binary
+columns are written as hex. Rows are written in primary key order, and
+the manifest records every table's columns, binary columns, row count and
+a SHA-256 of its text, so a reloaded database can be checked against the
+dump.
+
+Every table is read inside a transaction started WITH CONSISTENT
+SNAPSHOT. The worker connections open their snapshots while a global
+read lock is held, so the whole dump reflects one moment; without the
+RELOAD privilege the snapshots are opened back to back instead, and the
+manifest records "consistent": false (quiesce writers for an exact dump).
+"""
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pymysql
+
+import seed
+from script import HIERARCHY_STORE_EXISTS_QUERY, IlluminatiDB, SurveillanceHistogram
+
+MANIFEST = "manifest.json"
+
+_ESCAPES = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0', '\x1a': '\\Z'}
+_ESCAPE_RE = re.compile(r'[\\\t\n\r\0\x1a]')
+_UNESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+_UNESCAPE_RE = re.compile(r'\\(.)', re.S)
+
+_BINARY_TYPES = ('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob', 'bit')
+
+
+def _format_field(value) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return _ESCAPE_RE.sub(lambda match: _ESCAPES[match.group()], value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, timedelta):
+        # TIME columns come back as timedelta; write them as [-]HH:MM:SS[.ffffff].
+        micros = value.days * 86_400_000_000 + value.seconds * 1_000_000 + value.microseconds
+        sign = '-' if micros < 0 else ''
+        seconds, micros = divmod(abs(micros), 1_000_000)
+        text = f"{sign}{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        return text + (f".{micros:06d}" if micros else "")
+    return str(value)
+
+
+def _parse_field(text: str) -> Optional[str]:
+    if text == '\\N':
+        return None
+    return _UNESCAPE_RE.sub(lambda match: _UNESCAPES.get(match.group(1), match.group(1)), text)
+
+
+def _format_row(row: Iterable) -> str:
+    return '\t'.join(_format_field(value) for value in row) + '\n'
+
+
+def _table_path(directory: str, table: str) -> str:
+    return os.path.join(directory, f"{table}.tsv.gz")
+
+
+def _primary_key(cursor, table: str, columns: List[str]) -> List[str]:
+    cursor.execute(f"SHOW KEYS FROM {table} WHERE Key_name = 'PRIMARY'")
+    keys = sorted(cursor.fetchall(), key=lambda key: key[3])
+    return [key[4] for key in keys] or columns
+
+
+def _binary_columns(cursor, table: str) -> List[str]:
+    cursor.execute("""
+    SELECT COLUMN_NAME
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND DATA_TYPE IN ({})
+    ORDER BY ORDINAL_POSITION
+    """.format(', '.join(['%s'] * len(_BINARY_TYPES))), (table,) + _BINARY_TYPES)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _ordered_rows(connection, table: str, chunk_size: int):
+    """Yield the column names and binary columns, then every row of table in primary key order.
+
+    Rows come from a server-side cursor, so connection must not be shared
+    until the generator is exhausted.
+    """
+    with connection.cursor(pymysql.cursors.Cursor) as cursor:
+        cursor.execute(f"SELECT * FROM {table} LIMIT 0")
+        columns = [column[0] for column in cursor.description]
+        order = _primary_key(cursor, table, columns)
+        binary = _binary_columns(cursor, table)
+    yield columns, binary
+    cursor = connection.cursor(pymysql.cursors.SSCursor)
+    cursor.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {', '.join(order)}")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield from rows
+    cursor.close()
+
+
+def _export_table(connection, directory: str, table: str, chunk_size: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    digest = hashlib.sha256()
+    rows = _ordered_rows(connection, table, chunk_size)
+    columns, binary = next(rows)
+    count = 0
+    with gzip.open(_table_path(directory, table), 'wt', encoding='utf-8', newline='\n', compresslevel=6) as output:
+        for row in rows:
+            line = _format_row(row)
+            digest.update(line.encode('utf-8'))
+            output.write(line)
+            count += 1
+    elapsed = time.perf_counter() - started
+    return {"columns": columns, "binary": binary, "rows": count, "sha256": digest.hexdigest(),
+            "seconds": round(elapsed, 3)}
+
+
+def _report(progress: Optional[Callable[[str], None]], action: str, table: str, result: Dict[str, Any]):
+    if progress:
+        rate = result["rows"] / result["seconds"] if result["seconds"] else 0
+        progress(f"{action} {table}: {result['rows']} rows in {result['seconds']:.1f}s ({rate:,.0f} rows/s)")
+
+
+def _start_snapshots(connections: List) -> bool:
+    """Open a consistent snapshot on every connection; True if they all show the same moment.
+
+    FLUSH TABLES WITH READ LOCK holds off writers while the snapshots
+    start. It needs the RELOAD privilege; without it the snapshots are
+    started back to back, which is exact only when nothing is writing.
+    """
+    coordinator = connections[0]
+    locked = False
+    if len(connections) > 1:
+        try:
+            with coordinator.cursor() as cursor:
+                cursor.execute("FLUSH TABLES WITH READ LOCK")
+            locked = True
+        except (pymysql.err.OperationalError, pymysql.err.InternalError):
+            pass
+    try:
+        for connection in connections:
+            with connection.cursor() as cursor:
+                cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+    finally:
+        if locked:
+            with coordinator.cursor() as cursor:
+                cursor.execute("UNLOCK TABLES")
+    return locked or len(connections) == 1
+
+
+def export_tables(db: IlluminatiDB, directory: str, tables: Iterable[str] = seed.TABLES, parallel: int = 4,
+                  chunk_size: int = 10_000, progress: Optional[Callable[[str], None]] = print) -> Dict[str, Any]:
+    """Dump tables into directory from one snapshot, parallel tables at a time. Returns the manifest.
+
+    Each worker holds a pool connection for the whole export, so the pool
+    needs at least parallel connections to spare.
+    """
+    os.makedirs(directory, exist_ok=True)
+    tables = list(tables)
+    started = time.perf_counter()
+    pending = queue.Queue()
+    for table in tables:
+        pending.put(table)
+    results, errors = {}, []
+
+    def work(connection):
+        while not errors:
+            try:
+                table = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[table] = _export_table(connection, directory, table, chunk_size)
+            except Exception as e:
+                errors.append(e)
+                return
+            _report(progress, "Exported", table, results[table])
+
+    with contextlib.ExitStack() as stack:
+        connections = [stack.enter_context(db._connection(exclusive=True))
+                       for _ in range(max(1, min(parallel, len(tables))))]
+        consistent = _start_snapshots(connections)
+        workers = [threading.Thread(target=work, args=(connection,)) for connection in connections]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if errors:
+            raise errors[0]
+        for connection in connections:
+            connection.commit()
+
+    manifest = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "seconds": round(time.perf_counter() - started, 3),
+        "consistent": consistent,
+        "tables": {table: results[table] for table in tables}
+    }
+    with open(os.path.join(directory, MANIFEST), "w") as output:
+        json.dump(manifest, output, indent=2)
+    return manifest
+
+
+def _read_manifest(directory: str) -> Dict[str, Any]:
+    with open(os.path.join(directory, MANIFEST)) as manifest_file:
+        return json.load(manifest_file)
+
+
+def _load_order(tables: Iterable[str]) -> List[str]:
+    """Tables in foreign-key dependency order; tables seed.py doesn't know go last."""
+    tables = list(tables)
+    return [table for table in seed.TABLES if table in tables] + [table for table in tables
+                                                                  if table not in seed.TABLES]
+
+
+def _read_rows(directory: str, table: str, binary: Iterable[int] = ()):
+    """Yield the parsed rows of a table file, decoding the hex of the binary column positions."""
+    binary = list(binary)
+    with gzip.open(_table_path(directory, table), 'rt', encoding='utf-8', newline='\n') as source:
+        for line in source:
+            row = [_parse_field(field) for field in line[:-1].split('\t')]
+            for position in binary:
+                if row[position] is not None:
+                    row[position] = bytes.fromhex(row[position])
+            yield row
+
+
+def _import_inserts(cursor, connection, directory: str, table: str, columns: List[str], binary: List[str],
+                    chunk_size: int) -> int:
+    # pymysql sends executemany INSERTs as multi-row statements.
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    count = 0
+    batch = []
+    for row in _read_rows(directory, table, [columns.index(column) for column in binary]):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            count += cursor.executemany(query, batch)
+            connection.commit()
+            batch = []
+    if batch:
+        count += cursor.executemany(query, batch)
+        connection.commit()
+    return count
+
+
+def _import_load_data(cursor, connection, directory: str, table: str, columns: List[str],
+                      binary: List[str]) -> int:
+    # LOAD DATA reads a plain file, so the table is decompressed to a temporary one first.
+    with tempfile.NamedTemporaryFile(suffix=".tsv", delete=False) as plain:
+        with gzip.open(_table_path(directory, table), 'rb') as source:
+            shutil.copyfileobj(source, plain)
+    # Binary columns are read into variables and unhexed.
+    targets = ', '.join(f"@{column}" if column in binary else column for column in columns)
+    assignments = ''.join(f"{' SET' if index == 0 else ','} {column} = UNHEX(@{column})"
+                          for index, column in enumerate(binary))
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 ({targets}){assignments}",
+            (plain.name,)
+        )
+        connection.commit()
+        return cursor.rowcount
+    finally:
+        os.unlink(plain.name)
+
+
+def import_tables(db: IlluminatiDB, directory: str, tables: Optional[Iterable[str]] = None,
+                  method: str = 'insert', truncate: bool = False, chunk_size: int = 5000,
+                  progress: Optional[Callable[[str], None]] = print) -> Dict[str, Any]:
+    """Load a dump in dependency order with foreign key checks off.
+
+    method is 'insert' (multi-row INSERTs, chunk_size rows per commit) or
+    'load-data' (LOAD DATA LOCAL INFILE; the pool must be created with
+    local_infile=True and the server must allow it). truncate empties the
+    tables first. Returns rows loaded and timing per table.
+    """
+    if method not in ('insert', 'load-data'):
+        raise ValueError("method must be 'insert' or 'load-data'")
+    manifest = _read_manifest(directory)
+    tables = _load_order(tables if tables is not None else manifest["tables"])
+    results = {}
+    started = time.perf_counter()
+    with db._connection() as connection, connection.cursor() as cursor:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        try:
+            if truncate:
+                for table in reversed(tables):
+                    cursor.execute(f"TRUNCATE TABLE {table}")
+            for table in tables:
+                table_started = time.perf_counter()
+                columns = manifest["tables"][table]["columns"]
+                binary = manifest["tables"][table].get("binary", [])
+                if method == 'load-data':
+                    count = _import_load_data(cursor, connection, directory, table, columns, binary)
+                else:
+                    count = _import_inserts(cursor, connection, directory, table, columns, binary, chunk_size)
+                results[table] = {"rows": count, "seconds": round(time.perf_counter() - table_started, 3)}
+                _report(progress, "Imported", table, results[table])
+        except Exception as e:
+            connection.rollback()
+            raise e
+        finally:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+    rebuilt = _rebuild_derived(db, progress)
+    if db.cache is not None:
+        db.cache.clear()
+    return {"seconds": round(time.perf_counter() - started, 3), "tables": results, "rebuilt": rebuilt}
+
+
+def _rebuild_derived(db: IlluminatiDB, progress: Optional[Callable[[str], None]]) -> List[str]:
+    """Rebuild what IlluminatiDB derives from the tables, which an import bypasses; returns their names."""
+    rebuilt = []
+    with db._connection() as connection, connection.cursor() as cursor:
+        cursor.execute(HIERARCHY_STORE_EXISTS_QUERY)
+        hierarchy = cursor.fetchone() is not None
+    if hierarchy:
+        db.create_hierarchy_store()
+        rebuilt.append("hierarchy_store")
+    if db.power_index is not None:
+        db.rebuild_power_index()
+        rebuilt.append("power_index")
+    if db.stats is not None:
+        db.rebuild_stats()
+        rebuilt.append("stats")
+    if db.surveillance_histogram is not None:
+        db.surveillance_histogram = SurveillanceHistogram()
+        db.refresh_surveillance_histogram()
+        rebuilt.append("surveillance_histogram")
+    if progress and rebuilt:
+        progress(f"Rebuilt {', '.join(rebuilt)}")
+    return rebuilt
+
+
+def verify_tables(db: IlluminatiDB, directory: str, tables: Optional[Iterable[str]] = None,
+                  chunk_size: int = 10_000) -> Dict[str, Any]:
+    """Compare the database with a dump's row counts and checksums, table by table."""
+    manifest = _read_manifest(directory)
+    report = {}
+    for table in _load_order(tables if tables is not None else manifest["tables"]):
+        expected = manifest["tables"][table]
+        digest = hashlib.sha256()
+        count = 0
+        with db._connection(exclusive=True) as connection:
+            rows = _ordered_rows(connection, table, chunk_size)
+            columns, _ = next(rows)
+            for row in rows:
+                digest.update(_format_row(row).encode('utf-8'))
+                count += 1
+        report[table] = {
+            "expected_rows": expected["rows"],
+            "rows": count,
+            "match": columns == expected["columns"] and count == expected["rows"]
+                     and digest.hexdigest() == expected["sha256"]
+        }
+    return {"consistent": all(table["match"] for table in report.values()), "tables": report}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Bulk export and import of the Illuminati schema")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="dump every table into a directory")
+    export.add_argument("directory")
+    export.add_argument("--tables", nargs="+", default=seed.TABLES)
+    export.add_argument("--parallel", type=int, default=4)
+    export.add_argument("--chunk-size", type=int, default=10_000)
+
+    load = commands.add_parser("import", help="load a dump in dependency order")
+    load.add_argument("directory")
+    load.add_argument("--tables", nargs="+")
+    load.add_argument("--method", choices=("insert", "load-data"), default="insert")
+    load.add_argument("--truncate", action="store_true", help="empty the tables first")
+    load.add_argument("--chunk-size", type=int, default=5000)
+
+    verify = commands.add_parser("verify", help="compare the database with a dump")
+    verify.add_argument("directory")
+    verify.add_argument("--tables", nargs="+")
+
+    for command in (export, load, verify):
+        seed.add_connection_arguments(command)
+    args = arg_parser.parse_args()
+
+    connect_args = {key: value for key, value in vars(args).items()
+                    if key in ('host', 'port', 'user', 'password', 'database') and value is not None}
+    if args.command == "export":
+        with IlluminatiDB(max_size=args.parallel + 1, **connect_args) as db:
+            manifest = export_tables(db, args.directory, args.tables, args.parallel, args.chunk_size)
+        rows = sum(table["rows"] for table in manifest["tables"].values())
+        print(f"Exported {rows} rows in {manifest['seconds']:.1f}s ({rows / manifest['seconds']:,.0f} rows/s)")
+    elif args.command == "import":
+        with IlluminatiDB(local_infile=args.method == "load-data", **connect_args) as db:
+            result = import_tables(db, args.directory, args.tables, args.method, args.truncate, args.chunk_size)
+        rows = sum(table["rows"] for table in result["tables"].values())
+        print(f"Imported {rows} rows in {result['seconds']:.1f}s ({rows / result['seconds']:,.0f} rows/s)")
+    else:
+        with IlluminatiDB(**connect_args) as db:
+            report = verify_tables(db, args.directory, args.tables)
+        for table, result in report["tables"].items():
+            status = "ok" if result["match"] else "MISMATCH"
+            print(f"{table:<24} {result['rows']:>10} / {result['expected_rows']:<10} {status}")
+        sys.exit(0 if report["consistent"] else 1)
+
+
+if __name__ == "__main__":
+    main()